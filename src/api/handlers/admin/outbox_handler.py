@@ -0,0 +1,72 @@
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends
+
+from src.api.handlers.errors import raise_http_from_app_error
+from src.api.schemas.requests_schemas.outbox.schemas import (
+    DeadLetterListQuery, DeadLetterRequeueRequest)
+from src.api.schemas.response_schemas.schemas import (DeadLetterListResponse,
+                                                      DeadLetterRequeueResponse,
+                                                      DeadLetterResponse)
+from src.container import Container
+from src.entity.tasks import Pagination
+from src.exceptions import AppError
+from src.usecase.outbox import OutboxUseCase
+
+router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["Admin"],
+)
+
+
+@router.get(
+    "/outbox/dead-letters",
+    response_model=DeadLetterListResponse,
+)
+@inject
+async def list_dead_letters(
+    uc: OutboxUseCase = Depends(Provide[Container.usecase.outbox_usecase]),
+    query: DeadLetterListQuery = Depends(DeadLetterListQuery.as_query),
+) -> DeadLetterListResponse:
+    """
+    Список outbox-событий, исчерпавших попытки отправки.
+    :param uc: Usecase с операциями над outbox.
+    :param query: Параметры пагинации из query.
+    :return: DeadLetterListResponse со списком и метаданными.
+    """
+
+    pagination = Pagination(page=query.page, page_size=query.page_size)
+    try:
+        events, total = await uc.list_dead_letters(pagination)
+    except AppError as exc:
+        raise_http_from_app_error("list_dead_letters", exc)
+
+    return DeadLetterListResponse(
+        total=total,
+        page=query.page,
+        page_size=query.page_size,
+        items=[DeadLetterResponse.from_entity(event) for event in events],
+    )
+
+
+@router.post(
+    "/outbox/dead-letters/requeue",
+    response_model=DeadLetterRequeueResponse,
+)
+@inject
+async def requeue_dead_letters(
+    body: DeadLetterRequeueRequest,
+    uc: OutboxUseCase = Depends(Provide[Container.usecase.outbox_usecase]),
+) -> DeadLetterRequeueResponse:
+    """
+    Вернуть выбранные dead-letter события в outbox.
+    :param body: Идентификаторы событий.
+    :param uc: Usecase с операциями над outbox.
+    :return: DeadLetterRequeueResponse с количеством возвращённых событий.
+    """
+
+    try:
+        requeued = await uc.requeue_dead_letters(body.ids)
+    except AppError as exc:
+        raise_http_from_app_error("requeue_dead_letters", exc)
+
+    return DeadLetterRequeueResponse(requeued=requeued)
@@ -0,0 +1,45 @@
+"""
+Преобразование ошибок приложения в HTTP-ответы.
+"""
+
+from fastapi import HTTPException, status
+
+from src.exceptions import (AppError, InvalidCursorError, MessagingError,
+                            RepositoryError, TaskCancellationError,
+                            TaskNotFoundError, TaskTransitionError)
+from src.logger import logger
+
+
+def map_app_error_to_http(exc: AppError) -> tuple[int, str]:
+    if isinstance(exc, TaskNotFoundError):
+        return status.HTTP_404_NOT_FOUND, "Task not found"
+    if isinstance(exc, TaskCancellationError):
+        return status.HTTP_400_BAD_REQUEST, "Task cannot be cancelled"
+    if isinstance(exc, TaskTransitionError):
+        return status.HTTP_409_CONFLICT, "Task status transition is not allowed"
+    if isinstance(exc, InvalidCursorError):
+        return status.HTTP_400_BAD_REQUEST, "Invalid pagination cursor"
+    if isinstance(exc, MessagingError):
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, "Messaging error"
+    if isinstance(exc, RepositoryError):
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, "Database error"
+    return status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal server error"
+
+
+def raise_http_from_app_error(operation: str, exc: AppError) -> None:
+    status_code, detail = map_app_error_to_http(exc)
+
+    log_extra = {
+        "error_type": type(exc).__name__,
+        **getattr(exc, "context", {}),
+    }
+
+    message = "Application error in %s: %s"
+
+    if 400 <= status_code < 500:
+        logger.warning(message, operation, str(exc), extra=log_extra)
+    else:
+        # 5xx и все остальные - ошибки сервера
+        logger.error(message, operation, str(exc), extra=log_extra)
+
+    raise HTTPException(status_code=status_code, detail=detail) from exc
@@ -1,13 +1,12 @@
 from uuid import UUID
 
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, status
 
+from src.api.handlers.errors import raise_http_from_app_error
 from src.container import Container
-from src.entity.tasks import CreateTask, Pagination, TaskFilter
-from src.exceptions import (AppError, MessagingError, RepositoryError,
-                            TaskCancellationError, TaskNotFoundError)
-from src.logger import logger
+from src.entity.tasks import CreateTask, Pagination, TaskCursor, TaskFilter
+from src.exceptions import AppError
 from src.api.schemas.requests_schemas.tasks.schemas import (TaskCreateRequest,
                                                             TaskListFilterQuery)
 from src.api.schemas.response_schemas.schemas import (TaskListResponse,
@@ -21,37 +20,6 @@ router = APIRouter(
 )
 
 
-def _map_app_error_to_http(exc: AppError) -> tuple[int, str]:
-    if isinstance(exc, TaskNotFoundError):
-        return status.HTTP_404_NOT_FOUND, "Task not found"
-    if isinstance(exc, TaskCancellationError):
-        return status.HTTP_400_BAD_REQUEST, "Task cannot be cancelled"
-    if isinstance(exc, MessagingError):
-        return status.HTTP_500_INTERNAL_SERVER_ERROR, "Messaging error"
-    if isinstance(exc, RepositoryError):
-        return status.HTTP_500_INTERNAL_SERVER_ERROR, "Database error"
-    return status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal server error"
-
-
-def _raise_http_from_app_error(operation: str, exc: AppError) -> None:
-    status_code, detail = _map_app_error_to_http(exc)
-
-    log_extra = {
-        "error_type": type(exc).__name__,
-        **getattr(exc, "context", {}),
-    }
-
-    message = "Application error in %s: %s"
-
-    if 400 <= status_code < 500:
-        logger.warning(message, operation, str(exc), extra=log_extra)
-    else:
-        # 5xx и все остальные - ошибки сервера
-        logger.error(message, operation, str(exc), extra=log_extra)
-
-    raise HTTPException(status_code=status_code, detail=detail) from exc
-
-
 @router.post(
     "/tasks/",
     response_model=TaskResponse,
@@ -78,7 +46,7 @@ async def create_task(
         task = await uc.create_task(payload)
         return TaskResponse.from_entity(task)
     except AppError as exc:
-        _raise_http_from_app_error("create_task", exc)
+        raise_http_from_app_error("create_task", exc)
 
 
 @router.get(
@@ -92,6 +60,9 @@ async def list_tasks(
 ) -> TaskListResponse:
     """
     Список задач с фильтрами и пагинацией.
+
+    Глубокие страницы дешевле листать через cursor: next_cursor из ответа
+    передаётся в следующий запрос вместо номера страницы.
     :param uc: Usecase с бизнес-логикой.
     :param filters: Параметры фильтрации и пагинации из query.
     :return: TaskListResponse со списком и метаданными.
@@ -101,18 +72,25 @@ async def list_tasks(
         status=filters.status,
         priority=filters.priority,
         search=filters.search.strip() if filters.search else None,
+        search_mode=filters.search_mode,
     )
-    pagination = Pagination(page=filters.page, page_size=filters.page_size)
     try:
-        tasks, total = await uc.list_tasks(task_filters, pagination)
+        pagination = Pagination(
+            page=filters.page,
+            page_size=filters.page_size,
+            cursor=TaskCursor.decode(filters.cursor) if filters.cursor else None,
+        )
+        page = await uc.list_tasks(task_filters, pagination, filters.total_mode)
     except AppError as exc:
-        _raise_http_from_app_error("list_tasks", exc)
+        raise_http_from_app_error("list_tasks", exc)
 
     return TaskListResponse(
-        total=total,
+        total=page.total,
+        total_mode=page.total_mode,
         page=filters.page,
         page_size=filters.page_size,
-        items=[TaskResponse.from_entity(task) for task in tasks],
+        items=[TaskResponse.from_entity(task) for task in page.items],
+        next_cursor=page.next_cursor.encode() if page.next_cursor else None,
     )
 
 
@@ -135,7 +113,7 @@ async def get_task(
     try:
         task = await uc.get_task(task_id)
     except AppError as exc:
-        _raise_http_from_app_error("get_task", exc)
+        raise_http_from_app_error("get_task", exc)
 
     return TaskResponse.from_entity(task)
 
@@ -159,7 +137,7 @@ async def cancel_task(
     try:
         cancelled = await uc.cancel_task(task_id)
     except AppError as exc:
-        _raise_http_from_app_error("cancel_task", exc)
+        raise_http_from_app_error("cancel_task", exc)
 
     return TaskResponse.from_entity(cancelled)
 
@@ -182,6 +160,6 @@ async def get_task_status(
     try:
         task = await uc.get_task(task_id)
     except AppError as exc:
-        _raise_http_from_app_error("get_task_status", exc)
+        raise_http_from_app_error("get_task_status", exc)
 
     return TaskStatusResponse(task_id=task.id, status=task.status)
\ No newline at end of file
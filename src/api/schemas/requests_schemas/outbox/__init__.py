@@ -0,0 +1,3 @@
+"""
+Outbox request schemas package marker.
+"""
@@ -0,0 +1,22 @@
+from typing import List
+from uuid import UUID
+
+from fastapi import Query
+from pydantic import BaseModel, Field
+
+
+class DeadLetterListQuery(BaseModel):
+    page: int = 1
+    page_size: int = 20
+
+    @classmethod
+    def as_query(
+        cls,
+        page: int = Query(1, ge=1),
+        page_size: int = Query(20, ge=1, le=100),
+    ) -> "DeadLetterListQuery":
+        return cls(page=page, page_size=page_size)
+
+
+class DeadLetterRequeueRequest(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=1000)
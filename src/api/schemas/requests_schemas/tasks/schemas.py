@@ -3,7 +3,7 @@ from typing import Optional
 from fastapi import Query
 from pydantic import BaseModel, Field
 
-from src.entity.tasks import TaskPriority, TaskStatus
+from src.entity.tasks import SearchMode, TaskPriority, TaskStatus, TotalMode
 
 
 class TaskCreateRequest(BaseModel):
@@ -16,8 +16,11 @@ class TaskListFilterQuery(BaseModel):
     status: Optional[TaskStatus] = None
     priority: Optional[TaskPriority] = None
     search: Optional[str] = None
+    search_mode: SearchMode = SearchMode.SUBSTRING
     page: int = 1
     page_size: int = 20
+    cursor: Optional[str] = None
+    total_mode: TotalMode = TotalMode.EXACT
 
     @classmethod
     def as_query(
@@ -25,13 +28,29 @@ class TaskListFilterQuery(BaseModel):
         status: Optional[TaskStatus] = Query(None, alias="status"),
         priority: Optional[TaskPriority] = Query(None, alias="priority"),
         search: Optional[str] = Query(None, min_length=1, max_length=255),
+        search_mode: SearchMode = Query(
+            SearchMode.SUBSTRING,
+            description="substring (подстрока) или fulltext (по словам, по релевантности)",
+        ),
         page: int = Query(1, ge=1),
         page_size: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = Query(
+            None,
+            max_length=512,
+            description="next_cursor из предыдущего ответа; при нём page игнорируется",
+        ),
+        total_mode: TotalMode = Query(
+            TotalMode.EXACT,
+            description="exact, estimated (оценка планировщика), cached (кэш с TTL) или none",
+        ),
     ) -> "TaskListFilterQuery":
         return cls(
             status=status,
             priority=priority,
             search=search,
+            search_mode=search_mode,
             page=page,
             page_size=page_size,
+            cursor=cursor,
+            total_mode=total_mode,
         )
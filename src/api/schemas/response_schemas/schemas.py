@@ -1,11 +1,12 @@
 from dataclasses import asdict
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
 
-from src.entity.tasks import Task, TaskPriority, TaskStatus
+from src.entity.outbox import DeadLetterEvent
+from src.entity.tasks import Task, TaskPriority, TaskStatus, TotalMode
 
 
 class TaskResponse(BaseModel):
@@ -26,12 +27,39 @@ class TaskResponse(BaseModel):
 
 
 class TaskListResponse(BaseModel):
-    total: int
+    total: Optional[int]
+    total_mode: TotalMode
     page: int
     page_size: int
     items: List[TaskResponse]
+    next_cursor: Optional[str] = None
 
 
 class TaskStatusResponse(BaseModel):
     task_id: UUID
-    status: TaskStatus
\ No newline at end of file
+    status: TaskStatus
+
+
+class DeadLetterResponse(BaseModel):
+    id: UUID
+    event_type: str
+    payload: Dict[str, Any]
+    retries: int
+    last_error: Optional[str]
+    created_at: datetime
+    dead_at: datetime
+
+    @staticmethod
+    def from_entity(event: DeadLetterEvent) -> "DeadLetterResponse":
+        return DeadLetterResponse(**asdict(event))
+
+
+class DeadLetterListResponse(BaseModel):
+    total: int
+    page: int
+    page_size: int
+    items: List[DeadLetterResponse]
+
+
+class DeadLetterRequeueResponse(BaseModel):
+    requeued: int
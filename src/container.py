@@ -12,7 +12,10 @@ class Container(containers.DeclarativeContainer):
 
     config = providers.Configuration()
     wiring_config = containers.WiringConfiguration(
-        modules=["src.api.handlers.tasks.task_handler"],
+        modules=[
+            "src.api.handlers.tasks.task_handler",
+            "src.api.handlers.admin.outbox_handler",
+        ],
     )
 
     infrastructure = providers.Container(
@@ -22,6 +25,7 @@ class Container(containers.DeclarativeContainer):
 
     usecase = providers.Container(
         UsecaseContainer,
+        config=config,
         task_repository=infrastructure.task_repository,
         uow=infrastructure.uow,
     )
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import random
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Dict, Optional
 from uuid import UUID
@@ -27,6 +28,18 @@ class OutboxEvent:
     last_error: Optional[str]
     created_at: datetime
     updated_at: datetime
+    next_attempt_at: datetime
+
+
+@dataclass(slots=True)
+class DeadLetterEvent:
+    id: UUID
+    event_type: str
+    payload: Dict[str, Any]
+    retries: int
+    last_error: Optional[str]
+    created_at: datetime
+    dead_at: datetime
 
 
 @dataclass(slots=True)
@@ -34,3 +47,27 @@ class NewOutboxEvent:
     event_type: str
     payload: Dict[str, Any]
 
+
+@dataclass(slots=True)
+class OutboxFailure:
+    event_id: UUID
+    error: str
+    next_attempt_at: datetime
+
+
+@dataclass(slots=True)
+class RetryBackoff:
+    """
+    Экспоненциальная задержка повторной отправки с джиттером.
+    """
+
+    base: float = 1.0
+    cap: float = 300.0
+
+    def delay(self, retries: int) -> timedelta:
+        """
+        Задержка перед попыткой после retries неудачных: случайное значение
+        из [ceiling / 2, ceiling], где ceiling = min(cap, base * 2 ** retries).
+        """
+        ceiling = min(self.cap, self.base * 2 ** retries)
+        return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
 import typing
 import uuid
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional
+
+from src.exceptions import InvalidCursorError
 
 TaskId = typing.NewType("TaskID", uuid.UUID)
 
@@ -19,12 +25,62 @@ class TaskStatus(str, Enum):
     CANCELLED = "CANCELLED"
 
 
+# Допустимые переходы статусов: из ключа можно перейти в любой статус значения.
+# Репозиторий строит по таблице условие WHERE status IN (...) для UPDATE.
+TASK_TRANSITIONS: Mapping[TaskStatus, FrozenSet[TaskStatus]] = MappingProxyType({
+    TaskStatus.NEW: frozenset({TaskStatus.IN_PROGRESS, TaskStatus.CANCELLED}),
+    TaskStatus.PENDING: frozenset({TaskStatus.IN_PROGRESS, TaskStatus.CANCELLED}),
+    TaskStatus.IN_PROGRESS: frozenset({
+        TaskStatus.PENDING,
+        TaskStatus.COMPLETED,
+        TaskStatus.FAILED,
+        TaskStatus.CANCELLED,
+    }),
+    TaskStatus.COMPLETED: frozenset(),
+    TaskStatus.FAILED: frozenset(),
+    TaskStatus.CANCELLED: frozenset(),
+})
+
+TERMINAL_STATUSES: FrozenSet[TaskStatus] = frozenset(
+    status for status, targets in TASK_TRANSITIONS.items() if not targets
+)
+
+
+def can_transition(current: TaskStatus, target: TaskStatus) -> bool:
+    return target in TASK_TRANSITIONS[current]
+
+
+def transition_sources(target: TaskStatus) -> FrozenSet[TaskStatus]:
+    """
+    Статусы, из которых разрешён переход в target.
+    :param target: Целевой статус.
+    :return: frozenset статусов
+    """
+    return frozenset(
+        status for status, targets in TASK_TRANSITIONS.items() if target in targets
+    )
+
+
 class TaskPriority(str, Enum):
     LOW = "LOW"
     MEDIUM = "MEDIUM"
     HIGH = "HIGH"
 
 
+class TotalMode(str, Enum):
+    """
+    Как считать total для списка задач.
+
+    exact — count(*) по фильтрам; estimated — оценка планировщика;
+    cached — точный count, переиспользуемый в пределах TTL; none — не считать.
+    """
+
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    CACHED = "cached"
+    NONE = "none"
+
+
 @dataclass(slots=True)
 class Task:
     id: TaskId
@@ -38,6 +94,64 @@ class Task:
     result: Optional[str]
     error: Optional[str]
 
+    def to_snapshot(self) -> Dict[str, Any]:
+        """
+        JSON-совместимый снимок задачи для payload outbox-события.
+        """
+        return {
+            "id": str(self.id),
+            "name": self.name,
+            "description": self.description,
+            "priority": self.priority.value,
+            "status": self.status.value,
+            "created_at": self.created_at.isoformat(),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> Task:
+        return cls(
+            id=TaskId(uuid.UUID(snapshot["id"])),
+            name=snapshot["name"],
+            description=snapshot["description"],
+            priority=TaskPriority(snapshot["priority"]),
+            status=TaskStatus(snapshot["status"]),
+            created_at=datetime.fromisoformat(snapshot["created_at"]),
+            started_at=None,
+            finished_at=None,
+            result=None,
+            error=None,
+        )
+
+
+@dataclass(slots=True)
+class TaskTransition:
+    """
+    Результат условного перехода статуса.
+
+    previous — статус до перехода, None если задачи нет;
+    task — задача после перехода, None если переход из previous недопустим.
+    """
+
+    previous: Optional[TaskStatus]
+    task: Optional[Task] = None
+
+    @property
+    def found(self) -> bool:
+        return self.previous is not None
+
+    @property
+    def applied(self) -> bool:
+        return self.task is not None
+
+
+@dataclass(slots=True)
+class TaskStatusUpdate:
+    task_id: TaskId
+    status: TaskStatus
+    finished_at: datetime
+    result: Optional[str] = None
+    error: Optional[str] = None
+
 
 @dataclass(slots=True)
 class CreateTask:
@@ -46,25 +160,93 @@ class CreateTask:
     priority: TaskPriority
 
 
+class SearchMode(str, Enum):
+    """
+    Как искать по search.
+
+    substring — вхождение подстроки в name или description без учёта регистра;
+    fulltext — полнотекстовый поиск по словам с сортировкой по релевантности.
+    """
+
+    SUBSTRING = "substring"
+    FULLTEXT = "fulltext"
+
+
 @dataclass(slots=True)
 class TaskFilter:
     status: Optional[TaskStatus] = None
     priority: Optional[TaskPriority] = None
     search: Optional[str] = None
+    search_mode: SearchMode = SearchMode.SUBSTRING
     created_from: Optional[datetime] = None
     created_to: Optional[datetime] = None
 
 
+@dataclass(slots=True, frozen=True)
+class TaskCursor:
+    """
+    Позиция в списке задач: ключ (created_at, id) последней выданной задачи.
+
+    Клиенту отдаётся непрозрачной строкой, следующая страница начинается
+    строго после этой позиции.
+    """
+
+    created_at: datetime
+    id: TaskId
+
+    @classmethod
+    def after(cls, task: Task) -> TaskCursor:
+        return cls(created_at=task.created_at, id=task.id)
+
+    def encode(self) -> str:
+        raw = json.dumps({"c": self.created_at.isoformat(), "i": str(self.id)})
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> TaskCursor:
+        """
+        Разбирает строку, полученную из encode().
+        :param token: Курсор из запроса клиента.
+        :return: TaskCursor
+        """
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            created_at = datetime.fromisoformat(raw["c"])
+            # created_at хранится как naive UTC: сравнение с aware-значением
+            # в запросе упало бы уже в базе.
+            if created_at.tzinfo is not None:
+                raise ValueError("cursor timestamp must be naive UTC")
+            return cls(created_at=created_at, id=TaskId(uuid.UUID(raw["i"])))
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as exc:
+            raise InvalidCursorError(cursor=token) from exc
+
+
 @dataclass(slots=True)
 class Pagination:
+    """
+    Постраничная выборка: по номеру страницы или, если задан cursor,
+    по ключу (created_at, id) без OFFSET.
+    """
+
     page: int = 1
     page_size: int = 20
+    cursor: Optional[TaskCursor] = None
 
     @property
     def offset(self) -> int:
+        if self.cursor is not None:
+            return 0
         return (self.page - 1) * self.page_size
 
     @property
     def limit(self) -> int:
         return self.page_size
 
+
+@dataclass(slots=True)
+class TaskPage:
+    items: List[Task]
+    total: Optional[int]
+    next_cursor: Optional[TaskCursor] = None
+    total_mode: TotalMode = TotalMode.EXACT
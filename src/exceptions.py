@@ -58,19 +58,44 @@ class TaskNotFoundError(TaskError):
 
 
 @dataclass
-class TaskCancellationError(TaskError):
+class TaskTransitionError(TaskError):
+    """
+    Вызывается, когда задачу нельзя перевести из текущего статуса в целевой.
+    """
 
     task_id: Any
     status: Any
-    message: str = "Task cannot be cancelled in the current status"
+    target: Any
+    message: str = "Task status transition is not allowed"
 
     def __post_init__(self) -> None:
         self.context = {
             "task_id": str(self.task_id),
             "status": str(self.status),
+            "target": str(self.target),
         }
 
 
+@dataclass
+class TaskCancellationError(TaskTransitionError):
+
+    target: Any = "CANCELLED"
+    message: str = "Task cannot be cancelled in the current status"
+
+
+@dataclass
+class InvalidCursorError(TaskError):
+    """
+    Вызывается, когда курсор пагинации не удаётся разобрать.
+    """
+
+    cursor: Any
+    message: str = "Invalid pagination cursor"
+
+    def __post_init__(self) -> None:
+        self.context = {"cursor": str(self.cursor)}
+
+
 class TaskCreationError(TaskError):
     """
     Вызывается, когда задача не может быть создана.
@@ -104,3 +129,16 @@ class TaskConsumeError(MessagingError):
             self.context = {"raw_message": str(self.raw_message)}
 
 
+@dataclass
+class TaskHandlerError(MessagingError):
+    """
+    Вызывается, когда обработчик задачи завершился ошибкой; исходная ошибка в __cause__.
+    """
+
+    task_id: Any
+    message: str = "Task handler failed"
+
+    def __post_init__(self) -> None:
+        self.context = {"task_id": str(self.task_id)}
+
+
@@ -34,6 +34,8 @@ class InfrastructureContainer(containers.DeclarativeContainer):
             pg_port=config.DB_PORT,
             pg_db=config.DB_NAME,
         ),
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
     )
 
     session_factory = providers.Factory(
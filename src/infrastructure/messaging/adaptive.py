@@ -0,0 +1,86 @@
+"""
+Адаптивный подбор размера пачки и параллелизма публикации для OutboxDispatcher.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+
+class AdaptiveBatchController:
+    """
+    AIMD-регулятор: растит пачку и окно публикации, пока очередь полна,
+    а брокер отвечает быстро, и резко уменьшает их при росте латентности
+    или доли ошибок.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_batch_size: int = 50,
+        min_batch_size: int = 10,
+        max_batch_size: int = 1000,
+        initial_concurrency: int = 50,
+        min_concurrency: int = 1,
+        max_concurrency: int = 500,
+        target_latency: float = 0.1,
+        max_error_rate: float = 0.05,
+        growth: float = 1.5,
+        backoff: float = 0.5,
+    ) -> None:
+        """
+        :param target_latency: Допустимый p90 подтверждения брокера, секунды.
+        :param max_error_rate: Доля неудачных публикаций, после которой сжимаемся.
+        :param growth: Множитель роста при здоровом брокере и полной пачке.
+        :param backoff: Множитель уменьшения при перегрузке брокера.
+        """
+        self._min_batch_size = min_batch_size
+        self._max_batch_size = max_batch_size
+        self._min_concurrency = min_concurrency
+        self._max_concurrency = max_concurrency
+        self._target_latency = target_latency
+        self._max_error_rate = max_error_rate
+        self._growth = growth
+        self._backoff = backoff
+        self.batch_size = self._clamp(initial_batch_size, min_batch_size, max_batch_size)
+        self.concurrency = self._clamp(initial_concurrency, min_concurrency, max_concurrency)
+
+    def observe(self, *, fetched: int, latencies: Sequence[float], failed: int) -> None:
+        """
+        Учитывает итог очередной пачки.
+        :param fetched: Сколько событий удалось захватить при текущем batch_size.
+        :param latencies: Латентности публикаций пачки.
+        :param failed: Сколько публикаций завершились ошибкой.
+        """
+        if not latencies:
+            return
+
+        error_rate = failed / len(latencies)
+        latency = self._p90(latencies)
+        if error_rate > self._max_error_rate or latency > self._target_latency:
+            self.batch_size = self._clamp(
+                int(self.batch_size * self._backoff), self._min_batch_size, self._max_batch_size
+            )
+            self.concurrency = self._clamp(
+                int(self.concurrency * self._backoff), self._min_concurrency, self._max_concurrency
+            )
+            return
+
+        # Неполная пачка значит, что очередь разобрана и расти незачем.
+        if fetched < self.batch_size:
+            return
+        self.batch_size = self._clamp(
+            int(self.batch_size * self._growth) + 1, self._min_batch_size, self._max_batch_size
+        )
+        self.concurrency = self._clamp(
+            int(self.concurrency * self._growth) + 1, self._min_concurrency, self._max_concurrency
+        )
+
+    @staticmethod
+    def _p90(values: Sequence[float]) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+    @staticmethod
+    def _clamp(value: int, low: int, high: int) -> int:
+        return max(low, min(high, value))
@@ -1,16 +1,31 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import json
+import signal
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Optional
+from datetime import datetime
+from functools import partial
+from typing import (Any, Awaitable, Callable, Dict, List, Optional, Sequence,
+                    Set, Tuple)
 from uuid import UUID
 
 import aio_pika
+from aio_pika.exceptions import AMQPError
 
 from src.container import Container
-from src.entity.tasks import TaskStatus
-from src.exceptions import TaskConsumeError
+from src.entity.tasks import TaskPriority, TaskStatus, TaskStatusUpdate
+from src.exceptions import TaskConsumeError, TaskHandlerError
+from src.infrastructure.messaging.handlers import TaskHandlerRegistry, registry
+from src.infrastructure.messaging.priority_queue import (QUEUE_MODE_SPLIT,
+                                                         TASK_CANCELLED,
+                                                         split_queue_names)
+from src.infrastructure.messaging.retry import RetryTopology
+from src.infrastructure.messaging.scheduler import WeightedFairScheduler
+from src.infrastructure.messaging.status_buffer import StatusWriteBuffer
+from src.infrastructure.messaging.wire import decode_task
 from src.logger import logger
 from src.settings import settings
 from src.usecase.tasks import TaskUseCase
@@ -23,20 +38,114 @@ class TaskMessage:
     raw: dict[str, Any]
 
 
+class RecentIds:
+    """
+    Множество последних id ограниченного размера: самые старые вытесняются.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._ids: OrderedDict[UUID, None] = OrderedDict()
+
+    def add(self, item: UUID) -> None:
+        self._ids[item] = None
+        self._ids.move_to_end(item)
+        while len(self._ids) > self._maxsize:
+            self._ids.popitem(last=False)
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
 class TaskConsumer:
 
-    def __init__(self, *, usecase: Optional[TaskUseCase] = None) -> None:
+    def __init__(
+        self,
+        *,
+        usecase: Optional[TaskUseCase] = None,
+        prefetch_count: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        write_behind: Optional[bool] = None,
+        handlers: Optional[TaskHandlerRegistry] = None,
+        shutdown_timeout: Optional[float] = None,
+        retry_delays_ms: Optional[Sequence[int]] = None,
+        queue_mode: Optional[str] = None,
+    ) -> None:
+        """
+        :param prefetch_count: Сколько неподтверждённых сообщений брокер выдаёт заранее.
+        :param concurrency: Сколько сообщений обрабатывается одновременно.
+        :param write_behind: Писать финальные статусы пачками через StatusWriteBuffer.
+        :param handlers: Реестр обработчиков задач, по умолчанию общий registry.
+        :param shutdown_timeout: Сколько секунд ждать текущие задачи при остановке.
+        :param retry_delays_ms: Задержки повторных попыток, мс.
+        :param queue_mode: "priority" - одна очередь с x-max-priority,
+            "split" - очередь на приоритет и взвешенный выбор между ними.
+        """
         self._url: str = self._get_rabbitmq_url()
         self._queue_name: str = settings.TASK_QUEUE_NAME
+        self._control_exchange: str = settings.TASK_CONTROL_EXCHANGE
         self._max_priority: int = settings.TASK_QUEUE_MAX_PRIORITY
+        delays = settings.TASK_RETRY_DELAYS_MS if retry_delays_ms is None else retry_delays_ms
+        self._retry = RetryTopology(self._queue_name, delays)
+        self._split_queues: Optional[Dict[TaskPriority, RetryTopology]] = None
+        self._scheduler: Optional[
+            WeightedFairScheduler[TaskPriority, Tuple[aio_pika.IncomingMessage, RetryTopology]]
+        ] = None
+        if (queue_mode or settings.TASK_QUEUE_MODE) == QUEUE_MODE_SPLIT:
+            self._split_queues = {
+                priority: RetryTopology(name, delays)
+                for priority, name in split_queue_names(self._queue_name).items()
+            }
+            self._scheduler = WeightedFairScheduler(
+                {
+                    priority: settings.TASK_QUEUE_WEIGHTS.get(priority.value, 1)
+                    for priority in TaskPriority
+                },
+                aging=settings.TASK_QUEUE_AGING_MS / 1000,
+            )
+        self._concurrency: int = concurrency or settings.CONSUMER_CONCURRENCY
+        self._workers: List[asyncio.Task[None]] = []
+        self._channel: Optional[aio_pika.abc.AbstractChannel] = None
+        self._prefetch_count: int = prefetch_count or settings.CONSUMER_PREFETCH_COUNT
+        self._slots = asyncio.Semaphore(concurrency or settings.CONSUMER_CONCURRENCY)
         self._usecase: TaskUseCase = usecase or self._build_usecase()
+        self._handlers: TaskHandlerRegistry = handlers or registry
+        self._shutdown_timeout: float = (
+            settings.CONSUMER_SHUTDOWN_TIMEOUT if shutdown_timeout is None else shutdown_timeout
+        )
+        self._stopping = asyncio.Event()
+        self._inflight: Set[asyncio.Task[Any]] = set()
+        self._cancelled = RecentIds(settings.CONSUMER_CANCELLED_CACHE_SIZE)
+        self._running: Dict[UUID, asyncio.Future[Optional[str]]] = {}
+        # Захваченные задачи и доставка (asyncio-задача), которая держит захват.
+        self._claimed: Dict[UUID, Optional[asyncio.Task[Any]]] = {}
+        if write_behind is None:
+            write_behind = settings.CONSUMER_WRITE_BEHIND
+        self._status_buffer: Optional[StatusWriteBuffer] = (
+            StatusWriteBuffer(
+                self._usecase.finish_tasks,
+                flush_interval=settings.CONSUMER_FLUSH_INTERVAL_MS / 1000,
+                max_items=settings.CONSUMER_FLUSH_MAX_ITEMS,
+            )
+            if write_behind
+            else None
+        )
+
+    def stop(self) -> None:
+        """
+        Просит консьюмер остановиться. Безопасно вызывать из обработчика сигнала.
+        """
+        self._stopping.set()
 
     async def start(self) -> None:
         try:
             connection: aio_pika.abc.AbstractRobustConnection = await aio_pika.connect_robust(
                 self._url
             )
-        except aio_pika.AMQPError as exc:
+        except AMQPError as exc:
             logger.error("Failed to connect to RabbitMQ as consumer: %s", exc)
             raise TaskConsumeError("Failed to connect to RabbitMQ") from exc
 
@@ -45,52 +154,328 @@ class TaskConsumer:
         async with connection:
             try:
                 channel: aio_pika.abc.AbstractChannel = await connection.channel()
-                await channel.declare_queue(
-                    self._queue_name,
+                await channel.set_qos(prefetch_count=self._prefetch_count)
+                self._channel = channel
+
+                control_exchange = await channel.declare_exchange(
+                    self._control_exchange,
+                    aio_pika.ExchangeType.FANOUT,
                     durable=True,
-                    arguments={"x-max-priority": self._max_priority},
                 )
+                # Своя эксклюзивная очередь у каждого консьюмера: отмену получают все.
+                control_queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+                await control_queue.bind(control_exchange)
+                await control_queue.consume(self._on_control, no_ack=True)
 
-                queue: aio_pika.abc.AbstractQueue = await channel.declare_queue(
-                    self._queue_name, durable=True
-                )
+                subscriptions = await self._subscribe(channel)
+                await self._stopping.wait()
 
-                await queue.consume(self._on_message, no_ack=False)
-                logger.info("Started consuming from queue %s", self._queue_name)
-                await asyncio.Future()
-            except aio_pika.AMQPError as exc:
+                logger.info("Stopping consumer, draining %s in-flight tasks", len(self._inflight))
+                for queue, consumer_tag in subscriptions:
+                    await queue.cancel(consumer_tag)
+                await self.drain()
+                await channel.close()
+            except AMQPError as exc:
                 logger.error("RabbitMQ error in consumer: %s", exc)
                 raise TaskConsumeError("RabbitMQ consumer error") from exc
+            finally:
+                self._handlers.close()
+        logger.info("Consumer stopped")
+
+    async def _subscribe(
+        self, channel: aio_pika.abc.AbstractChannel
+    ) -> List[Tuple[aio_pika.abc.AbstractQueue, str]]:
+        """
+        Объявляет рабочие очереди с очередями повторов и подписывается на них.
+        """
+        if self._split_queues is None:
+            queue = await channel.declare_queue(
+                self._queue_name,
+                durable=True,
+                arguments={"x-max-priority": self._max_priority},
+            )
+            await self._retry.declare(channel)
+            consumer_tag = await queue.consume(self._on_message, no_ack=False)
+            logger.info(
+                "Started consuming from queue %s (prefetch=%s)",
+                self._queue_name,
+                self._prefetch_count,
+            )
+            return [(queue, consumer_tag)]
+
+        subscriptions = []
+        for priority, retry in self._split_queues.items():
+            queue = await channel.declare_queue(retry.queue_name, durable=True)
+            await retry.declare(channel)
+            consumer_tag = await queue.consume(
+                partial(self._enqueue, priority, retry), no_ack=False
+            )
+            subscriptions.append((queue, consumer_tag))
+        self._start_workers()
+        logger.info(
+            "Started consuming from %s queues (prefetch=%s)",
+            ", ".join(retry.queue_name for retry in self._split_queues.values()),
+            self._prefetch_count,
+        )
+        return subscriptions
+
+    async def _enqueue(
+        self,
+        priority: TaskPriority,
+        retry: RetryTopology,
+        message: aio_pika.IncomingMessage,
+    ) -> None:
+        """
+        Кладёт сообщение из очереди приоритета в планировщик воркеров.
+        """
+        if self._stopping.is_set() or self._scheduler is None:
+            await message.nack(requeue=True)
+            return
+        self._scheduler.put(priority, (message, retry))
+
+    def _start_workers(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"task-consumer-worker-{i}")
+            for i in range(self._concurrency)
+        ]
 
-    async def _on_message(self, message: aio_pika.IncomingMessage) -> None:
-        async with message.process(requeue=False):
+    async def _work(self) -> None:
+        """
+        Воркер режима split: берёт сообщения у планировщика по весам приоритетов.
+        """
+        assert self._scheduler is not None
+        while True:
+            _, (message, retry) = await self._scheduler.get()
+            # shield: остановка воркера не должна прерывать уже начатую задачу,
+            # её дожидается drain() наравне с остальными.
+            handling = asyncio.create_task(self._on_message(message, retry))
             try:
-                payload: dict[str, Any] = json.loads(message.body.decode())
-                task_msg = TaskMessage(raw=payload)
-                await self._process_task(task_msg)
-                logger.info("Processed task message: %s", payload.get("id"))
-            except (json.JSONDecodeError, KeyError, ValueError) as exc:
-                logger.warning("Invalid task message received: %s", exc)
-                raise TaskConsumeError("Invalid task message payload") from exc
-
-    async def _process_task(self, task: TaskMessage) -> None:
-        task_id = self._extract_task_id(task)
+                await asyncio.shield(handling)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Unhandled error while processing task message")
+
+    async def drain(self) -> None:
+        """
+        Дожидается текущих задач не дольше shutdown_timeout и записывает отложенные статусы.
+
+        Задачи, не успевшие завершиться, прерываются: захват снимается,
+        а сообщение возвращается в очередь для повторной доставки.
+        """
+        self._stopping.set()
+        if self._workers:
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+        if self._inflight:
+            _, pending = await asyncio.wait(set(self._inflight), timeout=self._shutdown_timeout)
+            if pending:
+                logger.warning("Interrupting %s tasks after shutdown timeout", len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        if self._scheduler is not None:
+            for _, (message, _) in self._scheduler.drain():
+                await message.nack(requeue=True)
+        if self._status_buffer is not None:
+            await self._status_buffer.flush()
+
+    async def _on_message(
+        self,
+        message: aio_pika.IncomingMessage,
+        retry: Optional[RetryTopology] = None,
+    ) -> None:
+        """
+        :param retry: Топология повторов очереди, из которой пришло сообщение.
+        """
+        retry = retry or self._retry
+        if self._stopping.is_set():
+            # Доставлено между сигналом остановки и отменой подписки.
+            await message.nack(requeue=True)
+            return
+
+        current = asyncio.current_task()
+        if current is not None:
+            self._inflight.add(current)
         try:
-            await self._usecase.set_status(task_id, TaskStatus.IN_PROGRESS)
-            # Здесь могла быть бизнес-логика обработки задачи.
-            await self._usecase.set_status(
-                task_id,
-                TaskStatus.COMPLETED,
-                result="Processed by TaskConsumer",
-            )
+            # Сообщение подтверждается при выходе из process(), то есть только после
+            # записи финального статуса (в том числе отложенной) либо после
+            # переотправки в очередь повтора или парковки.
+            async with message.process(requeue=False, ignore_processed=True):
+                try:
+                    payload = decode_task(message.body, message.content_type)
+                    task_id = self._extract_task_id(TaskMessage(raw=payload))
+                except (KeyError, TypeError, ValueError, TaskConsumeError) as exc:
+                    # Сообщение не разобрать, повтор тут не поможет.
+                    logger.warning("Task message cannot be decoded: %s", exc)
+                    await self._reroute(message, retry.park, exc.__cause__ or exc)
+                    return
+
+                try:
+                    await self._process_task(
+                        task_id,
+                        reclaim=retry.reclaims(message),
+                        last_attempt=retry.is_last_attempt(message),
+                    )
+                    logger.info("Processed task message: %s", task_id)
+                except asyncio.CancelledError:
+                    await message.nack(requeue=True)
+                    raise
+                except Exception as exc:
+                    # Ошибка обработчика или инфраструктуры: следующая попытка,
+                    # после последней retry() сам паркует сообщение.
+                    error = exc.__cause__ if isinstance(exc, TaskHandlerError) else exc
+                    logger.warning("Task %s processing failed, retrying: %s", task_id, error)
+                    # Перехват нужен, только если захват остался за этой доставкой:
+                    # дубликат, не получивший задачу, чужую метку не трогает.
+                    holds_claim = self._claimed.get(task_id, False) is current
+                    if holds_claim:
+                        del self._claimed[task_id]
+                    await self._reroute(
+                        message, retry.retry, error or exc, reclaim=holds_claim
+                    )
+        finally:
+            if current is not None:
+                self._inflight.discard(current)
+
+    async def _reroute(
+        self,
+        message: aio_pika.IncomingMessage,
+        route: Callable[..., Awaitable[str]],
+        error: BaseException,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Переотправляет сообщение на повтор или парковку.
+
+        Если переотправить не удалось, оригинал возвращается в очередь,
+        иначе process() отклонил бы его без повторной доставки.
+        """
+        try:
+            await route(self._require_channel(), message, error, **kwargs)
         except Exception as exc:
-            logger.exception("Failed to process task %s: %s", task_id, exc)
-            await self._usecase.set_status(
-                task_id,
-                TaskStatus.FAILED,
-                error=str(exc),
+            logger.error("Failed to reroute task message, requeueing it: %s", exc)
+            await message.nack(requeue=True)
+
+    async def _on_control(self, message: aio_pika.IncomingMessage) -> None:
+        try:
+            payload: dict[str, Any] = json.loads(message.body.decode())
+            if payload.get("type") != TASK_CANCELLED:
+                return
+            task_id = UUID(payload["task_id"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
+            logger.warning("Invalid control message received: %s", exc)
+            return
+        self.cancel(task_id)
+
+    def cancel(self, task_id: UUID) -> None:
+        """
+        Запоминает отмену задачи и прерывает её обработчик, если он уже выполняется.
+
+        Прерывание кооперативное: async-обработчик получает CancelledError
+        в ближайшей точке await, а обработчик в пуле потоков или процессов
+        доработает, но его результат будет отброшен.
+        """
+        self._cancelled.add(task_id)
+        running = self._running.get(task_id)
+        if running is not None and not running.done():
+            logger.info("Interrupting cancelled task %s", task_id)
+            running.cancel()
+
+    async def _process_task(
+        self,
+        task_id: UUID,
+        *,
+        reclaim: bool = False,
+        last_attempt: bool = True,
+    ) -> None:
+        """
+        Захватывает и выполняет задачу.
+
+        Ошибка обработчика пробрасывается как TaskHandlerError: на не последней
+        попытке захват перед этим снимается, на последней задача помечается
+        FAILED. Ошибки БД пробрасываются как есть. Пока захват не снят или
+        не записан финальный статус, task_id лежит в _claimed за текущей доставкой.
+        :param reclaim: Прошлая попытка оставила задачу IN_PROGRESS за собой.
+        :param last_attempt: Повторов больше не будет.
+        """
+        if task_id in self._cancelled:
+            logger.info("Task %s was cancelled, dropping message", task_id)
+            return
+        failure: Optional[Exception] = None
+        result: Optional[str] = None
+        # Слот занят только на время захвата и работы, ожидание записи статуса
+        # его не держит.
+        async with self._slots:
+            # Задачу в IN_PROGRESS перехватываем, только если её оставила
+            # прошлая попытка этого сообщения: иначе её сейчас выполняет
+            # другой консьюмер, например после повторной публикации.
+            claimed = await self._usecase.claim_task(task_id, reclaim=reclaim)
+            if claimed is None:
+                logger.info("Task %s is already claimed, cancelled or finished, skipping", task_id)
+                return
+            self._claimed[task_id] = asyncio.current_task()
+            handler = asyncio.ensure_future(self._handlers.run(claimed))
+            self._running[task_id] = handler
+            try:
+                result = await handler
+            except asyncio.CancelledError:
+                current = asyncio.current_task()
+                if current is not None and current.cancelling():
+                    logger.warning("Task %s interrupted, releasing claim", task_id)
+                    await self._usecase.release_task(task_id)
+                    self._claimed.pop(task_id, None)
+                    raise
+                # Прерван только обработчик: задача отменена, статус CANCELLED
+                # уже записан, сообщение просто подтверждается.
+                logger.info("Task %s cancelled while processing", task_id)
+                self._claimed.pop(task_id, None)
+                return
+            except Exception as exc:
+                logger.exception("Failed to process task %s: %s", task_id, exc)
+                failure = exc
+            finally:
+                self._running.pop(task_id, None)
+
+        if failure is not None:
+            if last_attempt:
+                await self._finish(task_id, TaskStatus.FAILED, error=str(failure))
+            else:
+                await self._usecase.release_task(task_id)
+            self._claimed.pop(task_id, None)
+            raise TaskHandlerError(task_id=task_id) from failure
+        await self._finish(task_id, TaskStatus.COMPLETED, result=result)
+        self._claimed.pop(task_id, None)
+
+    async def _finish(
+        self,
+        task_id: UUID,
+        status: TaskStatus,
+        *,
+        result: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        if self._status_buffer is not None:
+            await self._status_buffer.submit(
+                TaskStatusUpdate(
+                    task_id=task_id,
+                    status=status,
+                    finished_at=datetime.utcnow(),
+                    result=result,
+                    error=error,
+                )
             )
-            raise TaskConsumeError("Task processing failed") from exc
+            return
+        finished = await self._usecase.finish_task(task_id, status, result=result, error=error)
+        if finished is None:
+            logger.info("Task %s left IN_PROGRESS while processing, result dropped", task_id)
+
+    def _require_channel(self) -> aio_pika.abc.AbstractChannel:
+        if self._channel is None:
+            raise TaskConsumeError("Consumer channel is not open")
+        return self._channel
 
     @staticmethod
     def _extract_task_id(task: TaskMessage) -> UUID:
@@ -113,4 +498,17 @@ class TaskConsumer:
         return container.usecase.task_usecase()
 
 
+async def main() -> None:
+    """
+    Запуск консьюмера как отдельного процесса с остановкой по SIGTERM/SIGINT.
+    """
+    consumer = TaskConsumer()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, consumer.stop)
+    await consumer.start()
+
 
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+"""
+Реестр обработчиков задач для TaskConsumer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+from src.entity.tasks import Task
+from src.settings import settings
+
+
+class HandlerKind(str, Enum):
+    # Корутина, выполняется прямо в event loop консьюмера.
+    ASYNC = "async"
+    # Блокирующая функция (I/O, синхронные клиенты), выполняется в пуле потоков.
+    THREAD = "thread"
+    # Вычислительная функция, выполняется в пуле процессов.
+    CPU = "cpu"
+
+
+@dataclass(slots=True, frozen=True)
+class TaskHandler:
+    func: Callable[[Task], Any]
+    kind: HandlerKind
+
+
+async def default_handler(task: Task) -> str:
+    return "Processed by TaskConsumer"
+
+
+class TaskHandlerRegistry:
+    """
+    Сопоставляет имя задачи с обработчиком и запускает его в нужном исполнителе.
+
+    Обработчик получает захваченную задачу и возвращает строку результата.
+    CPU-обработчики выполняются в отдельном процессе, поэтому они и их
+    аргументы должны сериализоваться pickle: регистрировать нужно функции
+    уровня модуля.
+    """
+
+    def __init__(
+        self,
+        *,
+        default: Optional[TaskHandler] = None,
+        cpu_workers: Optional[int] = None,
+    ) -> None:
+        """
+        :param default: Обработчик для задач без зарегистрированного имени.
+        :param cpu_workers: Размер пула процессов, по умолчанию число ядер.
+        """
+        self._handlers: Dict[str, TaskHandler] = {}
+        self._default = default or TaskHandler(default_handler, HandlerKind.ASYNC)
+        self._cpu_workers = cpu_workers
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+
+    def register(
+        self, name: str, *, kind: HandlerKind = HandlerKind.ASYNC
+    ) -> Callable[[Callable[[Task], Any]], Callable[[Task], Any]]:
+        """
+        Декоратор регистрации обработчика.
+        :param name: Имя задачи, которое обрабатывает функция.
+        :param kind: Где выполнять обработчик.
+        """
+
+        def decorator(func: Callable[[Task], Any]) -> Callable[[Task], Any]:
+            if kind is HandlerKind.ASYNC and not asyncio.iscoroutinefunction(func):
+                raise TypeError(f"Handler for {name!r} declared async but is not a coroutine")
+            self._handlers[name] = TaskHandler(func, kind)
+            return func
+
+        return decorator
+
+    def get(self, name: str) -> TaskHandler:
+        return self._handlers.get(name, self._default)
+
+    async def run(self, task: Task) -> Optional[str]:
+        """
+        Выполняет обработчик задачи.
+        :return: Результат обработчика, приведённый к строке.
+        """
+        handler = self.get(task.name)
+        if handler.kind is HandlerKind.ASYNC:
+            result = await handler.func(task)
+        else:
+            loop = asyncio.get_running_loop()
+            executor = self._get_process_pool() if handler.kind is HandlerKind.CPU else None
+            result = await loop.run_in_executor(executor, handler.func, task)
+        return None if result is None else str(result)
+
+    def set_cpu_workers(self, cpu_workers: Optional[int]) -> None:
+        """
+        Задаёт размер пула процессов. Пул создаётся при первом CPU-обработчике,
+        поэтому менять размер можно только до этого.
+        """
+        if self._process_pool is not None:
+            raise RuntimeError("Process pool is already running")
+        self._cpu_workers = cpu_workers
+
+    def close(self) -> None:
+        """
+        Останавливает пул процессов, не блокируя цикл событий: к этому
+        моменту drain() уже дождался задач или прервал их, а процесс,
+        занятый прерванным CPU-обработчиком, завершится сам.
+        """
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+            self._process_pool = None
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        # Пул создаётся лениво: процессы не нужны, пока нет CPU-обработчиков.
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self._cpu_workers)
+        return self._process_pool
+
+
+registry = TaskHandlerRegistry(cpu_workers=settings.CONSUMER_CPU_WORKERS)
@@ -0,0 +1,196 @@
+"""
+Метрики OutboxDispatcher: отставание outbox и пропускная способность публикации.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Final, List, Sequence, Tuple
+
+from src.logger import logger
+
+LATENCY_BUCKETS: Final[Tuple[float, ...]] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+BATCH_SIZE_BUCKETS: Final[Tuple[float, ...]] = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин в стиле Prometheus.
+    """
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        Накопленные счётчики по корзинам, последняя корзина - "+Inf".
+        """
+        result: List[Tuple[str, int]] = []
+        running = 0
+        for bound, count in zip((*self.buckets, float("inf")), self._counts):
+            running += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), running))
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum": self.sum, "buckets": dict(self.cumulative())}
+
+
+class OutboxMetrics:
+    """
+    Хранит метрики диспетчера в памяти процесса.
+
+    Это точка расширения: подкласс может дополнительно отправлять значения
+    во внешнюю систему мониторинга, а тесты читают snapshot().
+    """
+
+    def __init__(self, *, rate_window: float = 60.0) -> None:
+        self.published_total = 0
+        self.failed_total = 0
+        self.retried_total = 0
+        self.dead_lettered_total = 0
+        self.backlog_size = 0
+        self.oldest_pending_age = 0.0
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.publish_latency = Histogram(LATENCY_BUCKETS)
+        self._rate_window = rate_window
+        self._published_at: Deque[Tuple[float, int]] = deque()
+
+    def observe_batch(self, size: int, *, retried: int = 0) -> None:
+        self.batch_size.observe(size)
+        self.retried_total += retried
+
+    def observe_publish(self, latencies: Sequence[float], *, failed: int) -> None:
+        """
+        :param latencies: Время до подтверждения брокера по каждой публикации пачки.
+        :param failed: Сколько из них завершились ошибкой.
+        """
+        for latency in latencies:
+            self.publish_latency.observe(latency)
+        published = len(latencies) - failed
+        self.published_total += published
+        self.failed_total += failed
+        if published:
+            self._published_at.append((time.monotonic(), published))
+
+    def observe_dead_lettered(self, count: int) -> None:
+        self.dead_lettered_total += count
+
+    def set_backlog(self, size: int, oldest_created_at: datetime | None) -> None:
+        self.backlog_size = size
+        if oldest_created_at is None:
+            self.oldest_pending_age = 0.0
+        else:
+            age = datetime.utcnow() - oldest_created_at
+            self.oldest_pending_age = max(age.total_seconds(), 0.0)
+
+    def events_per_second(self) -> float:
+        """
+        Скорость публикации за последние rate_window секунд.
+        """
+        horizon = time.monotonic() - self._rate_window
+        while self._published_at and self._published_at[0][0] < horizon:
+            self._published_at.popleft()
+        return sum(count for _, count in self._published_at) / self._rate_window
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "published_total": self.published_total,
+            "failed_total": self.failed_total,
+            "retried_total": self.retried_total,
+            "dead_lettered_total": self.dead_lettered_total,
+            "backlog_size": self.backlog_size,
+            "oldest_pending_age_seconds": self.oldest_pending_age,
+            "events_per_second": self.events_per_second(),
+            "batch_size": self.batch_size.snapshot(),
+            "publish_latency_seconds": self.publish_latency.snapshot(),
+        }
+
+    def render_prometheus(self) -> str:
+        """
+        Метрики в текстовом формате экспозиции Prometheus.
+        """
+        lines: List[str] = []
+
+        def scalar(name: str, kind: str, value: float) -> None:
+            lines.append(f"# TYPE outbox_{name} {kind}")
+            lines.append(f"outbox_{name} {value}")
+
+        def histogram(name: str, hist: Histogram) -> None:
+            lines.append(f"# TYPE outbox_{name} histogram")
+            for bound, count in hist.cumulative():
+                lines.append(f'outbox_{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"outbox_{name}_sum {hist.sum}")
+            lines.append(f"outbox_{name}_count {hist.count}")
+
+        scalar("published_total", "counter", self.published_total)
+        scalar("failed_total", "counter", self.failed_total)
+        scalar("retried_total", "counter", self.retried_total)
+        scalar("dead_lettered_total", "counter", self.dead_lettered_total)
+        scalar("backlog_size", "gauge", self.backlog_size)
+        scalar("oldest_pending_age_seconds", "gauge", self.oldest_pending_age)
+        scalar("events_per_second", "gauge", self.events_per_second())
+        histogram("batch_size", self.batch_size)
+        histogram("publish_latency_seconds", self.publish_latency)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Минимальный HTTP-сервер, отдающий метрики по GET /metrics.
+    """
+
+    def __init__(self, metrics: OutboxMetrics, *, host: str = "0.0.0.0", port: int = 9100) -> None:
+        self._metrics = metrics
+        self._host = host
+        self._port = port
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self._host, self._port)
+        logger.info("Serving outbox metrics on %s:%s", self._host, self._port)
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode(errors="replace").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1] == "/metrics":
+                status, body = "200 OK", self._metrics.render_prometheus().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
@@ -1,15 +1,38 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
 from uuid import UUID
 
-from src.entity.outbox import OutboxEvent
-from src.exceptions import TaskPublishError
+from src.entity.outbox import OutboxEvent, OutboxFailure, RetryBackoff
+from src.entity.tasks import Task
 from src.infrastructure.persistence.db import Database
-from src.infrastructure.persistence.repositories.outbox import OutboxRepository
+from src.infrastructure.persistence.listener import PgNotificationListener
+from src.infrastructure.persistence.repositories.outbox import (
+    OUTBOX_NOTIFY_CHANNEL, OutboxRepository)
 from src.infrastructure.persistence.repositories.tasks import TaskRepository
 from src.logger import logger
-from src.infrastructure.messaging.priority_queue import PriorityTaskQueue
+from src.infrastructure.messaging.adaptive import AdaptiveBatchController
+from src.infrastructure.messaging.metrics import MetricsServer, OutboxMetrics
+from src.infrastructure.messaging.priority_queue import (PriorityTaskQueue,
+                                                         PublishResult)
+
+# Нижняя граница ожидания, чтобы повтор, до которого осталось несколько
+# миллисекунд, не крутил цикл вхолостую.
+MIN_IDLE_SLEEP = 0.1
+
+
+@dataclass(slots=True)
+class _BatchOutcome:
+    """
+    Итог обработки пачки, который записывается в outbox одним набором запросов.
+    """
+
+    sent: List[UUID] = field(default_factory=list)
+    failed: List[Tuple[OutboxEvent, str]] = field(default_factory=list)
 
 
 class OutboxDispatcher:
@@ -25,100 +48,344 @@ class OutboxDispatcher:
         batch_size: int = 50,
         max_retries: int = 5,
         idle_sleep: float = 2.0,
+        listener: PgNotificationListener | None = None,
+        backoff: RetryBackoff | None = None,
+        metrics: OutboxMetrics | None = None,
+        stats_interval: float = 15.0,
+        adaptive: AdaptiveBatchController | None = None,
     ) -> None:
         """
         Зависимости и конфигурация.
+
+        Если передан listener, диспетчер просыпается по NOTIFY от outbox,
+        а idle_sleep становится лишь страховочным интервалом опроса.
+        Неудачные события откладываются по backoff, чтобы не крутить их
+        в каждой итерации, пока брокер недоступен.
+        Размер и возраст очереди outbox запрашиваются не чаще stats_interval.
+        С adaptive размер пачки и окно публикации подбираются на ходу,
+        а batch_size не используется.
         """
         self._db = db
         self._publisher = publisher
         self._batch_size = batch_size
         self._max_retries = max_retries
         self._idle_sleep = idle_sleep
+        self._listener = listener
+        self._backoff = backoff or RetryBackoff()
+        self.metrics = metrics or OutboxMetrics()
+        self._stats_interval = stats_interval
+        self._stats_refreshed_at = float("-inf")
+        self._next_attempt_at: datetime | None = None
+        self._adaptive = adaptive
 
     async def run_forever(self) -> None:
         """
         Цикл отправки сообщений
         """
+        await self.archive_exhausted()
         while True:
+            await self._refresh_backlog_stats()
             processed_any = await self.dispatch_pending()
             if not processed_any:
-                await asyncio.sleep(self._idle_sleep)
+                await self._wait_for_events()
+
+    async def _wait_for_events(self) -> None:
+        """
+        Ожидание новых событий: уведомление от БД либо таймаут опроса.
+
+        Отложенные по backoff события не вызывают NOTIFY, поэтому ждём
+        не дольше, чем до ближайшей из их попыток. Её время берётся из
+        статистики backlog и из неудач, которые записал сам диспетчер.
+        """
+        timeout = self._idle_sleep
+        if self._next_attempt_at is not None:
+            due_in = (self._next_attempt_at - datetime.utcnow()).total_seconds()
+            if due_in > 0:
+                timeout = min(timeout, max(due_in, MIN_IDLE_SLEEP))
+            else:
+                # Попытка уже наступила: событие разобрано в dispatch_pending
+                # или его держит другой диспетчер. Ждём в обычном режиме.
+                self._next_attempt_at = None
+        if self._listener is None:
+            await asyncio.sleep(timeout)
+            return
+        await self._listener.wait(timeout)
+
+    async def _refresh_backlog_stats(self) -> None:
+        now = time.monotonic()
+        if now - self._stats_refreshed_at < self._stats_interval:
+            return
+        self._stats_refreshed_at = now
+        async with self._db.connection() as session:
+            size, oldest, next_attempt_at = await OutboxRepository(session).pending_stats()
+        self.metrics.set_backlog(size, oldest)
+        self._next_attempt_at = next_attempt_at
+
+    def _expect_attempts(self, attempts: Iterable[datetime]) -> None:
+        """
+        Учитывает время повторов, назначенных этим диспетчером,
+        не дожидаясь следующего обновления статистики.
+        """
+        for attempt in attempts:
+            if self._next_attempt_at is None or attempt < self._next_attempt_at:
+                self._next_attempt_at = attempt
+
+    async def archive_exhausted(self) -> int:
+        """
+        Переносит в dead-letter все события, исчерпавшие попытки,
+        в том числе оставшиеся от предыдущих запусков.
+        """
+        async with self._db.connection() as session:
+            archived = await OutboxRepository(session).archive_exhausted(
+                self._max_retries
+            )
+        if archived:
+            logger.warning("Moved %s outbox events to dead letter", archived)
+            self.metrics.observe_dead_lettered(archived)
+        return archived
 
     async def dispatch_pending(self) -> bool:
         """
         Обрабатывает и сообщает что было отправлено.
+
+        Пачка захватывается через SKIP LOCKED и обрабатывается в одной
+        транзакции, поэтому несколько диспетчеров могут работать параллельно
+        и не публиковать одни и те же события.
         :return:
         """
         async with self._db.connection() as session:
-            outbox_repo = OutboxRepository(session)
-            task_repo = TaskRepository(session)
+            outbox_repo = OutboxRepository(session, auto_commit=False)
+            task_repo = TaskRepository(session, auto_commit=False)
 
-            events = await outbox_repo.fetch_pending(
-                self._batch_size,
+            batch_size = self._adaptive.batch_size if self._adaptive else self._batch_size
+            events = await outbox_repo.claim_pending(
+                batch_size,
                 max_retries=self._max_retries,
             )
             if not events:
                 return False
+            self.metrics.observe_batch(
+                len(events),
+                retried=sum(1 for event in events if event.retries > 0),
+            )
 
+            tasks = self._tasks_from_snapshots(events)
+            tasks.update(
+                await task_repo.get_tasks(
+                    task_id
+                    for task_id in map(self._task_id_of, events)
+                    if task_id is not None and task_id not in tasks
+                )
+            )
+            outcome = _BatchOutcome()
+            to_publish: List[Tuple[OutboxEvent, Task]] = []
+            to_cancel: List[Tuple[OutboxEvent, UUID]] = []
             for event in events:
-                await self._process_event(event, outbox_repo, task_repo)
+                if event.event_type == "task.cancelled":
+                    task_id = self._resolve_cancellation(event, outcome)
+                    if task_id is not None:
+                        to_cancel.append((event, task_id))
+                    continue
+                task = self._resolve_event(event, tasks, outcome)
+                if task is not None:
+                    to_publish.append((event, task))
+
+            results = await self._publish_batch(to_publish, outcome)
+            await self._publish_cancellations(to_cancel, outcome)
+            if self._adaptive is not None:
+                self._adaptive.observe(
+                    fetched=len(events),
+                    latencies=[result.latency for result in results],
+                    failed=sum(1 for result in results if not result.ok),
+                )
+            await outbox_repo.mark_sent_many(outcome.sent)
+            failures = self._schedule_retries(outcome.failed)
+            await outbox_repo.mark_failed_many(failures)
+            exhausted = [
+                event.id
+                for event, _ in outcome.failed
+                if event.retries + 1 >= self._max_retries
+            ]
+            if exhausted:
+                archived = await outbox_repo.archive_exhausted(
+                    self._max_retries, event_ids=exhausted
+                )
+                logger.warning("Moved %s outbox events to dead letter", archived)
+                self.metrics.observe_dead_lettered(archived)
+            await session.commit()
+            self._expect_attempts(
+                failure.next_attempt_at
+                for failure in failures
+                if failure.event_id not in exhausted
+            )
             return True
 
-    async def _process_event(
-        self,
+    @classmethod
+    def _resolve_event(
+        cls,
         event: OutboxEvent,
-        outbox_repo: OutboxRepository,
-        task_repo: TaskRepository,
-    ) -> None:
+        tasks: Mapping[UUID, Task],
+        outcome: _BatchOutcome,
+    ) -> Task | None:
         """
-        Отправка событий в зависимости от типа
+        Возвращает задачу для публикации либо сразу закрывает событие,
+        если публиковать нечего.
         """
-        if event.event_type == "task.created":
-            await self._handle_task_created(event, outbox_repo, task_repo)
-        else:
+        if event.event_type != "task.created":
             logger.warning("Unknown outbox event %s", event.event_type)
-            await outbox_repo.mark_sent(event.id)
+            outcome.sent.append(event.id)
+            return None
+
+        task_id = cls._task_id_of(event)
+        if task_id is None:
+            logger.error("Outbox event %s has missing or invalid task_id", event.id)
+            outcome.failed.append((event, "missing or invalid task_id"))
+            return None
+
+        task = tasks.get(task_id)
+        if task is None:
+            logger.warning("Task %s not found, marking outbox event sent", task_id)
+            outcome.sent.append(event.id)
+            return None
+        return task
 
-    async def _handle_task_created(
+    @staticmethod
+    def _resolve_cancellation(event: OutboxEvent, outcome: _BatchOutcome) -> UUID | None:
+        """
+        UUID отменённой задачи из события task.cancelled.
+        """
+        try:
+            return UUID(event.payload["task_id"])
+        except (KeyError, TypeError, ValueError):
+            logger.error("Outbox event %s has missing or invalid task_id", event.id)
+            outcome.failed.append((event, "missing or invalid task_id"))
+            return None
+
+    async def _publish_cancellations(
         self,
-        event: OutboxEvent,
-        outbox_repo: OutboxRepository,
-        task_repo: TaskRepository,
+        to_cancel: Sequence[Tuple[OutboxEvent, UUID]],
+        outcome: _BatchOutcome,
     ) -> None:
         """
-        Публикует задачу в очередь
+        Рассылает отмены консьюмерам через control exchange.
         """
-        payload = event.payload
-        task_id_raw = payload.get("task_id")
-        if task_id_raw is None:
-            logger.error("Outbox event %s missing task_id", event.id)
-            await outbox_repo.mark_failed(event.id, "missing task_id")
-            return
-
-        task_id = UUID(task_id_raw)
-        task = await task_repo.get_task(task_id)
-        if task is None:
-            logger.warning("Task %s not found, marking outbox event sent", task_id)
-            await outbox_repo.mark_sent(event.id)
+        if not to_cancel:
             return
+        errors = await self._publisher.publish_cancellations(
+            [task_id for _, task_id in to_cancel]
+        )
+        for (event, task_id), error in zip(to_cancel, errors):
+            if error is None:
+                outcome.sent.append(event.id)
+                continue
+            cause = error.__cause__ or error
+            logger.warning(
+                "Failed to broadcast cancellation of task %s from outbox event %s: %s",
+                task_id,
+                event.id,
+                cause,
+            )
+            outcome.failed.append((event, str(cause)))
 
-        try:
-            await self._publisher.publish(task)
-            await outbox_repo.mark_sent(event.id)
-        except TaskPublishError as exc:
+    async def _publish_batch(
+        self,
+        to_publish: Sequence[Tuple[OutboxEvent, Task]],
+        outcome: _BatchOutcome,
+    ) -> List[PublishResult]:
+        """
+        Публикует задачи пачкой; неудачные события помечаются отдельно.
+        """
+        if not to_publish:
+            return []
+        results = await self._publisher.publish_many(
+            [task for _, task in to_publish],
+            max_in_flight=self._adaptive.concurrency if self._adaptive else None,
+        )
+        self.metrics.observe_publish(
+            [result.latency for result in results],
+            failed=sum(1 for result in results if not result.ok),
+        )
+        for (event, task), result in zip(to_publish, results):
+            if result.ok:
+                outcome.sent.append(event.id)
+                continue
+            error = result.error.__cause__ or result.error
             logger.warning(
                 "Failed to publish task %s from outbox event %s: %s",
-                task_id,
+                task.id,
                 event.id,
-                exc,
+                error,
             )
-            await outbox_repo.mark_failed(event.id, str(exc))
+            outcome.failed.append((event, str(error)))
+        return results
 
+    def _schedule_retries(
+        self,
+        failed: Sequence[Tuple[OutboxEvent, str]],
+    ) -> List[OutboxFailure]:
+        """
+        Время следующей попытки для каждого неудачного события.
+        """
+        now = datetime.utcnow()
+        return [
+            OutboxFailure(
+                event_id=event.id,
+                error=error,
+                next_attempt_at=now + self._backoff.delay(event.retries),
+            )
+            for event, error in failed
+        ]
+
+    @classmethod
+    def _tasks_from_snapshots(cls, events: Sequence[OutboxEvent]) -> Dict[UUID, Task]:
+        """
+        Задачи из снимков в payload; события без снимка (или с битым снимком)
+        разрешаются чтением из tasks.
+        """
+        tasks: Dict[UUID, Task] = {}
+        for event in events:
+            snapshot = event.payload.get("task")
+            if event.event_type != "task.created" or not isinstance(snapshot, dict):
+                continue
+            try:
+                task = Task.from_snapshot(snapshot)
+            except (KeyError, TypeError, ValueError):
+                logger.warning("Outbox event %s has invalid task snapshot", event.id)
+                continue
+            if task.id == cls._task_id_of(event):
+                tasks[task.id] = task
+        return tasks
 
-async def main(loop_sleep: float = 2.0) -> None:
+    @staticmethod
+    def _task_id_of(event: OutboxEvent) -> UUID | None:
+        """
+        UUID задачи из payload события task.created, если он корректен.
+        """
+        if event.event_type != "task.created":
+            return None
+        task_id_raw = event.payload.get("task_id")
+        if task_id_raw is None:
+            return None
+        try:
+            return UUID(task_id_raw)
+        except (TypeError, ValueError):
+            return None
+
+
+async def main(
+    loop_sleep: float = 2.0,
+    *,
+    listen: bool = True,
+    fallback_poll: float = 30.0,
+    adaptive: bool = True,
+) -> None:
     """
     Запуск диспетчера как отдельный автомоный процесс,
     при необходимости можно поменять реализацию.
+    :param loop_sleep: Интервал опроса без LISTEN/NOTIFY.
+    :param listen: Просыпаться по NOTIFY от таблицы outbox.
+    :param fallback_poll: Страховочный интервал опроса в режиме NOTIFY.
+    :param adaptive: Подбирать размер пачки и параллелизм публикации на ходу.
     """
     from src.container import Container
     from src.settings import settings
@@ -126,12 +393,31 @@ async def main(loop_sleep: float = 2.0) -> None:
     container = Container()
     container.config.from_pydantic(settings)
 
+    db = container.infrastructure.db()
+    listener = (
+        PgNotificationListener(db.dsn, OUTBOX_NOTIFY_CHANNEL, poll_interval=loop_sleep)
+        if listen
+        else None
+    )
+
     dispatcher = OutboxDispatcher(
-        db=container.infrastructure.db(),
+        db=db,
         publisher=container.infrastructure.priority_task_queue(),
-        idle_sleep=loop_sleep,
+        idle_sleep=fallback_poll if listen else loop_sleep,
+        listener=listener,
+        adaptive=AdaptiveBatchController() if adaptive else None,
     )
-    await dispatcher.run_forever()
+    metrics_server = None
+    if settings.OUTBOX_METRICS_PORT is not None:
+        metrics_server = MetricsServer(dispatcher.metrics, port=settings.OUTBOX_METRICS_PORT)
+        await metrics_server.start()
+    try:
+        await dispatcher.run_forever()
+    finally:
+        if listener is not None:
+            await listener.close()
+        if metrics_server is not None:
+            await metrics_server.close()
 
 
 if __name__ == "__main__":
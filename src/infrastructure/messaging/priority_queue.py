@@ -3,59 +3,215 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import json
-from dataclasses import asdict
-from typing import Final
+import time
+from dataclasses import dataclass
+from typing import Dict, Final, List, Sequence
+from uuid import UUID
 
 import aio_pika
-from aio_pika import DeliveryMode
-from aio_pika.abc import AbstractChannel, AbstractRobustConnection
-from aio_pika.exceptions import DeliveryError
+from aio_pika import DeliveryMode, ExchangeType
+from aio_pika.abc import (AbstractChannel, AbstractExchange,
+                          AbstractRobustConnection)
+from aio_pika.exceptions import AMQPError, DeliveryError
 
 from src.entity.tasks import Task, TaskPriority
 from src.exceptions import TaskPublishError
+from src.infrastructure.messaging.wire import TASK_CONTENT_TYPE, encode_task
 from src.logger import logger
 from src.settings import settings
 
+TASK_CANCELLED: Final[str] = "task.cancelled"
+
 PRIORITY_MAPPING: Final[dict[TaskPriority, int]] = {
     TaskPriority.LOW: 1,
     TaskPriority.MEDIUM: 5,
     TaskPriority.HIGH: 10,
 }
 
+QUEUE_MODE_PRIORITY: Final[str] = "priority"
+QUEUE_MODE_SPLIT: Final[str] = "split"
+
+
+def split_queue_names(queue_name: str) -> Dict[TaskPriority, str]:
+    """
+    Очереди режима split: своя очередь на каждый приоритет.
+    """
+    return {priority: f"{queue_name}.{priority.value.lower()}" for priority in TaskPriority}
+
+
+@dataclass(slots=True)
+class PublishResult:
+    """
+    Итог публикации одной задачи из пачки.
+    """
+
+    task: Task
+    error: TaskPublishError | None = None
+    latency: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 
 class PriorityTaskQueue:
 
-    def __init__(self) -> None:
+    def __init__(self, *, max_in_flight: int = 100) -> None:
         self._url = self._get_rabbitmq_url()
         self._queue_name = settings.TASK_QUEUE_NAME
         self._max_priority = settings.TASK_QUEUE_MAX_PRIORITY
+        self._split_queues = (
+            split_queue_names(self._queue_name)
+            if settings.TASK_QUEUE_MODE == QUEUE_MODE_SPLIT
+            else None
+        )
+        self._control_exchange_name = settings.TASK_CONTROL_EXCHANGE
+        self._max_in_flight = max_in_flight
         self._connection: AbstractRobustConnection | None = None
         self._channel: AbstractChannel | None = None
         self._queue_declared = False
+        self._control_exchange: AbstractExchange | None = None
         self._setup_lock = asyncio.Lock()
 
     async def publish(self, task: Task) -> None:
-        message_body = json.dumps(asdict(task), default=str).encode()
-        priority = PRIORITY_MAPPING.get(task.priority, 1)
         channel = await self._ensure_channel()
         await self._ensure_queue(channel)
         try:
-            await channel.default_exchange.publish(
-                aio_pika.Message(
-                    body=message_body,
-                    priority=min(priority, self._max_priority),
-                    delivery_mode=DeliveryMode.PERSISTENT,
-                    headers={"task_id": str(task.id)},
-                ),
-                routing_key=self._queue_name,
-            )
-        except (DeliveryError, aio_pika.AMQPError) as exc:
+            await self._send(channel, task)
+        except (DeliveryError, AMQPError) as exc:
             logger.exception("Failed to publish task %s to RabbitMQ", task.id)
             await self._reset_connection()
             raise TaskPublishError(
                 f"Failed to publish task {task.id} to RabbitMQ"
             ) from exc
 
+    async def publish_many(
+        self,
+        tasks: Sequence[Task],
+        *,
+        max_in_flight: int | None = None,
+    ) -> List[PublishResult]:
+        """
+        Публикует пачку задач конкурентно.
+
+        Одновременно ожидается не больше max_in_flight подтверждений брокера,
+        результат возвращается по каждой задаче в исходном порядке.
+        """
+        if not tasks:
+            return []
+
+        try:
+            channel = await self._ensure_channel()
+            await self._ensure_queue(channel)
+        except (TaskPublishError, AMQPError) as exc:
+            logger.error("RabbitMQ is unavailable for batch publish: %s", exc)
+            await self._reset_connection()
+            return [
+                PublishResult(task=task, error=self._publish_error(task, exc))
+                for task in tasks
+            ]
+
+        window = asyncio.Semaphore(max_in_flight or self._max_in_flight)
+
+        async def send(task: Task) -> PublishResult:
+            async with window:
+                started = time.perf_counter()
+                try:
+                    await self._send(channel, task)
+                # Любая ошибка, включая закрытие канала посреди пачки, - провал
+                # только этой задачи: иначе gather откатил бы всю пачку.
+                except Exception as exc:
+                    logger.warning("Failed to publish task %s to RabbitMQ: %s", task.id, exc)
+                    return PublishResult(
+                        task=task,
+                        error=self._publish_error(task, exc),
+                        latency=time.perf_counter() - started,
+                    )
+                return PublishResult(task=task, latency=time.perf_counter() - started)
+
+        results = await asyncio.gather(*(send(task) for task in tasks))
+        if not all(result.ok for result in results):
+            await self._reset_connection()
+        return list(results)
+
+    async def publish_cancellations(
+        self,
+        task_ids: Sequence[UUID],
+    ) -> List[TaskPublishError | None]:
+        """
+        Рассылает отмену задач всем консьюмерам через fanout control exchange.
+
+        :return: Ошибка по каждой задаче в исходном порядке, None - доставлено.
+        """
+        if not task_ids:
+            return []
+
+        try:
+            channel = await self._ensure_channel()
+            exchange = await self._ensure_control_exchange(channel)
+        except (TaskPublishError, AMQPError) as exc:
+            logger.error("RabbitMQ is unavailable for control publish: %s", exc)
+            await self._reset_connection()
+            return [self._cancel_error(task_id, exc) for task_id in task_ids]
+
+        async def send(task_id: UUID) -> TaskPublishError | None:
+            try:
+                await exchange.publish(
+                    aio_pika.Message(
+                        body=json.dumps({"type": TASK_CANCELLED, "task_id": str(task_id)}).encode(),
+                        content_type="application/json",
+                        headers={"task_id": str(task_id)},
+                    ),
+                    routing_key="",
+                )
+            except Exception as exc:
+                logger.warning("Failed to broadcast cancellation of task %s: %s", task_id, exc)
+                return self._cancel_error(task_id, exc)
+            return None
+
+        errors = await asyncio.gather(*(send(task_id) for task_id in task_ids))
+        if any(errors):
+            await self._reset_connection()
+        return list(errors)
+
+    async def _send(self, channel: AbstractChannel, task: Task) -> None:
+        """
+        Отправка одного сообщения с ожиданием publisher confirm.
+
+        В режиме split приоритет задаёт очередь, а не свойство сообщения.
+        """
+        if self._split_queues is not None:
+            routing_key = self._split_queues[task.priority]
+            priority = None
+        else:
+            routing_key = self._queue_name
+            priority = min(PRIORITY_MAPPING.get(task.priority, 1), self._max_priority)
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=encode_task(task),
+                content_type=TASK_CONTENT_TYPE,
+                priority=priority,
+                delivery_mode=DeliveryMode.PERSISTENT,
+                headers={"task_id": str(task.id)},
+            ),
+            routing_key=routing_key,
+        )
+
+    @staticmethod
+    def _publish_error(task: Task, exc: BaseException) -> TaskPublishError:
+        error = TaskPublishError(task_id=task.id)
+        error.__cause__ = exc
+        return error
+
+    @staticmethod
+    def _cancel_error(task_id: UUID, exc: BaseException) -> TaskPublishError:
+        error = TaskPublishError(
+            task_id=task_id,
+            message="Failed to broadcast task cancellation",
+        )
+        error.__cause__ = exc
+        return error
+
     async def _ensure_channel(self) -> AbstractChannel:
         if self._channel and not self._channel.is_closed:
             return self._channel
@@ -64,13 +220,14 @@ class PriorityTaskQueue:
             if self._connection is None or self._connection.is_closed:
                 try:
                     self._connection = await aio_pika.connect_robust(self._url)
-                except aio_pika.AMQPError as exc:
+                except AMQPError as exc:
                     logger.error("Failed to connect to RabbitMQ: %s", exc)
                     raise TaskPublishError("Failed to connect to RabbitMQ") from exc
 
             if self._channel is None or self._channel.is_closed:
                 self._channel = await self._connection.channel(publisher_confirms=True)
                 self._queue_declared = False
+                self._control_exchange = None
 
             return self._channel
 
@@ -81,13 +238,30 @@ class PriorityTaskQueue:
         async with self._setup_lock:
             if self._queue_declared:
                 return
-            await channel.declare_queue(
-                self._queue_name,
-                durable=True,
-                arguments={"x-max-priority": self._max_priority},
-            )
+            if self._split_queues is not None:
+                for queue_name in self._split_queues.values():
+                    await channel.declare_queue(queue_name, durable=True)
+            else:
+                await channel.declare_queue(
+                    self._queue_name,
+                    durable=True,
+                    arguments={"x-max-priority": self._max_priority},
+                )
             self._queue_declared = True
 
+    async def _ensure_control_exchange(self, channel: AbstractChannel) -> AbstractExchange:
+        if self._control_exchange is not None:
+            return self._control_exchange
+
+        async with self._setup_lock:
+            if self._control_exchange is None:
+                self._control_exchange = await channel.declare_exchange(
+                    self._control_exchange_name,
+                    ExchangeType.FANOUT,
+                    durable=True,
+                )
+            return self._control_exchange
+
     async def _reset_connection(self) -> None:
         async with self._setup_lock:
             if self._channel is not None:
@@ -99,6 +273,7 @@ class PriorityTaskQueue:
             self._channel = None
             self._connection = None
             self._queue_declared = False
+            self._control_exchange = None
 
     @staticmethod
     def _get_rabbitmq_url() -> str:
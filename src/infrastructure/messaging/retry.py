@@ -0,0 +1,149 @@
+"""
+Топология отложенных повторов для очереди задач.
+
+Сообщение с неудачной обработкой публикуется в очередь задержки
+"{queue}.retry.{n}" с TTL n-й попытки. По истечении TTL брокер
+dead-letter'ом возвращает его в основную очередь. Номер попытки
+передаётся в заголовке x-attempt; после последней попытки сообщение
+уходит в "{queue}.parking" для ручного разбора. Заголовок x-reclaim
+ставится, когда прошлая попытка не смогла снять свой захват задачи,
+и разрешает следующей попытке перехватить её из IN_PROGRESS.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Final, Sequence, Tuple
+
+import aio_pika
+from aio_pika import DeliveryMode
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage
+
+from src.logger import logger
+
+ATTEMPT_HEADER: Final[str] = "x-attempt"
+ERROR_HEADER: Final[str] = "x-last-error"
+RECLAIM_HEADER: Final[str] = "x-reclaim"
+_MAX_ERROR_LENGTH: Final[int] = 512
+
+
+class RetryTopology:
+    """
+    Очереди задержки и парковки для одной рабочей очереди.
+    """
+
+    def __init__(self, queue_name: str, delays_ms: Sequence[int]) -> None:
+        """
+        :param queue_name: Рабочая очередь, куда возвращаются сообщения.
+        :param delays_ms: Задержка перед каждой повторной попыткой, мс.
+        """
+        self.queue_name = queue_name
+        self.delays_ms: Tuple[int, ...] = tuple(delays_ms)
+
+    @property
+    def max_attempts(self) -> int:
+        """
+        Всего попыток обработки, включая первую.
+        """
+        return len(self.delays_ms) + 1
+
+    @property
+    def parking_queue(self) -> str:
+        return f"{self.queue_name}.parking"
+
+    def retry_queue(self, attempt: int) -> str:
+        return f"{self.queue_name}.retry.{attempt}"
+
+    async def declare(self, channel: AbstractChannel) -> None:
+        for attempt, delay in enumerate(self.delays_ms, start=1):
+            await channel.declare_queue(
+                self.retry_queue(attempt),
+                durable=True,
+                arguments={
+                    "x-message-ttl": delay,
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.queue_name,
+                },
+            )
+        await channel.declare_queue(self.parking_queue, durable=True)
+
+    @staticmethod
+    def attempt_of(message: AbstractIncomingMessage) -> int:
+        """
+        Сколько повторов сообщение уже прошло, 0 - первая доставка.
+        """
+        try:
+            return int((message.headers or {}).get(ATTEMPT_HEADER, 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def is_last_attempt(self, message: AbstractIncomingMessage) -> bool:
+        return self.attempt_of(message) + 1 >= self.max_attempts
+
+    @staticmethod
+    def reclaims(message: AbstractIncomingMessage) -> bool:
+        """
+        Задача осталась IN_PROGRESS от прошлой попытки этого же сообщения.
+        """
+        return bool((message.headers or {}).get(RECLAIM_HEADER))
+
+    async def retry(
+        self,
+        channel: AbstractChannel,
+        message: AbstractIncomingMessage,
+        error: BaseException,
+        *,
+        reclaim: bool = False,
+    ) -> str:
+        """
+        Отправляет сообщение на следующую попытку, а после последней - на парковку.
+        :param reclaim: Задача осталась захваченной этой попыткой.
+        :return: Очередь, куда отправлено сообщение.
+        """
+        attempt = self.attempt_of(message) + 1
+        if attempt >= self.max_attempts:
+            return await self.park(channel, message, error)
+        target = self.retry_queue(attempt)
+        await self._republish(channel, message, target, error, attempt, reclaim=reclaim)
+        logger.info(
+            "Scheduled retry %s/%s via %s: %s", attempt, len(self.delays_ms), target, error
+        )
+        return target
+
+    async def park(
+        self,
+        channel: AbstractChannel,
+        message: AbstractIncomingMessage,
+        error: BaseException,
+    ) -> str:
+        await self._republish(
+            channel, message, self.parking_queue, error, self.attempt_of(message)
+        )
+        logger.warning("Parked message in %s: %s", self.parking_queue, error)
+        return self.parking_queue
+
+    @staticmethod
+    async def _republish(
+        channel: AbstractChannel,
+        message: AbstractIncomingMessage,
+        routing_key: str,
+        error: BaseException,
+        attempt: int,
+        *,
+        reclaim: bool = False,
+    ) -> None:
+        headers: Dict[str, Any] = dict(message.headers or {})
+        headers[ATTEMPT_HEADER] = attempt
+        headers[ERROR_HEADER] = str(error)[:_MAX_ERROR_LENGTH]
+        headers.pop(RECLAIM_HEADER, None)
+        if reclaim:
+            headers[RECLAIM_HEADER] = True
+        await channel.default_exchange.publish(
+            aio_pika.Message(
+                body=message.body,
+                content_type=message.content_type,
+                priority=message.priority,
+                delivery_mode=DeliveryMode.PERSISTENT,
+                headers=headers,
+            ),
+            routing_key=routing_key,
+        )
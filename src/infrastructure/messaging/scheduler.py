@@ -0,0 +1,104 @@
+"""
+Взвешенный справедливый выбор между очередями разных приоритетов.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Generic, Hashable, List, Mapping, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class WeightedFairScheduler(Generic[K, T]):
+    """
+    Буфер сообщений по классам с выдачей smooth weighted round robin.
+
+    При весах 6:3:1 и непустых очередях из каждых десяти выдач шесть
+    достаются первому классу, три второму и одна третьему, причём
+    вперемешку, а не пачками. Пустые классы пропускаются, и их доля
+    делится между остальными. Элемент, прождавший дольше aging,
+    выдаётся вне очереди, поэтому низкий приоритет не голодает
+    и его задержка ограничена сверху.
+    """
+
+    def __init__(self, weights: Mapping[K, int], *, aging: Optional[float] = None) -> None:
+        """
+        :param weights: Вес каждого класса, положительное целое.
+        :param aging: Через сколько секунд ожидания элемент выдаётся вне очереди.
+        """
+        if not weights or any(weight <= 0 for weight in weights.values()):
+            raise ValueError("Scheduler weights must be positive")
+        self._weights: Dict[K, int] = dict(weights)
+        self._aging = aging
+        self._queues: Dict[K, Deque[Tuple[float, T]]] = {key: deque() for key in weights}
+        self._current: Dict[K, int] = {key: 0 for key in weights}
+        self._size = 0
+        self._not_empty = asyncio.Event()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put(self, key: K, item: T) -> None:
+        self._queues[key].append((time.monotonic(), item))
+        self._size += 1
+        self._not_empty.set()
+
+    async def get(self) -> Tuple[K, T]:
+        """
+        Ждёт и возвращает следующий элемент вместе с его классом.
+        """
+        while not self._size:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self._pop()
+
+    def get_nowait(self) -> Tuple[K, T]:
+        if not self._size:
+            raise asyncio.QueueEmpty
+        return self._pop()
+
+    def drain(self) -> List[Tuple[K, T]]:
+        """
+        Забирает все оставшиеся элементы, например чтобы вернуть их брокеру.
+        """
+        items: List[Tuple[K, T]] = []
+        while self._size:
+            items.append(self._pop())
+        return items
+
+    def _pop(self) -> Tuple[K, T]:
+        key = self._starved()
+        if key is None:
+            key = self._next_weighted()
+        _, item = self._queues[key].popleft()
+        self._size -= 1
+        return key, item
+
+    def _starved(self) -> Optional[K]:
+        if self._aging is None:
+            return None
+        deadline = time.monotonic() - self._aging
+        oldest: Optional[K] = None
+        for key, queue in self._queues.items():
+            if queue and queue[0][0] <= deadline:
+                if oldest is None or queue[0][0] < self._queues[oldest][0][0]:
+                    oldest = key
+        return oldest
+
+    def _next_weighted(self) -> K:
+        total = 0
+        best: Optional[K] = None
+        for key, queue in self._queues.items():
+            if not queue:
+                continue
+            self._current[key] += self._weights[key]
+            total += self._weights[key]
+            if best is None or self._current[key] > self._current[best]:
+                best = key
+        assert best is not None, "scheduler size out of sync with queues"
+        self._current[best] -= total
+        return best
@@ -0,0 +1,118 @@
+"""
+Отложенная запись финальных статусов задач для TaskConsumer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Set, Tuple
+from uuid import UUID
+
+from src.entity.tasks import TaskStatusUpdate
+from src.logger import logger
+
+FlushCallback = Callable[[Sequence[TaskStatusUpdate]], Awaitable[Any]]
+
+
+class StatusWriteBuffer:
+    """
+    Копит обновления статусов и пишет их пачкой одним запросом.
+
+    Пачка сбрасывается раз в flush_interval секунд или сразу по достижении
+    max_items. submit() возвращает управление только после того, как пачка
+    с обновлением записана в базу, поэтому подтверждать сообщение брокеру
+    после submit() безопасно: гарантия at-least-once сохраняется.
+    """
+
+    def __init__(
+        self,
+        flush: FlushCallback,
+        *,
+        flush_interval: float = 0.05,
+        max_items: int = 100,
+        flush_attempts: int = 3,
+        retry_delay: float = 0.1,
+    ) -> None:
+        """
+        :param flush: Корутина, записывающая пачку обновлений.
+        :param flush_interval: Максимальная задержка записи, секунды.
+        :param max_items: Размер пачки, при котором запись не ждёт таймера.
+        :param flush_attempts: Сколько раз пытаться записать пачку перед отказом.
+        """
+        self._flush = flush
+        self._flush_interval = flush_interval
+        self._max_items = max_items
+        self._flush_attempts = max(1, flush_attempts)
+        self._retry_delay = retry_delay
+        self._pending: List[Tuple[TaskStatusUpdate, asyncio.Future[None]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: Set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, update: TaskStatusUpdate) -> None:
+        """
+        Ставит обновление в буфер и ждёт его записи.
+        :raise Exception: Ошибка записи пачки после всех попыток.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        self._pending.append((update, future))
+        if len(self._pending) >= self._max_items:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._flush_interval, self._start_flush)
+        await future
+
+    async def flush(self) -> None:
+        """
+        Немедленно записывает накопленное и дожидается всех начатых записей.
+        """
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._write(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: List[Tuple[TaskStatusUpdate, asyncio.Future[None]]]) -> None:
+        # Для одной задачи в пачке оставляем последнее обновление:
+        # UPDATE ... FROM (VALUES ...) с повторяющимся id применяет произвольное.
+        latest: Dict[UUID, TaskStatusUpdate] = {}
+        for update, _ in batch:
+            latest[update.task_id] = update
+
+        error: Exception | None = None
+        for attempt in range(1, self._flush_attempts + 1):
+            try:
+                await self._flush(list(latest.values()))
+                error = None
+                break
+            except Exception as exc:
+                error = exc
+                logger.warning(
+                    "Failed to flush %s task status updates (attempt %s/%s): %s",
+                    len(latest),
+                    attempt,
+                    self._flush_attempts,
+                    exc,
+                )
+                if attempt < self._flush_attempts:
+                    await asyncio.sleep(self._retry_delay * attempt)
+
+        for _, future in batch:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
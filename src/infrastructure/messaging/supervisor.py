@@ -0,0 +1,195 @@
+"""
+Супервизор нескольких процессов TaskConsumer на одном хосте.
+
+Запуск: python -m src.infrastructure.messaging.supervisor --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from types import FrameType
+from typing import Callable, List, Optional
+
+from src.entity.outbox import RetryBackoff
+from src.logger import logger
+from src.settings import settings
+
+
+def run_consumer_worker(cpu_workers: Optional[int] = None) -> None:
+    """
+    Точка входа процесса-воркера: свой event loop, AMQP-соединение и пул БД.
+    :param cpu_workers: Размер пула процессов для CPU-обработчиков воркера.
+    """
+    from src.infrastructure.messaging.consumer import main
+    from src.infrastructure.messaging.handlers import registry
+
+    registry.set_cpu_workers(cpu_workers)
+    asyncio.run(main())
+
+
+@dataclass(slots=True)
+class _Worker:
+    index: int
+    process: Optional[BaseProcess] = None
+    started_at: float = 0.0
+    failures: int = 0
+    restart_at: float = 0.0
+
+
+class ConsumerSupervisor:
+    """
+    Держит запущенными workers процессов консьюмера.
+
+    Упавший воркер перезапускается с экспоненциальной задержкой; счётчик
+    падений сбрасывается, если воркер проработал дольше stable_after.
+    При остановке воркеры получают SIGTERM и shutdown_timeout секунд
+    на штатное завершение, после чего добиваются SIGKILL.
+
+    У каждого воркера свой пул процессов для CPU-обработчиков. Если его
+    размер не задан (CONSUMER_CPU_WORKERS), ядра делятся между воркерами,
+    а не отдаются целиком каждому.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        *,
+        target: Callable[[Optional[int]], None] = run_consumer_worker,
+        cpu_workers: Optional[int] = None,
+        backoff: Optional[RetryBackoff] = None,
+        stable_after: float = 60.0,
+        shutdown_timeout: Optional[float] = None,
+        poll_interval: float = 0.5,
+        start_method: str = "spawn",
+    ) -> None:
+        """
+        :param workers: Число процессов-воркеров.
+        :param target: Функция, выполняемая в каждом воркере; получает cpu_workers.
+        :param cpu_workers: Размер пула CPU-обработчиков одного воркера,
+            по умолчанию CONSUMER_CPU_WORKERS или cpu_count // workers.
+        :param start_method: Способ запуска процессов multiprocessing.
+        """
+        self._target = target
+        self._cpu_workers = cpu_workers or settings.CONSUMER_CPU_WORKERS or max(
+            1, (os.cpu_count() or 1) // max(workers, 1)
+        )
+        self._backoff = backoff or RetryBackoff(base=1.0, cap=30.0)
+        self._stable_after = stable_after
+        # Воркеру нужно успеть выполнить свой graceful shutdown.
+        self._shutdown_timeout = (
+            settings.CONSUMER_SHUTDOWN_TIMEOUT + 5.0
+            if shutdown_timeout is None
+            else shutdown_timeout
+        )
+        self._poll_interval = poll_interval
+        self._context: BaseContext = multiprocessing.get_context(start_method)
+        self._workers: List[_Worker] = [_Worker(index=i) for i in range(workers)]
+        self._stopping = threading.Event()
+        self.restarts = 0
+
+    def stop(self, signum: Optional[int] = None, frame: Optional[FrameType] = None) -> None:
+        """
+        Просит супервизор остановить воркеры. Подходит как обработчик сигнала.
+        """
+        if signum is not None:
+            logger.info("Supervisor received signal %s, stopping workers", signum)
+        self._stopping.set()
+
+    def run(self) -> None:
+        """
+        Запускает воркеры и следит за ними до вызова stop().
+        """
+        for worker in self._workers:
+            self._spawn(worker)
+        try:
+            while not self._stopping.wait(self._poll_interval):
+                self._check_workers()
+        finally:
+            self._shutdown()
+
+    def _spawn(self, worker: _Worker) -> None:
+        process = self._context.Process(
+            target=self._target,
+            kwargs={"cpu_workers": self._cpu_workers},
+            name=f"task-consumer-{worker.index}",
+            daemon=False,
+        )
+        process.start()
+        worker.process = process
+        worker.started_at = time.monotonic()
+        logger.info("Started consumer worker %s (pid %s)", worker.index, process.pid)
+
+    def _check_workers(self) -> None:
+        now = time.monotonic()
+        for worker in self._workers:
+            process = worker.process
+            if process is not None and process.is_alive():
+                continue
+
+            if process is not None:
+                # Воркер только что завершился: планируем перезапуск.
+                if now - worker.started_at >= self._stable_after:
+                    worker.failures = 0
+                delay = self._backoff.delay(worker.failures).total_seconds()
+                worker.failures += 1
+                worker.restart_at = now + delay
+                worker.process = None
+                process.join()
+                logger.warning(
+                    "Consumer worker %s exited with code %s, restarting in %.1fs",
+                    worker.index,
+                    process.exitcode,
+                    delay,
+                )
+
+            if now >= worker.restart_at:
+                self.restarts += 1
+                self._spawn(worker)
+
+    def _shutdown(self) -> None:
+        alive = [
+            worker.process
+            for worker in self._workers
+            if worker.process is not None and worker.process.is_alive()
+        ]
+        for process in alive:
+            if process.pid is not None:
+                os.kill(process.pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self._shutdown_timeout
+        for process in alive:
+            process.join(max(deadline - time.monotonic(), 0.0))
+            if process.is_alive():
+                logger.warning("Consumer worker %s did not stop in time, killing", process.pid)
+                process.kill()
+                process.join()
+        logger.info("All consumer workers stopped")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run several TaskConsumer processes.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.CONSUMER_WORKERS or os.cpu_count() or 1,
+        help="number of consumer processes (default: CONSUMER_WORKERS or CPU count)",
+    )
+    args = parser.parse_args(argv)
+
+    supervisor = ConsumerSupervisor(args.workers)
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, supervisor.stop)
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    main()
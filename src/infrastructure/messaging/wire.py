@@ -0,0 +1,57 @@
+"""
+Формат сообщений задач в очереди.
+
+Актуальный формат - компактный versioned JSON (orjson) только с полями,
+нужными консьюмеру для маршрутизации; остальное обработчик получает
+из БД при захвате задачи. Формат определяется по content_type, поэтому
+сообщения старого формата (полная сущность Task через json) по-прежнему
+читаются, пока не разобраны из очередей.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Final
+
+import orjson
+
+from src.entity.tasks import Task
+
+WIRE_VERSION: Final[int] = 1
+TASK_CONTENT_TYPE: Final[str] = "application/vnd.task.v1+json"
+LEGACY_CONTENT_TYPE: Final[str] = "application/json"
+
+
+def encode_task(task: Task) -> bytes:
+    """
+    Тело сообщения задачи в актуальном формате (TASK_CONTENT_TYPE).
+    """
+    return orjson.dumps(
+        {
+            "v": WIRE_VERSION,
+            "id": str(task.id),
+            "name": task.name,
+            "priority": task.priority.value,
+        }
+    )
+
+
+def decode_task(body: bytes, content_type: str | None) -> Dict[str, Any]:
+    """
+    Разбирает тело сообщения задачи по его content_type.
+
+    :return: Словарь как минимум с ключом "id".
+    :raise ValueError: Неизвестный формат или версия, битое тело.
+    """
+    if content_type == TASK_CONTENT_TYPE:
+        payload = orjson.loads(body)
+        if not isinstance(payload, dict) or payload.get("v") != WIRE_VERSION:
+            raise ValueError(f"Unsupported task message version: {payload!r:.100}")
+        return payload
+    # Сообщения без content_type публиковались до появления версии формата.
+    if content_type in (None, "", LEGACY_CONTENT_TYPE):
+        payload = json.loads(body.decode())
+        if not isinstance(payload, dict):
+            raise ValueError("Task message payload is not an object")
+        return payload
+    raise ValueError(f"Unsupported task message content type: {content_type}")
@@ -12,14 +12,28 @@ Base = declarative_base()
 
 
 class Database:
-    def __init__(self, db_url: str) -> None:
-        self.engine = create_async_engine(db_url, echo=True)
+    def __init__(self, db_url: str, *, pool_size: int = 5, max_overflow: int = 10) -> None:
+        self.engine = create_async_engine(
+            db_url,
+            echo=True,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+        )
         self.session_factory: sessionmaker[AsyncSession] = sessionmaker(  # type: ignore
             bind=typing.cast(Engine, self.engine),
             autoflush=False,
             class_=AsyncSession,
         )
 
+    @property
+    def dsn(self) -> str:
+        """
+        DSN без драйвера SQLAlchemy, пригодный для прямого asyncpg-соединения.
+        """
+        return self.engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+
     async def create_database(self) -> None:
         async with self.engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
@@ -1,12 +1,15 @@
 """
-Определения схемы ORM SQLAlchemy для задач и outbox.
+Определения схемы ORM SQLAlchemy для задач, outbox и его dead-letter архива.
 """
 
 import uuid
 from datetime import datetime
+from typing import Any
 from uuid import UUID as UUIDType
 
-from sqlalchemy import UUID, DateTime, Enum, Integer, String, Text
+from sqlalchemy import (UUID, Computed, DateTime, Enum, Index, Integer, String,
+                        text)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.entity.outbox import OutboxStatus
@@ -14,6 +17,10 @@ from src.entity.tasks import TaskPriority, TaskStatus
 from src.infrastructure.persistence.db import Base
 
 
+# Конфигурация полнотекстового поиска: без стемминга, одинаково для любых языков.
+SEARCH_CONFIG = "simple"
+
+
 class Task(Base):
     __tablename__ = "tasks"
 
@@ -35,16 +42,58 @@ class Task(Base):
     finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     result: Mapped[str | None] = mapped_column(String, nullable=True)
     error: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Совпадения в name весят больше, чем в description. Колонка нужна только
+    # для фильтра, поэтому не загружается вместе с задачей.
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', name), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', description), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
+
+# Пути доступа list_tasks: фильтр по статусу и/или приоритету, свежие первыми.
+# id замыкает ключ сортировки, по нему же идёт keyset-пагинация.
+Index("ix_tasks_created_at_id", Task.created_at.desc(), Task.id.desc())
+Index("ix_tasks_status_created_at_id", Task.status, Task.created_at.desc(), Task.id.desc())
+Index(
+    "ix_tasks_priority_created_at_id", Task.priority, Task.created_at.desc(), Task.id.desc()
+)
+# Поиск: GIN по tsvector для fulltext, триграммы (pg_trgm) для подстрок.
+Index("ix_tasks_search_vector", Task.search_vector, postgresql_using="gin")
+Index(
+    "ix_tasks_name_trgm",
+    Task.name,
+    postgresql_using="gin",
+    postgresql_ops={"name": "gin_trgm_ops"},
+)
+Index(
+    "ix_tasks_description_trgm",
+    Task.description,
+    postgresql_using="gin",
+    postgresql_ops={"description": "gin_trgm_ops"},
+)
 
 
 class Outbox(Base):
     __tablename__ = "outbox"
+    __table_args__ = (
+        Index(
+            "ix_outbox_pending_next_attempt",
+            "next_attempt_at",
+            "created_at",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
 
     id: Mapped[UUIDType] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True
     )
     event_type: Mapped[str] = mapped_column(String(255), nullable=False)
-    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
     status: Mapped[OutboxStatus] = mapped_column(
         Enum(OutboxStatus), nullable=False, default=OutboxStatus.PENDING
     )
@@ -56,4 +105,20 @@ class Outbox(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
     )
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+
+
+class OutboxDeadLetter(Base):
+    __tablename__ = "outbox_dead_letter"
 
+    id: Mapped[UUIDType] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(255), nullable=False)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    retries: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_error: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    dead_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow, index=True
+    )
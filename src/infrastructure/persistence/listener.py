@@ -0,0 +1,104 @@
+"""
+Подписка на уведомления PostgreSQL (LISTEN/NOTIFY) через выделенное соединение.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+
+import asyncpg
+
+from src.exceptions import RepositoryError
+from src.logger import logger
+
+
+class PgNotificationListener:
+    """
+    Держит отдельное asyncpg-соединение и будит ожидающего при NOTIFY в канале.
+    """
+
+    def __init__(self, dsn: str, channel: str, *, poll_interval: float = 2.0) -> None:
+        """
+        :param poll_interval: Интервал опроса, пока LISTEN недоступен.
+        """
+        self._dsn = dsn
+        self._channel = channel
+        self._poll_interval = poll_interval
+        self._connection: asyncpg.Connection | None = None
+        self._notified = asyncio.Event()
+
+    @property
+    def is_listening(self) -> bool:
+        return self._connection is not None and not self._connection.is_closed()
+
+    async def start(self) -> None:
+        """
+        Открывает соединение и выполняет LISTEN на канал.
+        """
+        if self.is_listening:
+            return
+        try:
+            connection = await asyncpg.connect(self._dsn)
+            await connection.add_listener(self._channel, self._on_notify)
+        except (OSError, asyncpg.PostgresError) as exc:
+            raise RepositoryError(
+                "Failed to listen for notifications",
+                context={"channel": self._channel},
+            ) from exc
+
+        connection.add_termination_listener(self._on_terminate)
+        self._connection = connection
+        # Пока соединения не было, уведомления могли потеряться,
+        # поэтому первый wait() сразу вернёт управление для полной выборки.
+        self._notified.set()
+        logger.info("Listening for notifications on channel %s", self._channel)
+
+    async def wait(self, timeout: float) -> bool:
+        """
+        Ждёт уведомления не дольше timeout секунд.
+
+        Если подписаться не удалось, уведомлений не будет: вместо полного
+        timeout ждём обычный интервал опроса, не дольше timeout.
+        :return: True, если пришло уведомление или оборвалось соединение
+            (уведомления могли потеряться), False при таймауте.
+        """
+        if not self.is_listening:
+            try:
+                await self.start()
+            except RepositoryError as exc:
+                logger.warning("Notification listener unavailable, polling: %s", exc)
+                await asyncio.sleep(min(timeout, self._poll_interval))
+                return False
+
+        try:
+            await asyncio.wait_for(self._notified.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._notified.clear()
+        return True
+
+    async def close(self) -> None:
+        if self._connection is None:
+            return
+        with contextlib.suppress(Exception):
+            await self._connection.remove_listener(self._channel, self._on_notify)
+        with contextlib.suppress(Exception):
+            await self._connection.close()
+        self._connection = None
+
+    def _on_notify(
+        self,
+        connection: asyncpg.Connection,
+        pid: int,
+        channel: str,
+        payload: str,
+    ) -> None:
+        self._notified.set()
+
+    def _on_terminate(self, connection: asyncpg.Connection) -> None:
+        logger.warning("Notification connection for %s was closed", self._channel)
+        self._connection = None
+        # Будим ожидающего: он переподключится или перейдёт на обычный опрос,
+        # а не проспит весь страховочный таймаут.
+        self._notified.set()
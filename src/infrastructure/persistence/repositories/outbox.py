@@ -1,15 +1,32 @@
 from __future__ import annotations
 
-import json
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Collection, Final, List, Sequence, Tuple
 from uuid import UUID
 
-from sqlalchemy import Select, delete, select, update
+from sqlalchemy import (UUID as SqlUUID, DateTime, Integer, Select, String,
+                        column, delete, func, insert, literal, select, update,
+                        values)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.entity.outbox import NewOutboxEvent, OutboxEvent, OutboxStatus
+from src.entity.outbox import (DeadLetterEvent, NewOutboxEvent, OutboxEvent,
+                               OutboxFailure, OutboxStatus)
+from src.entity.tasks import Pagination
 from src.infrastructure.persistence.db.schema import Outbox as OutboxModel
+from src.infrastructure.persistence.db.schema import \
+    OutboxDeadLetter as DeadLetterModel
+
+# Канал NOTIFY, в который триггер на таблице outbox сообщает о новых событиях.
+OUTBOX_NOTIFY_CHANNEL: Final[str] = "outbox_events"
+
+_ARCHIVED_COLUMNS: Final[tuple[str, ...]] = (
+    "id",
+    "event_type",
+    "payload",
+    "retries",
+    "last_error",
+    "created_at",
+)
 
 
 class OutboxRepository:
@@ -24,7 +41,7 @@ class OutboxRepository:
         """
         model = OutboxModel(
             event_type=event.event_type,
-            payload=json.dumps(event.payload),
+            payload=event.payload,
             status=OutboxStatus.PENDING,
         )
         self._session.add(model)
@@ -36,17 +53,43 @@ class OutboxRepository:
         """
         Выборка ожидающих событий ограниченная количеством и необязательным ограничением на повторные попытки.
         """
-        stmt: Select[OutboxModel] = (
-            select(OutboxModel)
-            .where(OutboxModel.status == OutboxStatus.PENDING)
-            .order_by(OutboxModel.created_at.asc())
-            .limit(limit)
-        )
-        if max_retries is not None:
-            stmt = stmt.where(OutboxModel.retries < max_retries)
+        stmt = self._pending_stmt(limit, max_retries=max_retries)
+        rows = (await self._session.execute(stmt)).scalars().all()
+        return [self._to_entity(row) for row in rows]
+
+    async def claim_pending(self, limit: int, *, max_retries: int | None = None) -> List[OutboxEvent]:
+        """
+        Захват ожидающих событий через FOR UPDATE SKIP LOCKED.
+
+        Строки остаются заблокированными до конца транзакции сессии, поэтому
+        параллельные диспетчеры получают непересекающиеся пачки. Вызывать
+        нужно в репозитории без auto_commit и фиксировать транзакцию после
+        обработки всей пачки.
+        """
+        stmt = self._claim_stmt(limit, max_retries=max_retries)
         rows = (await self._session.execute(stmt)).scalars().all()
         return [self._to_entity(row) for row in rows]
 
+    async def pending_stats(self) -> Tuple[int, datetime | None, datetime | None]:
+        """
+        Размер очереди ожидающих событий, время создания самого старого
+        из них и ближайшее время отложенной попытки. Уже наступившие попытки
+        не учитываются: такие события забирает выборка, а если их держит
+        другой диспетчер, ждать их бесполезно.
+        """
+        row = (
+            await self._session.execute(
+                select(
+                    func.count(),
+                    func.min(OutboxModel.created_at),
+                    func.min(OutboxModel.next_attempt_at).filter(
+                        OutboxModel.next_attempt_at > datetime.utcnow()
+                    ),
+                ).where(OutboxModel.status == OutboxStatus.PENDING)
+            )
+        ).one()
+        return int(row[0] or 0), row[1], row[2]
+
     async def mark_sent(self, event_id: UUID) -> None:
         """
         Помечает событие как отправленное и удаляет его из БД.
@@ -62,18 +105,187 @@ class OutboxRepository:
         )
         await self._commit()
 
-    async def mark_failed(self, event_id: UUID, error: str) -> None:
+    async def mark_sent_many(self, event_ids: Collection[UUID]) -> None:
+        """
+        Удаляет отправленные события одним DELETE по списку id.
+        """
+        if not event_ids:
+            return
+        await self._session.execute(
+            delete(OutboxModel).where(OutboxModel.id.in_(event_ids))
+        )
+        await self._commit()
+
+    async def mark_failed(
+        self,
+        event_id: UUID,
+        error: str,
+        *,
+        next_attempt_at: datetime | None = None,
+    ) -> None:
+        now = datetime.utcnow()
         await self._session.execute(
             update(OutboxModel)
             .where(OutboxModel.id == event_id)
             .values(
                 retries=OutboxModel.retries + 1,
                 last_error=error,
+                updated_at=now,
+                next_attempt_at=next_attempt_at or now,
+            )
+        )
+        await self._commit()
+
+    async def mark_failed_many(self, failures: Sequence[OutboxFailure]) -> None:
+        """
+        Отмечает неудачные попытки одним UPDATE ... FROM (VALUES ...)
+        и откладывает следующую попытку до next_attempt_at.
+        """
+        if not failures:
+            return
+        failed = values(
+            column("id", SqlUUID(as_uuid=True)),
+            column("error", String),
+            column("next_attempt_at", DateTime),
+            name="failed",
+        ).data([(f.event_id, f.error, f.next_attempt_at) for f in failures])
+        await self._session.execute(
+            update(OutboxModel)
+            .where(OutboxModel.id == failed.c.id)
+            .values(
+                retries=OutboxModel.retries + 1,
+                last_error=failed.c.error,
+                next_attempt_at=failed.c.next_attempt_at,
                 updated_at=datetime.utcnow(),
             )
+            .execution_options(synchronize_session=False)
         )
         await self._commit()
 
+    async def archive_exhausted(
+        self,
+        max_retries: int,
+        *,
+        event_ids: Collection[UUID] | None = None,
+    ) -> int:
+        """
+        Переносит события, исчерпавшие max_retries, в outbox_dead_letter.
+
+        Перенос выполняется одним запросом WITH moved AS (DELETE ... RETURNING)
+        INSERT ... SELECT. event_ids сужает перенос до конкретных событий.
+        :return: Количество перенесённых событий.
+        """
+        if event_ids is not None and not event_ids:
+            return 0
+        moved_stmt = delete(OutboxModel).where(OutboxModel.retries >= max_retries)
+        if event_ids is not None:
+            moved_stmt = moved_stmt.where(OutboxModel.id.in_(event_ids))
+        moved = moved_stmt.returning(
+            *(OutboxModel.__table__.c[name] for name in _ARCHIVED_COLUMNS)
+        ).cte("moved")
+        stmt = (
+            insert(DeadLetterModel)
+            .from_select(
+                [*_ARCHIVED_COLUMNS, "dead_at"],
+                select(
+                    *(moved.c[name] for name in _ARCHIVED_COLUMNS),
+                    literal(datetime.utcnow(), DateTime),
+                ),
+            )
+            .add_cte(moved)
+        )
+        result = await self._session.execute(stmt)
+        await self._commit()
+        return result.rowcount
+
+    async def list_dead_letters(
+        self,
+        pagination: Pagination,
+    ) -> Tuple[List[DeadLetterEvent], int]:
+        """
+        Постраничный список событий из dead-letter архива, свежие первыми.
+        """
+        stmt: Select[DeadLetterModel] = (
+            select(DeadLetterModel)
+            .order_by(DeadLetterModel.dead_at.desc())
+            .offset(pagination.offset)
+            .limit(pagination.limit)
+        )
+        rows = (await self._session.execute(stmt)).scalars().all()
+        total = await self._session.scalar(select(func.count(DeadLetterModel.id)))
+        return [self._dead_letter_to_entity(row) for row in rows], int(total or 0)
+
+    async def requeue_dead_letters(self, event_ids: Collection[UUID]) -> int:
+        """
+        Возвращает события из dead-letter архива в outbox со сброшенными попытками.
+        :return: Количество возвращённых событий.
+        """
+        if not event_ids:
+            return 0
+        now = datetime.utcnow()
+        restored = (
+            delete(DeadLetterModel)
+            .where(DeadLetterModel.id.in_(event_ids))
+            .returning(
+                DeadLetterModel.id,
+                DeadLetterModel.event_type,
+                DeadLetterModel.payload,
+                DeadLetterModel.last_error,
+                DeadLetterModel.created_at,
+            )
+            .cte("restored")
+        )
+        stmt = (
+            insert(OutboxModel)
+            .from_select(
+                [
+                    "id",
+                    "event_type",
+                    "payload",
+                    "last_error",
+                    "created_at",
+                    "status",
+                    "retries",
+                    "updated_at",
+                    "next_attempt_at",
+                ],
+                select(
+                    restored.c.id,
+                    restored.c.event_type,
+                    restored.c.payload,
+                    restored.c.last_error,
+                    restored.c.created_at,
+                    literal(OutboxStatus.PENDING, OutboxModel.status.type),
+                    literal(0, Integer),
+                    literal(now, DateTime),
+                    literal(now, DateTime),
+                ),
+            )
+            .add_cte(restored)
+        )
+        result = await self._session.execute(stmt)
+        await self._commit()
+        return result.rowcount
+
+    @staticmethod
+    def _pending_stmt(limit: int, *, max_retries: int | None = None) -> Select[OutboxModel]:
+        stmt: Select[OutboxModel] = (
+            select(OutboxModel)
+            .where(
+                OutboxModel.status == OutboxStatus.PENDING,
+                OutboxModel.next_attempt_at <= datetime.utcnow(),
+            )
+            .order_by(OutboxModel.next_attempt_at.asc(), OutboxModel.created_at.asc())
+            .limit(limit)
+        )
+        if max_retries is not None:
+            stmt = stmt.where(OutboxModel.retries < max_retries)
+        return stmt
+
+    @classmethod
+    def _claim_stmt(cls, limit: int, *, max_retries: int | None = None) -> Select[OutboxModel]:
+        return cls._pending_stmt(limit, max_retries=max_retries).with_for_update(skip_locked=True)
+
     async def _commit(self) -> None:
         if self._auto_commit:
             await self._session.commit()
@@ -81,15 +293,26 @@ class OutboxRepository:
             await self._session.flush()
 
     def _to_entity(self, model: OutboxModel) -> OutboxEvent:
-        payload: Dict[str, Any] = json.loads(model.payload)
         return OutboxEvent(
             id=model.id,
             event_type=model.event_type,
-            payload=payload,
+            payload=model.payload,
             status=model.status,
             retries=model.retries,
             last_error=model.last_error,
             created_at=model.created_at,
             updated_at=model.updated_at,
+            next_attempt_at=model.next_attempt_at,
         )
 
+    @staticmethod
+    def _dead_letter_to_entity(model: DeadLetterModel) -> DeadLetterEvent:
+        return DeadLetterEvent(
+            id=model.id,
+            event_type=model.event_type,
+            payload=model.payload,
+            retries=model.retries,
+            last_error=model.last_error,
+            created_at=model.created_at,
+            dead_at=model.dead_at,
+        )
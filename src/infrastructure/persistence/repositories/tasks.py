@@ -1,19 +1,40 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import (UUID as SqlUUID, DateTime, String, Update, bindparam,
+                        column, func, literal_column, or_, select, text, true,
+                        tuple_, update, values)
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import TextClause
 
-from src.entity.tasks import (CreateTask, Pagination, Task, TaskFilter, TaskId,
-                              TaskStatus)
+from src.entity.tasks import (TASK_TRANSITIONS, TERMINAL_STATUSES, CreateTask,
+                              Pagination, SearchMode, Task, TaskCursor,
+                              TaskFilter, TaskId, TaskPage, TaskStatus,
+                              TaskStatusUpdate, TaskTransition, TotalMode,
+                              transition_sources)
 from src.exceptions import RepositoryError
+from src.infrastructure.persistence.db.schema import SEARCH_CONFIG
 from src.infrastructure.persistence.db.schema import Task as TaskModel
 
+# Та же конфигурация, что у search_vector, иначе GIN-индекс не подойдёт.
+_SEARCH_CONFIG = literal_column(f"'{SEARCH_CONFIG}'")
+
+# Финальные статусы, в которые консьюмер завершает захваченную таску.
+_FINISH_STATUSES = TASK_TRANSITIONS[TaskStatus.IN_PROGRESS] & TERMINAL_STATUSES
+
+# Колонки таски, возвращаемые из UPDATE в CTE (search_vector не нужен).
+_RETURNED_COLUMNS = [
+    column for column in TaskModel.__table__.c if column.key != "search_vector"
+]
+
 
 class TaskRepository:
     """
@@ -46,28 +67,80 @@ class TaskRepository:
         self,
         filters: TaskFilter,
         pagination: Pagination,
-    ) -> Tuple[List[Task], int]:
+        *,
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> TaskPage:
         """
         Возвращает постраничный список таск.
+
+        Страница читается с одной лишней строкой: по ней понятно, есть ли
+        продолжение, и тогда next_cursor указывает на последнюю выданную таску.
+        total считается точно, оценивается (ESTIMATED) или не считается вовсе
+        (NONE и CACHED: кэшем управляет вызывающий).
         """
         try:
-            stmt: Select[TaskModel] = select(TaskModel)
-            stmt = self._apply_filters(stmt, filters)
-            stmt = stmt.order_by(TaskModel.created_at.desc())
-            stmt = stmt.offset(pagination.offset).limit(pagination.limit)
-
-            result = await self._session.execute(stmt)
+            result = await self._session.execute(self._list_stmt(filters, pagination))
             rows = result.scalars().all()
 
-            count_stmt: Select[Any] = select(func.count(TaskModel.id))
-            count_stmt = self._apply_filters(count_stmt, filters)
-            total = await self._session.scalar(count_stmt)
-            total_count = int(total or 0)
+            total: Optional[int] = None
+            if total_mode is TotalMode.EXACT:
+                total = await self.count_tasks(filters)
+            elif total_mode is TotalMode.ESTIMATED:
+                total = await self.estimate_tasks(filters)
 
-            return [self._to_entity(row) for row in rows], total_count
+            items = [self._to_entity(row) for row in rows[: pagination.limit]]
+            # Курсор задаёт позицию только в порядке (created_at, id),
+            # для выдачи по релевантности он не имеет смысла.
+            has_more = len(rows) > pagination.limit
+            next_cursor = (
+                TaskCursor.after(items[-1])
+                if has_more and not self._is_ranked(filters, pagination)
+                else None
+            )
+            return TaskPage(
+                items=items,
+                total=total,
+                next_cursor=next_cursor,
+                total_mode=total_mode,
+            )
         except SQLAlchemyError as exc:
             raise RepositoryError("Failed to list tasks") from exc
 
+    async def count_tasks(self, filters: TaskFilter) -> int:
+        """
+        Точное число таск под фильтрами.
+        """
+        try:
+            total = await self._session.scalar(self._count_stmt(filters))
+            return int(total or 0)
+        except SQLAlchemyError as exc:
+            raise RepositoryError("Failed to count tasks") from exc
+
+    async def estimate_tasks(self, filters: TaskFilter) -> int:
+        """
+        Оценка числа таск под фильтрами по статистике планировщика.
+
+        Без фильтров берётся pg_class.reltuples, с фильтрами — число строк
+        из EXPLAIN. Точность зависит от свежести ANALYZE.
+        """
+        try:
+            if self._apply_filters(select(TaskModel.id), filters).whereclause is None:
+                reltuples = await self._session.scalar(
+                    text("SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                    {"table": TaskModel.__tablename__},
+                )
+                # -1: таблица ещё ни разу не анализировалась.
+                if reltuples is not None and reltuples >= 0:
+                    return int(reltuples)
+
+            result = await self._session.execute(self._explain_stmt(filters))
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except SQLAlchemyError as exc:
+            raise RepositoryError("Failed to estimate tasks") from exc
+
     async def get_task(self, task_id: UUID) -> Optional[Task]:
         """
         Возвращает таску по UUID или не возвращает, если она отсутствует.
@@ -80,6 +153,68 @@ class TaskRepository:
         except SQLAlchemyError as exc:
             raise RepositoryError("Failed to get task") from exc
 
+    async def get_tasks(self, task_ids: Iterable[UUID]) -> Dict[UUID, Task]:
+        """
+        Возвращает найденные таски по списку UUID одним запросом.
+        """
+        ids = set(task_ids)
+        if not ids:
+            return {}
+        try:
+            stmt: Select[TaskModel] = select(TaskModel).where(TaskModel.id.in_(ids))
+            rows = (await self._session.execute(stmt)).scalars().all()
+            return {row.id: self._to_entity(row) for row in rows}
+        except SQLAlchemyError as exc:
+            raise RepositoryError("Failed to get tasks") from exc
+
+    async def transition(
+        self,
+        task_id: UUID,
+        target: TaskStatus,
+        *,
+        sources: Optional[Iterable[TaskStatus]] = None,
+        **values: Any,
+    ) -> TaskTransition:
+        """
+        Переводит таску в target, если это разрешено TASK_TRANSITIONS.
+
+        Один запрос: CTE читает текущий статус, а UPDATE ... WHERE status IN (...)
+        RETURNING применяет переход. По результату видно, нет ли таски вовсе
+        или переход из её статуса недопустим.
+
+        Если строку изменили параллельно, UPDATE проверяет условие по новой
+        версии, а CTE возвращает статус из снимка запроса. Тогда переход
+        не применяется при допустимом статусе в CTE, и статус перечитывается,
+        чтобы отказ описывал строку, на которой UPDATE не сработал.
+        :param sources: Статусы, из которых разрешён переход, вместо таблицы.
+        :param values: Колонки, обновляемые вместе со статусом.
+        """
+        try:
+            allowed = self._allowed_sources(target, sources)
+            current = select(TaskModel.status).where(TaskModel.id == task_id).cte("current")
+            updated = (
+                self._transition_stmt(task_id, target, allowed, values)
+                .returning(*_RETURNED_COLUMNS)
+                .cte("updated")
+            )
+            stmt = select(current.c.status, aliased(TaskModel, updated)).select_from(
+                current.outerjoin(updated, true())
+            )
+            row = (await self._session.execute(stmt)).one_or_none()
+            previous, db_task = row if row is not None else (None, None)
+            if db_task is None and previous in allowed:
+                previous = await self._session.scalar(
+                    select(TaskModel.status).where(TaskModel.id == task_id)
+                )
+            await self._commit()
+            return TaskTransition(
+                previous=previous,
+                task=self._to_entity(db_task) if db_task is not None else None,
+            )
+        except SQLAlchemyError as exc:
+            await self._session.rollback()
+            raise RepositoryError("Failed to change task status") from exc
+
     async def set_status(
         self,
         task_id: UUID,
@@ -88,39 +223,232 @@ class TaskRepository:
         error: Optional[str] = None,
         result: Optional[str] = None,
         finished_at: Optional[datetime] = None,
+    ) -> TaskTransition:
+        """
+        Обновление статуса таски по таблице переходов.
+        """
+        values: Dict[str, Any] = {"error": error, "result": result}
+        if finished_at is not None:
+            values["finished_at"] = finished_at
+        return await self.transition(task_id, status, **values)
+
+    async def claim_task(self, task_id: UUID, *, reclaim: bool = False) -> Optional[Task]:
+        """
+        Атомарно переводит таску в IN_PROGRESS, если она ещё не взята в работу.
+
+        Один UPDATE ... WHERE status IN (NEW, PENDING) RETURNING: None означает,
+        что таски нет либо она уже захвачена, отменена или завершена.
+        :param reclaim: Захватить и таску, оставшуюся IN_PROGRESS от прерванной попытки.
+        """
+        sources = set(transition_sources(TaskStatus.IN_PROGRESS))
+        if reclaim:
+            sources.add(TaskStatus.IN_PROGRESS)
+        return await self._apply(
+            task_id,
+            TaskStatus.IN_PROGRESS,
+            sources,
+            {"started_at": datetime.utcnow()},
+            error_message="Failed to claim task",
+        )
+
+    async def release_task(self, task_id: UUID) -> Optional[Task]:
+        """
+        Возвращает захваченную таску в PENDING, чтобы её можно было захватить снова.
+
+        Используется, когда консьюмер прерывает обработку и возвращает сообщение в очередь.
+        """
+        return await self._apply(
+            task_id,
+            TaskStatus.PENDING,
+            {TaskStatus.IN_PROGRESS},
+            {"started_at": None},
+            error_message="Failed to release task",
+        )
+
+    async def finish_task(
+        self,
+        task_id: UUID,
+        status: TaskStatus,
+        *,
+        error: Optional[str] = None,
+        result: Optional[str] = None,
     ) -> Optional[Task]:
         """
-        Обновление статуса таски.
+        Завершает захваченную таску одним UPDATE ... WHERE status = IN_PROGRESS.
+
+        None означает, что таска уже не в работе (например, была отменена),
+        и её статус не перезаписывается.
         """
-        try:
-            stmt: Select[TaskModel] = select(TaskModel).where(TaskModel.id == task_id)
-            db_task = (await self._session.execute(stmt)).scalar_one_or_none()
-            if db_task is None:
-                return None
+        return await self._apply(
+            task_id,
+            status,
+            transition_sources(status) & {TaskStatus.IN_PROGRESS},
+            {"error": error, "result": result, "finished_at": datetime.utcnow()},
+            error_message="Failed to finish task",
+        )
 
-            db_task.status = status
-            db_task.error = error
-            db_task.result = result
-            if finished_at is not None:
-                db_task.finished_at = finished_at
+    async def finish_tasks(self, updates: Sequence[TaskStatusUpdate]) -> int:
+        """
+        Завершает пачку захваченных тасок одним UPDATE ... FROM (VALUES ...).
 
+        Как и finish_task, трогает только таски в статусе IN_PROGRESS.
+        :return: Количество обновлённых строк.
+        """
+        if not updates:
+            return 0
+        try:
+            pending = values(
+                column("id", SqlUUID(as_uuid=True)),
+                column("status", TaskModel.status.type),
+                column("result", String),
+                column("error", String),
+                column("finished_at", DateTime),
+                name="pending",
+            ).data(
+                [
+                    (u.task_id, u.status, u.result, u.error, u.finished_at)
+                    for u in updates
+                ]
+            )
+            stmt = (
+                update(TaskModel)
+                .where(
+                    TaskModel.id == pending.c.id,
+                    TaskModel.status == TaskStatus.IN_PROGRESS,
+                    # У каждой строки свой целевой статус, поэтому таблица
+                    # переходов проверяется в самом запросе.
+                    pending.c.status.in_(_FINISH_STATUSES),
+                )
+                .values(
+                    status=pending.c.status,
+                    result=pending.c.result,
+                    error=pending.c.error,
+                    finished_at=pending.c.finished_at,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            updated = (await self._session.execute(stmt)).rowcount
             await self._commit()
-            await self._session.refresh(db_task)
-            return self._to_entity(db_task)
+            return updated
         except SQLAlchemyError as exc:
             await self._session.rollback()
-            raise RepositoryError("Failed to update task status") from exc
+            raise RepositoryError("Failed to finish tasks") from exc
 
-    async def cancel_task(self, task_id: UUID) -> Optional[Task]:
+    async def cancel_task(self, task_id: UUID) -> TaskTransition:
         """
-        Отмена задачи
+        Отмена задачи одним условным UPDATE.
         """
-        return await self.set_status(
+        return await self.transition(
             task_id,
             TaskStatus.CANCELLED,
             finished_at=datetime.utcnow(),
         )
 
+    async def _apply(
+        self,
+        task_id: UUID,
+        target: TaskStatus,
+        sources: Iterable[TaskStatus],
+        values: Dict[str, Any],
+        *,
+        error_message: str,
+    ) -> Optional[Task]:
+        """
+        Переход без чтения текущего статуса: None, если таска не подошла под sources.
+        """
+        try:
+            stmt = self._transition_stmt(task_id, target, sources, values).returning(TaskModel)
+            db_task = (await self._session.execute(stmt)).scalar_one_or_none()
+            await self._commit()
+            return self._to_entity(db_task) if db_task else None
+        except SQLAlchemyError as exc:
+            await self._session.rollback()
+            raise RepositoryError(error_message) from exc
+
+    @staticmethod
+    def _allowed_sources(
+        target: TaskStatus, sources: Optional[Iterable[TaskStatus]]
+    ) -> FrozenSet[TaskStatus]:
+        return transition_sources(target) if sources is None else frozenset(sources)
+
+    @staticmethod
+    def _transition_stmt(
+        task_id: UUID,
+        target: TaskStatus,
+        sources: Optional[Iterable[TaskStatus]],
+        values: Dict[str, Any],
+    ) -> Update:
+        """
+        UPDATE ... SET status = target WHERE id = :id AND status IN (sources).
+        """
+        allowed = TaskRepository._allowed_sources(target, sources)
+        return (
+            update(TaskModel)
+            .where(TaskModel.id == task_id, TaskModel.status.in_(allowed))
+            .values(status=target, **values)
+        )
+
+    def _list_stmt(self, filters: TaskFilter, pagination: Pagination) -> Select[TaskModel]:
+        """
+        Выборка страницы списка таск, свежие первыми, плюс одна строка сверх limit.
+
+        id в сортировке делает порядок однозначным при равных created_at.
+        С курсором вместо OFFSET используется сравнение строк
+        (created_at, id) < (:created_at, :id), которое идёт по индексу
+        и не зависит от глубины страницы.
+        """
+        stmt: Select[TaskModel] = select(TaskModel)
+        stmt = self._apply_filters(stmt, filters)
+        if pagination.cursor is not None:
+            stmt = stmt.where(
+                tuple_(TaskModel.created_at, TaskModel.id)
+                < tuple_(pagination.cursor.created_at, pagination.cursor.id)
+            )
+        if self._is_ranked(filters, pagination):
+            rank = func.ts_rank_cd(TaskModel.search_vector, self._tsquery(filters.search))
+            stmt = stmt.order_by(rank.desc())
+        stmt = stmt.order_by(TaskModel.created_at.desc(), TaskModel.id.desc())
+        return stmt.offset(pagination.offset).limit(pagination.limit + 1)
+
+    @staticmethod
+    def _is_ranked(filters: TaskFilter, pagination: Pagination) -> bool:
+        """
+        Полнотекстовый поиск по номеру страницы выдаётся по релевантности,
+        с курсором — по (created_at, id), как и остальной список.
+        """
+        return (
+            bool(filters.search)
+            and filters.search_mode is SearchMode.FULLTEXT
+            and pagination.cursor is None
+        )
+
+    @staticmethod
+    def _tsquery(search: Optional[str]) -> Any:
+        """
+        Запрос в синтаксисе веб-поиска: слова, "фразы", OR и -исключения.
+        """
+        return func.websearch_to_tsquery(_SEARCH_CONFIG, search)
+
+    def _count_stmt(self, filters: TaskFilter) -> Select[Any]:
+        """
+        Подсчёт таск, подходящих под фильтры.
+        """
+        count_stmt: Select[Any] = select(func.count(TaskModel.id))
+        return self._apply_filters(count_stmt, filters)
+
+    def _explain_stmt(self, filters: TaskFilter) -> TextClause:
+        """
+        EXPLAIN выборки таск под фильтрами, значения фильтров остаются параметрами.
+        """
+        stmt = self._apply_filters(select(TaskModel.id), filters)
+        compiled = stmt.compile(dialect=postgresql.dialect(paramstyle="named"))
+        return text(f"EXPLAIN (FORMAT JSON) {compiled}").bindparams(
+            *(
+                bindparam(name, compiled.params[name], type_=bind.type)
+                for bind, name in compiled.bind_names.items()
+            )
+        )
+
     def _apply_filters(self, stmt: Select[Any], filters: TaskFilter) -> Select[Any]:
         """
         Применение условий TaskFilter к выборке.
@@ -129,12 +457,17 @@ class TaskRepository:
             stmt = stmt.where(TaskModel.status == filters.status)
         if filters.priority:
             stmt = stmt.where(TaskModel.priority == filters.priority)
-        if filters.search:
-            like_pattern = f"%{filters.search.lower()}%"
+        if filters.search and filters.search_mode is SearchMode.FULLTEXT:
+            stmt = stmt.where(
+                TaskModel.search_vector.bool_op("@@")(self._tsquery(filters.search))
+            )
+        elif filters.search:
+            # ILIKE по name/description обслуживают триграммные GIN-индексы.
+            like_pattern = f"%{filters.search}%"
             stmt = stmt.where(
                 or_(
-                    func.lower(TaskModel.name).like(like_pattern),
-                    func.lower(TaskModel.description).like(like_pattern),
+                    TaskModel.name.ilike(like_pattern),
+                    TaskModel.description.ilike(like_pattern),
                 )
             )
         if filters.created_from:
@@ -1,5 +1,6 @@
 import fastapi
 
+from src.api.handlers.admin.outbox_handler import router as admin_router
 from src.api.handlers.tasks.task_handler import router
 from src.container import Container
 from src.settings import settings
@@ -15,6 +16,7 @@ def create_app() -> fastapi.FastAPI:
     app = fastapi.FastAPI()
     app.container = create_container()
     app.include_router(router)
+    app.include_router(admin_router)
     return app
 
 
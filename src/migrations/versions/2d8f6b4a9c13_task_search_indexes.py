@@ -0,0 +1,75 @@
+"""Task search vector and trigram indexes
+
+Revision ID: 2d8f6b4a9c13
+Revises: 9c3d5a1f7e24
+Create Date: 2025-12-12 10:21:05.873190
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8f6b4a9c13'
+down_revision: Union[str, None] = '9c3d5a1f7e24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', name), 'A') || "
+    "setweight(to_tsvector('simple', description), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Добавление STORED-колонки переписывает таблицу под эксклюзивной блокировкой.
+    op.add_column(
+        'tasks',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(_SEARCH_VECTOR, persisted=True),
+            nullable=False,
+        ),
+    )
+
+    # autocommit_block фиксирует транзакцию с колонкой перед CONCURRENTLY.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_search_vector',
+            'tasks',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for column in ('name', 'description'):
+            op.create_index(
+                f'ix_tasks_{column}_trgm',
+                'tasks',
+                [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in ('ix_tasks_description_trgm', 'ix_tasks_name_trgm', 'ix_tasks_search_vector'):
+            op.drop_index(
+                name,
+                table_name='tasks',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_column('tasks', 'search_vector')
+    # Расширение pg_trgm не удаляется: им могут пользоваться другие объекты базы.
@@ -0,0 +1,43 @@
+"""Outbox notify trigger
+
+Revision ID: 3f1c2a9d8e47
+Revises: 7635c33b3c02
+Create Date: 2025-12-03 10:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d8e47'
+down_revision: Union[str, None] = '7635c33b3c02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION outbox_notify() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('outbox_events', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER outbox_notify_insert
+        AFTER INSERT ON outbox
+        FOR EACH STATEMENT EXECUTE FUNCTION outbox_notify()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS outbox_notify_insert ON outbox")
+    op.execute("DROP FUNCTION IF EXISTS outbox_notify()")
@@ -0,0 +1,44 @@
+"""Outbox payload jsonb
+
+Revision ID: 5b9e03d7c6a2
+Revises: c2e7f94a0d13
+Create Date: 2025-12-10 16:05:32.730981
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9e03d7c6a2'
+down_revision: Union[str, None] = 'c2e7f94a0d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('outbox', 'outbox_dead_letter'):
+        op.alter_column(
+            table,
+            'payload',
+            existing_type=sa.Text(),
+            type_=postgresql.JSONB(),
+            existing_nullable=False,
+            postgresql_using='payload::jsonb',
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('outbox', 'outbox_dead_letter'):
+        op.alter_column(
+            table,
+            'payload',
+            existing_type=postgresql.JSONB(),
+            type_=sa.Text(),
+            existing_nullable=False,
+            postgresql_using='payload::text',
+        )
@@ -0,0 +1,66 @@
+"""Task keyset pagination indexes
+
+Revision ID: 9c3d5a1f7e24
+Revises: e41b7c9d2f58
+Create Date: 2025-12-11 15:08:52.614307
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3d5a1f7e24'
+down_revision: Union[str, None] = 'e41b7c9d2f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (новый индекс, заменяемый индекс, ведущие колонки)
+_INDEXES = (
+    ('ix_tasks_created_at_id', 'ix_tasks_created_at', []),
+    ('ix_tasks_status_created_at_id', 'ix_tasks_status_created_at', ['status']),
+    ('ix_tasks_priority_created_at_id', 'ix_tasks_priority_created_at', ['priority']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Новые индексы строятся до удаления старых, чтобы list_tasks
+    # ни в какой момент не остался без индекса.
+    with op.get_context().autocommit_block():
+        for name, replaced, leading in _INDEXES:
+            op.create_index(
+                name,
+                'tasks',
+                [*leading, sa.text('created_at DESC'), sa.text('id DESC')],
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                replaced,
+                table_name='tasks',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, replaced, leading in _INDEXES:
+            op.create_index(
+                replaced,
+                'tasks',
+                [*leading, sa.text('created_at DESC')],
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                name,
+                table_name='tasks',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,41 @@
+"""Outbox next_attempt_at
+
+Revision ID: a84d0e6b51c9
+Revises: 3f1c2a9d8e47
+Create Date: 2025-12-05 14:27:09.551204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a84d0e6b51c9'
+down_revision: Union[str, None] = '3f1c2a9d8e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('outbox', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE outbox SET next_attempt_at = created_at")
+    op.alter_column('outbox', 'next_attempt_at', nullable=False)
+    op.create_index(
+        'ix_outbox_pending_next_attempt',
+        'outbox',
+        ['next_attempt_at', 'created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_outbox_pending_next_attempt',
+        table_name='outbox',
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+    op.drop_column('outbox', 'next_attempt_at')
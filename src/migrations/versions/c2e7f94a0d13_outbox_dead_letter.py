@@ -0,0 +1,43 @@
+"""Outbox dead letter
+
+Revision ID: c2e7f94a0d13
+Revises: a84d0e6b51c9
+Create Date: 2025-12-08 09:41:55.017342
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e7f94a0d13'
+down_revision: Union[str, None] = 'a84d0e6b51c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('outbox_dead_letter',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('event_type', sa.String(length=255), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('retries', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('dead_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        op.f('ix_outbox_dead_letter_dead_at'),
+        'outbox_dead_letter',
+        ['dead_at'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_outbox_dead_letter_dead_at'), table_name='outbox_dead_letter')
+    op.drop_table('outbox_dead_letter')
@@ -0,0 +1,70 @@
+"""Task list indexes
+
+Revision ID: e41b7c9d2f58
+Revises: 5b9e03d7c6a2
+Create Date: 2025-12-09 11:42:37.180456
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b7c9d2f58'
+down_revision: Union[str, None] = '5b9e03d7c6a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в таблицы, но не работает внутри транзакции.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_created_at',
+            'tasks',
+            [sa.text('created_at DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_tasks_status_created_at',
+            'tasks',
+            ['status', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_tasks_priority_created_at',
+            'tasks',
+            ['priority', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tasks_priority_created_at',
+            table_name='tasks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_tasks_status_created_at',
+            table_name='tasks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_tasks_created_at',
+            table_name='tasks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
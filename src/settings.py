@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,6 +9,8 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_USER: str
     DB_PASS: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
 
     RABBIT_HOST: str
     RABBIT_PORT: int
@@ -16,6 +20,25 @@ class Settings(BaseSettings):
 
     TASK_QUEUE_NAME: str
     TASK_QUEUE_MAX_PRIORITY: int
+    TASK_QUEUE_MODE: Literal["priority", "split"] = "priority"
+    TASK_QUEUE_WEIGHTS: dict[str, int] = {"HIGH": 6, "MEDIUM": 3, "LOW": 1}
+    TASK_QUEUE_AGING_MS: int = 5000
+    TASK_CONTROL_EXCHANGE: str = "tasks.control"
+    TASK_RETRY_DELAYS_MS: list[int] = [1000, 5000, 30000]
+    TASK_TOTAL_CACHE_TTL_S: float = 30.0
+    TASK_TOTAL_CACHE_SIZE: int = 1024
+
+    OUTBOX_METRICS_PORT: int | None = None
+
+    CONSUMER_PREFETCH_COUNT: int = 20
+    CONSUMER_CONCURRENCY: int = 10
+    CONSUMER_WRITE_BEHIND: bool = False
+    CONSUMER_FLUSH_INTERVAL_MS: int = 50
+    CONSUMER_FLUSH_MAX_ITEMS: int = 100
+    CONSUMER_CPU_WORKERS: int | None = None
+    CONSUMER_SHUTDOWN_TIMEOUT: float = 30.0
+    CONSUMER_CANCELLED_CACHE_SIZE: int = 10000
+    CONSUMER_WORKERS: int | None = None
 
     model_config = SettingsConfigDict(
         env_file=".env.example",
@@ -6,16 +6,32 @@ from dependency_injector import containers, providers
 
 from src.infrastructure.persistence.repositories.tasks import TaskRepository
 from src.infrastructure.persistence.uow import UnitOfWork
-from src.usecase.tasks import TaskUseCase
+from src.usecase.outbox import OutboxUseCase
+from src.usecase.tasks import TaskUseCase, TotalCountCache
 
 
 class UsecaseContainer(containers.DeclarativeContainer):
 
+    config = providers.Configuration()
+
     task_repository: providers.Dependency[TaskRepository] = providers.Dependency()
     uow: providers.Dependency[UnitOfWork] = providers.Dependency()
 
+    # Один кэш на процесс, иначе он бы жил не дольше запроса.
+    task_total_cache = providers.Singleton(
+        TotalCountCache,
+        ttl=config.TASK_TOTAL_CACHE_TTL_S,
+        maxsize=config.TASK_TOTAL_CACHE_SIZE,
+    )
+
     task_usecase = providers.Factory(
         TaskUseCase,
         repository=task_repository,
         uow=uow,
+        total_cache=task_total_cache,
+    )
+
+    outbox_usecase = providers.Factory(
+        OutboxUseCase,
+        uow=uow,
     )
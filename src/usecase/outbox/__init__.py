@@ -0,0 +1,3 @@
+from .outbox_usecase import OutboxUseCase
+
+__all__ = ["OutboxUseCase"]
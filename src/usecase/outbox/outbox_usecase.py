@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+from uuid import UUID
+
+from src.entity.outbox import DeadLetterEvent
+from src.entity.tasks import Pagination
+from src.infrastructure.persistence.uow import UnitOfWork
+
+
+class OutboxUseCase:
+    """
+    Административные операции над outbox: просмотр и возврат dead-letter событий.
+    """
+
+    def __init__(self, uow: UnitOfWork) -> None:
+        self._uow = uow
+
+    async def list_dead_letters(
+        self,
+        pagination: Pagination,
+    ) -> Tuple[List[DeadLetterEvent], int]:
+        """
+        Возвращает постраничный список событий, исчерпавших попытки отправки.
+        """
+        async with self._uow.init() as repositories:
+            return await repositories.outbox.list_dead_letters(pagination)
+
+    async def requeue_dead_letters(self, event_ids: Sequence[UUID]) -> int:
+        """
+        Возвращает выбранные события в outbox для повторной отправки.
+        """
+        async with self._uow.init() as repositories:
+            return await repositories.outbox.requeue_dead_letters(event_ids)
@@ -1,4 +1,4 @@
 from .task_usecase import TaskUseCase
+from .total_cache import TotalCountCache
 
-__all__ = ["TaskUseCase"]
-
+__all__ = ["TaskUseCase", "TotalCountCache"]
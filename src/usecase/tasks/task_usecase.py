@@ -1,14 +1,18 @@
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+from datetime import datetime
+from typing import Optional, Sequence
 from uuid import UUID
 
 from src.entity.outbox import NewOutboxEvent
-from src.entity.tasks import (CreateTask, Pagination, Task, TaskFilter,
-                              TaskStatus)
-from src.exceptions import TaskCancellationError, TaskNotFoundError
+from src.entity.tasks import (TERMINAL_STATUSES, CreateTask, Pagination, Task,
+                              TaskFilter, TaskPage, TaskStatus,
+                              TaskStatusUpdate, TotalMode)
+from src.exceptions import (TaskCancellationError, TaskNotFoundError,
+                            TaskTransitionError)
 from src.infrastructure.persistence.repositories.tasks import TaskRepository
 from src.infrastructure.persistence.uow import UnitOfWork
+from src.usecase.tasks.total_cache import TotalCountCache
 
 
 class TaskUseCase:
@@ -16,23 +20,32 @@ class TaskUseCase:
     Координирует операции задач между репозиториями и уровнем обмена сообщениями.
     """
 
-    def __init__(self, repository: TaskRepository, uow: UnitOfWork) -> None:
+    def __init__(
+        self,
+        repository: TaskRepository,
+        uow: UnitOfWork,
+        total_cache: Optional[TotalCountCache] = None,
+    ) -> None:
         """
         Хранит зависимости репозитория
         """
         self._repository = repository
         self._uow = uow
+        self._total_cache = total_cache
 
     async def create_task(self, payload: CreateTask) -> Task:
         """
         Создает задачу и отправляет задачу в очередь.
+
+        Снимок задачи кладётся в payload события, чтобы диспетчер
+        публиковал её без повторного чтения из tasks.
         """
         async with self._uow.init() as repositories:
             task = await repositories.tasks.create_task(payload)
             await repositories.outbox.add_event(
                 NewOutboxEvent(
                     event_type="task.created",
-                    payload={"task_id": str(task.id)},
+                    payload={"task_id": str(task.id), "task": task.to_snapshot()},
                 )
             )
             return task
@@ -40,12 +53,36 @@ class TaskUseCase:
     async def list_tasks(
             self,
             filters: TaskFilter,
-            pagination: Pagination
-    ) -> Tuple[List[Task], int]:
+            pagination: Pagination,
+            total_mode: TotalMode = TotalMode.EXACT,
+    ) -> TaskPage:
         """
-        Возвращает отфильтрованный и постраничный список задач.
+        Возвращает отфильтрованный и постраничный список задач
+        вместе с курсором следующей страницы.
+
+        В режиме CACHED точный total берётся из кэша по ключу фильтров
+        и пересчитывается, только когда значение устарело. Без кэша
+        режим CACHED работает как EXACT.
         """
-        return await self._repository.list_tasks(filters, pagination)
+        if total_mode is not TotalMode.CACHED:
+            return await self._repository.list_tasks(
+                filters, pagination, total_mode=total_mode
+            )
+        if self._total_cache is None:
+            page = await self._repository.list_tasks(filters, pagination)
+            page.total_mode = TotalMode.CACHED
+            return page
+
+        page = await self._repository.list_tasks(
+            filters, pagination, total_mode=TotalMode.NONE
+        )
+        total = self._total_cache.get(filters)
+        if total is None:
+            total = await self._repository.count_tasks(filters)
+            self._total_cache.set(filters, total)
+        page.total = total
+        page.total_mode = TotalMode.CACHED
+        return page
 
     async def get_task(self, task_id: UUID) -> Task:
         """
@@ -58,17 +95,68 @@ class TaskUseCase:
 
     async def cancel_task(self, task_id: UUID) -> Task:
         """
-        Отменяет задачу
+        Отменяет задачу.
+
+        Проверка статуса и отмена выполняются одним условным UPDATE, поэтому
+        отмена не гонится с консьюмером, завершающим задачу. В той же
+        транзакции пишется событие task.cancelled: диспетчер рассылает
+        его консьюмерам, чтобы те не брали задачу и прервали её обработку.
         """
-        task = await self.get_task(task_id)
+        async with self._uow.init() as repositories:
+            transition = await repositories.tasks.cancel_task(task_id)
+            if not transition.found:
+                raise TaskNotFoundError(task_id=task_id)
+            if transition.task is None:
+                raise TaskCancellationError(task_id=task_id, status=transition.previous)
 
-        if task.status in {TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED}:
-            raise TaskCancellationError(task_id=task_id, status=task.status)
+            await repositories.outbox.add_event(
+                NewOutboxEvent(
+                    event_type="task.cancelled",
+                    payload={"task_id": str(task_id)},
+                )
+            )
+            return transition.task
 
-        cancelled = await self._repository.cancel_task(task_id)
-        if cancelled is None:
-            raise TaskNotFoundError(task_id=task_id)
-        return cancelled
+    async def claim_task(self, task_id: UUID, *, reclaim: bool = False) -> Optional[Task]:
+        """
+        Берёт задачу в работу. None - задачу уже взяли, отменили или завершили.
+        :param reclaim: Повторная попытка, задача может быть IN_PROGRESS.
+        """
+        async with self._uow.init() as repositories:
+            return await repositories.tasks.claim_task(task_id, reclaim=reclaim)
+
+    async def release_task(self, task_id: UUID) -> Optional[Task]:
+        """
+        Возвращает взятую в работу задачу в очередь ожидания.
+        """
+        async with self._uow.init() as repositories:
+            return await repositories.tasks.release_task(task_id)
+
+    async def finish_task(
+        self,
+        task_id: UUID,
+        status: TaskStatus,
+        *,
+        error: Optional[str] = None,
+        result: Optional[str] = None,
+    ) -> Optional[Task]:
+        """
+        Завершает взятую в работу задачу. None - задача уже не в работе.
+        """
+        async with self._uow.init() as repositories:
+            return await repositories.tasks.finish_task(
+                task_id,
+                status,
+                error=error,
+                result=result,
+            )
+
+    async def finish_tasks(self, updates: Sequence[TaskStatusUpdate]) -> int:
+        """
+        Завершает пачку взятых в работу задач одной транзакцией.
+        """
+        async with self._uow.init() as repositories:
+            return await repositories.tasks.finish_tasks(updates)
 
     async def set_status(
         self,
@@ -78,13 +166,27 @@ class TaskUseCase:
         error: Optional[str] = None,
         result: Optional[str] = None,
     ) -> Task:
-        updated = await self._repository.set_status(
-            task_id,
-            status,
-            error=error,
-            result=result
-        )
-        if updated is None:
+        """
+        Обновляет статус задачи в отдельной транзакции.
+
+        Каждый вызов берёт свою сессию из пула, поэтому метод безопасно
+        вызывать конкурентно из обработчиков разных сообщений. Переход
+        проверяется по TASK_TRANSITIONS в том же запросе, что и обновление.
+        """
+        finished_at = datetime.utcnow() if status in TERMINAL_STATUSES else None
+        async with self._uow.init() as repositories:
+            transition = await repositories.tasks.set_status(
+                task_id,
+                status,
+                error=error,
+                result=result,
+                finished_at=finished_at,
+            )
+        if not transition.found:
             raise TaskNotFoundError(task_id=task_id)
-        return updated
+        if transition.task is None:
+            raise TaskTransitionError(
+                task_id=task_id, status=transition.previous, target=status
+            )
+        return transition.task
 
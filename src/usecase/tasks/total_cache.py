@@ -0,0 +1,60 @@
+"""
+Кэш total для списка задач.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import astuple
+from typing import Hashable, Optional, Tuple
+
+from src.entity.tasks import TaskFilter
+
+
+class TotalCountCache:
+    """
+    Точные total по ключу фильтров, живущие ttl секунд.
+
+    Кэш локален для процесса и не сбрасывается при записи, поэтому total
+    может отставать от таблицы не больше чем на ttl. При переполнении
+    вытесняются давно не запрошенные ключи.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024) -> None:
+        """
+        :param ttl: Время жизни значения в секундах.
+        :param maxsize: Максимальное число ключей фильтров.
+        """
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._items: OrderedDict[Hashable, Tuple[float, int]] = OrderedDict()
+
+    @staticmethod
+    def key(filters: TaskFilter) -> Hashable:
+        return astuple(filters)
+
+    def get(self, filters: TaskFilter) -> Optional[int]:
+        key = self.key(filters)
+        cached = self._items.get(key)
+        if cached is None:
+            return None
+        expires_at, total = cached
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return total
+
+    def set(self, filters: TaskFilter, total: int) -> None:
+        key = self.key(filters)
+        self._items[key] = (time.monotonic() + self._ttl, total)
+        self._items.move_to_end(key)
+        while len(self._items) > self._maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -1,24 +1,144 @@
 from __future__ import annotations
 
+import asyncio
 import os
 import sys
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import Any
 from uuid import uuid4
 
+import aio_pika
 import pytest
 from dependency_injector import providers
 from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from src.entity.tasks import CreateTask, Task, TaskId, TaskStatus
+from src.entity.tasks import (CreateTask, Pagination, Task, TaskCursor,
+                              TaskFilter, TaskId, TaskPage, TaskPriority,
+                              TaskStatus, TotalMode, can_transition)
 from src.exceptions import TaskCancellationError, TaskNotFoundError
 from src.main import create_app
 
 
+def make_task(**fields: Any) -> Task:
+    """
+    Задача для тестов: по умолчанию новая, переданные поля заменяют значения.
+    """
+    values: dict[str, Any] = {
+        "id": TaskId(uuid4()),
+        "name": "Task",
+        "description": "Test task",
+        "priority": TaskPriority.MEDIUM,
+        "status": TaskStatus.NEW,
+        "created_at": datetime.utcnow(),
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None,
+    }
+    values.update(fields)
+    return Task(**values)
+
+
+class FakeExchange:
+    """
+    Exchange брокера в памяти.
+
+    Публикация задач из failing завершается ошибкой error (по умолчанию nack
+    брокера); если failing не задан, а error задан, падает любая публикация.
+    """
+
+    def __init__(
+        self, failing: set[str] | None = None, error: Exception | None = None
+    ) -> None:
+        self.failing = failing
+        self.error = error
+        self.published: list = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @property
+    def sent(self) -> list[str]:
+        return [message.headers["task_id"] for _, message in self.published]
+
+    async def publish(self, message, routing_key: str) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+            if self._fails(message):
+                raise self.error or aio_pika.exceptions.AMQPError("nack")
+            self.published.append((routing_key, message))
+        finally:
+            self.in_flight -= 1
+
+    def _fails(self, message) -> bool:
+        if self.failing is None:
+            return self.error is not None
+        return message.headers.get("task_id") in self.failing
+
+
+class FakeChannel:
+    def __init__(self, exchange: FakeExchange | None = None) -> None:
+        self.default_exchange = exchange or FakeExchange()
+        self.is_closed = False
+
+
+class RecordingResult:
+    def __init__(self, row=None) -> None:
+        self.row = row
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return [] if self.row is None else list(self.row)
+
+    def one(self):
+        return self.row
+
+    def one_or_none(self):
+        return self.row
+
+    def scalar_one_or_none(self):
+        return self.row
+
+    def scalar_one(self):
+        return self.row
+
+
+class RecordingSession:
+    """
+    Сессия, которая ничего не выполняет, а запоминает запросы репозитория.
+    execute() возвращает row, scalar() возвращает scalar.
+    """
+
+    def __init__(self, row=None, *, scalar=None) -> None:
+        self.row = row
+        self.scalar_value = scalar
+        self.statements: list = []
+        self.scalar_params: list = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return RecordingResult(self.row)
+
+    async def scalar(self, stmt, params=None):
+        self.scalar_params.append(params)
+        return self.scalar_value
+
+    async def commit(self) -> None:
+        pass
+
+
+def compile_sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
 class FakeTaskUseCase:
     """
     Пример использования заглушки для тестирования обработчиков API без реальной базы данных.
@@ -30,25 +150,33 @@ class FakeTaskUseCase:
 
     async def create_task(self, payload: CreateTask) -> Task:
         self.created.append(payload)
-        task_id = TaskId(uuid4())
-        task = Task(
-            id=task_id,
+        task = make_task(
             name=payload.name,
             description=payload.description,
             priority=payload.priority,
-            status=TaskStatus.NEW,
-            created_at=datetime.now(timezone.utc),
-            started_at=None,
-            finished_at=None,
-            result=None,
-            error=None,
         )
-        self._tasks[task_id] = task
+        self._tasks[task.id] = task
         return task
 
-    async def list_tasks(self, *args: Any, **kwargs: Any) -> tuple[list[Task], int]:
-        tasks = list(self._tasks.values())
-        return tasks, len(tasks)
+    async def list_tasks(
+        self,
+        filters: TaskFilter,
+        pagination: Pagination,
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> TaskPage:
+        tasks = sorted(
+            self._tasks.values(), key=lambda task: (task.created_at, task.id), reverse=True
+        )
+        if pagination.cursor is not None:
+            key = (pagination.cursor.created_at, pagination.cursor.id)
+            tasks = [task for task in tasks if (task.created_at, task.id) < key]
+        window = tasks[pagination.offset: pagination.offset + pagination.limit + 1]
+        items = window[: pagination.limit]
+        next_cursor = TaskCursor.after(items[-1]) if len(window) > pagination.limit else None
+        total = None if total_mode is TotalMode.NONE else len(self._tasks)
+        return TaskPage(
+            items=items, total=total, next_cursor=next_cursor, total_mode=total_mode
+        )
 
     async def get_task(self, task_id: TaskId) -> Task:
         task = self._tasks.get(task_id)
@@ -58,7 +186,7 @@ class FakeTaskUseCase:
 
     async def cancel_task(self, task_id: TaskId) -> Task:
         task = await self.get_task(task_id)
-        if task.status in {TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED}:
+        if not can_transition(task.status, TaskStatus.CANCELLED):
             raise TaskCancellationError(task_id=task_id, status=task.status)
         task.status = TaskStatus.CANCELLED
         self._tasks[task_id] = task
@@ -79,6 +207,3 @@ def api_client(fake_task_usecase: FakeTaskUseCase) -> TestClient:
         yield client
 
     app.container.usecase.task_usecase.reset_override()
-
-
-
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from src.infrastructure.messaging.adaptive import AdaptiveBatchController
+
+
+def make_controller() -> AdaptiveBatchController:
+    return AdaptiveBatchController(
+        initial_batch_size=50,
+        max_batch_size=200,
+        initial_concurrency=20,
+        max_concurrency=100,
+        target_latency=0.1,
+    )
+
+
+def test_grows_while_backlog_is_full_and_broker_is_fast() -> None:
+    controller = make_controller()
+
+    for _ in range(10):
+        controller.observe(
+            fetched=controller.batch_size,
+            latencies=[0.01] * controller.batch_size,
+            failed=0,
+        )
+
+    assert controller.batch_size == 200
+    assert controller.concurrency == 100
+
+
+def test_holds_when_batch_is_not_full() -> None:
+    controller = make_controller()
+
+    controller.observe(fetched=10, latencies=[0.01] * 10, failed=0)
+
+    assert (controller.batch_size, controller.concurrency) == (50, 20)
+
+
+def test_shrinks_on_slow_confirms_or_errors() -> None:
+    controller = make_controller()
+
+    controller.observe(fetched=50, latencies=[0.5] * 50, failed=0)
+    assert (controller.batch_size, controller.concurrency) == (25, 10)
+
+    controller.observe(fetched=25, latencies=[0.01] * 25, failed=5)
+    assert (controller.batch_size, controller.concurrency) == (12, 5)
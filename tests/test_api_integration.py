@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import base64
+import json
 from uuid import uuid4
 
 import pytest
@@ -40,3 +42,63 @@ def test_get_task_status_returns_not_found_for_missing_task(
     assert response.status_code == 404
     assert response.json()["detail"] == "Task not found"
 
+
+def test_list_tasks_pages_through_cursor(
+    api_client: TestClient,
+) -> None:
+    for index in range(5):
+        api_client.post(
+            "/api/v1/tasks/",
+            json={
+                "name": f"Task {index}",
+                "description": "Paged via cursor",
+                "priority": TaskPriority.LOW.value,
+            },
+        )
+
+    seen: list[str] = []
+    params = {"page_size": 2}
+    while True:
+        response = api_client.get("/api/v1/tasks/", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend(item["id"] for item in data["items"])
+        if data["next_cursor"] is None:
+            break
+        params = {"page_size": 2, "cursor": data["next_cursor"]}
+
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+
+
+def test_list_tasks_rejects_malformed_cursor(
+    api_client: TestClient,
+) -> None:
+    response = api_client.get("/api/v1/tasks/", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
+
+
+def test_list_tasks_rejects_cursor_with_timezone(
+    api_client: TestClient,
+) -> None:
+    raw = json.dumps({"c": "2024-01-01T00:00:00+00:00", "i": str(uuid4())})
+    cursor = base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    response = api_client.get("/api/v1/tasks/", params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
+
+
+def test_list_tasks_reports_total_mode(
+    api_client: TestClient,
+) -> None:
+    response = api_client.get("/api/v1/tasks/", params={"total_mode": "none"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] is None
+    assert data["total_mode"] == "none"
+
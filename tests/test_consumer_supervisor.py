@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+import pytest
+
+from src.entity.outbox import RetryBackoff
+from src.infrastructure.messaging import supervisor as supervisor_module
+from src.infrastructure.messaging.supervisor import ConsumerSupervisor
+
+
+def crashing_worker(cpu_workers: int | None = None) -> None:
+    os._exit(1)
+
+
+def sleeping_worker(cpu_workers: int | None = None) -> None:
+    time.sleep(60)
+
+
+def budget_reporting_worker(cpu_workers: int | None = None) -> None:
+    os._exit(cpu_workers or 0)
+
+
+def run_in_thread(supervisor: ConsumerSupervisor) -> threading.Thread:
+    thread = threading.Thread(target=supervisor.run)
+    thread.start()
+    return thread
+
+
+def test_supervisor_restarts_crashed_workers_with_backoff() -> None:
+    supervisor = ConsumerSupervisor(
+        2,
+        target=crashing_worker,
+        backoff=RetryBackoff(base=0.01, cap=0.05),
+        poll_interval=0.01,
+        shutdown_timeout=1.0,
+        start_method="fork",
+    )
+    thread = run_in_thread(supervisor)
+    time.sleep(0.5)
+    supervisor.stop()
+    thread.join(timeout=5.0)
+
+    assert not thread.is_alive()
+    assert supervisor.restarts >= 4
+
+
+def test_supervisor_terminates_workers_on_stop() -> None:
+    supervisor = ConsumerSupervisor(
+        2,
+        target=sleeping_worker,
+        poll_interval=0.01,
+        shutdown_timeout=2.0,
+        start_method="fork",
+    )
+    thread = run_in_thread(supervisor)
+    time.sleep(0.2)
+    processes = [worker.process for worker in supervisor._workers]
+    supervisor.stop()
+    thread.join(timeout=5.0)
+
+    assert not thread.is_alive()
+    assert supervisor.restarts == 0
+    assert all(process.exitcode == -15 for process in processes)
+
+
+@pytest.mark.parametrize(
+    ("workers", "configured", "expected"),
+    [(4, None, 2), (16, None, 1), (4, 3, 3)],
+    ids=["split_cores", "at_least_one", "configured_per_worker"],
+)
+def test_supervisor_splits_cpu_pool_between_workers(
+    monkeypatch, workers, configured, expected
+) -> None:
+    monkeypatch.setattr(supervisor_module.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(supervisor_module.settings, "CONSUMER_CPU_WORKERS", configured)
+    supervisor = ConsumerSupervisor(
+        workers, target=budget_reporting_worker, start_method="fork"
+    )
+
+    worker = supervisor._workers[0]
+    supervisor._spawn(worker)
+    worker.process.join(timeout=5.0)
+
+    assert worker.process.exitcode == expected
+
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+
+import pytest
+
+from src.entity.tasks import TaskPriority
+from src.infrastructure.messaging.scheduler import WeightedFairScheduler
+
+WEIGHTS = {TaskPriority.HIGH: 6, TaskPriority.MEDIUM: 3, TaskPriority.LOW: 1}
+
+
+def fill(scheduler: WeightedFairScheduler, count: int) -> None:
+    for priority in TaskPriority:
+        for i in range(count):
+            scheduler.put(priority, (priority, i))
+
+
+def test_scheduler_shares_throughput_by_weight_and_interleaves() -> None:
+    scheduler = WeightedFairScheduler(WEIGHTS)
+    fill(scheduler, 100)
+
+    picks = [scheduler.get_nowait()[0] for _ in range(20)]
+
+    assert Counter(picks) == {TaskPriority.HIGH: 12, TaskPriority.MEDIUM: 6, TaskPriority.LOW: 2}
+    # Smooth WRR не отдаёт HIGH шестью подряд.
+    assert picks[:4] != [TaskPriority.HIGH] * 4
+
+
+def test_scheduler_skips_empty_classes_and_keeps_fifo_order() -> None:
+    scheduler = WeightedFairScheduler(WEIGHTS)
+    for i in range(3):
+        scheduler.put(TaskPriority.LOW, i)
+
+    assert [scheduler.get_nowait() for _ in range(3)] == [
+        (TaskPriority.LOW, 0),
+        (TaskPriority.LOW, 1),
+        (TaskPriority.LOW, 2),
+    ]
+    with pytest.raises(asyncio.QueueEmpty):
+        scheduler.get_nowait()
+
+
+def test_scheduler_serves_aged_items_first() -> None:
+    scheduler = WeightedFairScheduler(WEIGHTS, aging=0.01)
+    scheduler.put(TaskPriority.LOW, "old")
+    time.sleep(0.02)
+    scheduler.put(TaskPriority.HIGH, "fresh")
+
+    assert scheduler.get_nowait() == (TaskPriority.LOW, "old")
+
+
+@pytest.mark.asyncio()
+async def test_scheduler_get_waits_for_items() -> None:
+    scheduler = WeightedFairScheduler(WEIGHTS)
+    waiter = asyncio.create_task(scheduler.get())
+    await asyncio.sleep(0)
+    scheduler.put(TaskPriority.MEDIUM, "item")
+
+    assert await asyncio.wait_for(waiter, timeout=1.0) == (TaskPriority.MEDIUM, "item")
+    assert scheduler.drain() == []
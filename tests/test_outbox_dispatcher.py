@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import contextlib
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from conftest import make_task
+
+from src.entity.outbox import OutboxEvent, OutboxStatus, RetryBackoff
+from src.entity.tasks import Task
+from src.infrastructure.messaging import outbox_dispatcher
+from src.infrastructure.messaging.adaptive import AdaptiveBatchController
+from src.exceptions import TaskPublishError
+from src.infrastructure.messaging.outbox_dispatcher import OutboxDispatcher
+from src.infrastructure.messaging.priority_queue import PublishResult
+
+
+def make_event(payload: dict, retries: int = 0) -> OutboxEvent:
+    now = datetime.now(timezone.utc)
+    return OutboxEvent(
+        id=uuid4(),
+        event_type="task.created",
+        payload=payload,
+        status=OutboxStatus.PENDING,
+        retries=retries,
+        last_error=None,
+        created_at=now,
+        updated_at=now,
+        next_attempt_at=now,
+    )
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.commits = 0
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+class FakeDatabase:
+    def __init__(self) -> None:
+        self.session = FakeSession()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        yield self.session
+
+
+class FakeOutboxRepository:
+    events: list[OutboxEvent] = []
+    next_attempt_at: datetime | None = None
+
+    def __init__(self, session, *, auto_commit: bool = True) -> None:
+        self.sent: list = []
+        self.failed: dict = {}
+        self.writes = 0
+        self.archived: list = []
+        FakeOutboxRepository.instance = self
+
+    async def claim_pending(self, limit, *, max_retries=None):
+        self.limit = limit
+        return list(self.events)[:limit]
+
+    async def mark_sent_many(self, event_ids) -> None:
+        self.sent.extend(event_ids)
+        self.writes += 1
+
+    async def mark_failed_many(self, failures) -> None:
+        self.failed.update((failure.event_id, failure) for failure in failures)
+        self.writes += 1
+
+
+    async def archive_exhausted(self, max_retries, *, event_ids=None):
+        self.archived.extend(event_ids)
+        return len(event_ids)
+
+    async def pending_stats(self):
+        return len(self.events), None, self.next_attempt_at
+
+
+class FakeTaskRepository:
+    tasks: dict = {}
+    calls: list = []
+
+    def __init__(self, session, *, auto_commit: bool = True) -> None:
+        pass
+
+    async def get_tasks(self, task_ids):
+        ids = list(task_ids)
+        FakeTaskRepository.calls.append(ids)
+        return {task_id: self.tasks[task_id] for task_id in ids if task_id in self.tasks}
+
+
+class FakePublisher:
+    def __init__(self, failing: set | None = None) -> None:
+        self.published: list[Task] = []
+        self.failing = failing or set()
+
+    async def publish_many(self, tasks, *, max_in_flight=None):
+        self.max_in_flight = max_in_flight
+        results = []
+        for task in tasks:
+            if task.id in self.failing:
+                results.append(PublishResult(task=task, error=TaskPublishError(task_id=task.id)))
+            else:
+                self.published.append(task)
+                results.append(PublishResult(task=task))
+        return results
+
+    async def publish_cancellations(self, task_ids):
+        self.cancelled = list(task_ids)
+        return [
+            TaskPublishError(task_id=task_id) if task_id in self.failing else None
+            for task_id in task_ids
+        ]
+
+
+@pytest.fixture()
+def fake_repositories(monkeypatch):
+    FakeTaskRepository.calls = []
+    FakeOutboxRepository.next_attempt_at = None
+    monkeypatch.setattr(outbox_dispatcher, "OutboxRepository", FakeOutboxRepository)
+    monkeypatch.setattr(outbox_dispatcher, "TaskRepository", FakeTaskRepository)
+
+
+@pytest.mark.asyncio()
+async def test_dispatch_loads_batch_tasks_in_one_query(fake_repositories) -> None:
+    tasks = [make_task() for _ in range(3)]
+    FakeTaskRepository.tasks = {task.id: task for task in tasks}
+    events = [make_event({"task_id": str(task.id)}) for task in tasks]
+    missing = make_event({"task_id": str(uuid4())})
+    broken = make_event({"task_id": "not-a-uuid"})
+    FakeOutboxRepository.events = [*events, missing, broken]
+
+    db = FakeDatabase()
+    publisher = FakePublisher()
+    dispatcher = OutboxDispatcher(db=db, publisher=publisher)
+
+    assert await dispatcher.dispatch_pending() is True
+
+    assert len(FakeTaskRepository.calls) == 1
+    assert publisher.published == tasks
+    outbox = FakeOutboxRepository.instance
+    assert set(outbox.sent) == {event.id for event in events} | {missing.id}
+    assert list(outbox.failed) == [broken.id]
+    assert outbox.writes == 2
+    assert db.session.commits == 1
+
+
+@pytest.mark.asyncio()
+async def test_dispatch_marks_only_failed_publishes(fake_repositories) -> None:
+    ok_task, failed_task = make_task(), make_task()
+    FakeTaskRepository.tasks = {ok_task.id: ok_task, failed_task.id: failed_task}
+    ok_event = make_event({"task_id": str(ok_task.id)})
+    failed_event = make_event({"task_id": str(failed_task.id)})
+    FakeOutboxRepository.events = [ok_event, failed_event]
+
+    publisher = FakePublisher(failing={failed_task.id})
+    dispatcher = OutboxDispatcher(db=FakeDatabase(), publisher=publisher)
+
+    await dispatcher.dispatch_pending()
+
+    outbox = FakeOutboxRepository.instance
+    assert outbox.sent == [ok_event.id]
+    assert list(outbox.failed) == [failed_event.id]
+    assert outbox.failed[failed_event.id].next_attempt_at > datetime.utcnow()
+    metrics = dispatcher.metrics.snapshot()
+    assert metrics["published_total"] == 1
+    assert metrics["failed_total"] == 1
+    assert metrics["batch_size"]["count"] == 1
+
+
+def test_retry_backoff_grows_exponentially_up_to_cap() -> None:
+    backoff = RetryBackoff(base=1.0, cap=60.0)
+
+    for retries, ceiling in [(0, 1.0), (3, 8.0), (10, 60.0)]:
+        delay = backoff.delay(retries).total_seconds()
+        assert ceiling / 2 <= delay <= ceiling
+
+
+@pytest.mark.asyncio()
+async def test_dispatch_archives_events_that_exhausted_retries(fake_repositories) -> None:
+    task = make_task()
+    FakeTaskRepository.tasks = {task.id: task}
+    last_try = make_event({"task_id": str(task.id)}, retries=4)
+    FakeOutboxRepository.events = [last_try]
+
+    dispatcher = OutboxDispatcher(
+        db=FakeDatabase(),
+        publisher=FakePublisher(failing={task.id}),
+        max_retries=5,
+    )
+
+    await dispatcher.dispatch_pending()
+
+    assert FakeOutboxRepository.instance.archived == [last_try.id]
+
+
+@pytest.mark.asyncio()
+async def test_dispatch_publishes_from_snapshot_without_lookup(fake_repositories) -> None:
+    task = make_task()
+    FakeTaskRepository.tasks = {}
+    FakeOutboxRepository.events = [
+        make_event({"task_id": str(task.id), "task": task.to_snapshot()})
+    ]
+
+    publisher = FakePublisher()
+    dispatcher = OutboxDispatcher(db=FakeDatabase(), publisher=publisher)
+
+    await dispatcher.dispatch_pending()
+
+    assert FakeTaskRepository.calls == [[]]
+    assert [published.id for published in publisher.published] == [task.id]
+    assert publisher.published[0].name == task.name
+
+
+@pytest.mark.asyncio()
+async def test_dispatch_uses_adaptive_batch_size_and_window(fake_repositories) -> None:
+    tasks = [make_task() for _ in range(12)]
+    FakeTaskRepository.tasks = {task.id: task for task in tasks}
+    FakeOutboxRepository.events = [make_event({"task_id": str(task.id)}) for task in tasks]
+
+    controller = AdaptiveBatchController(
+        initial_batch_size=10,
+        min_batch_size=5,
+        initial_concurrency=4,
+    )
+    publisher = FakePublisher()
+    dispatcher = OutboxDispatcher(
+        db=FakeDatabase(),
+        publisher=publisher,
+        adaptive=controller,
+    )
+
+    await dispatcher.dispatch_pending()
+
+    assert FakeOutboxRepository.instance.limit == 10
+    assert publisher.max_in_flight == 4
+    assert controller.batch_size > 10
+
+
+@pytest.mark.asyncio()
+async def test_dispatch_broadcasts_cancellations(fake_repositories) -> None:
+    FakeTaskRepository.tasks = {}
+    cancelled_id, failing_id = uuid4(), uuid4()
+    cancelled = make_event({"task_id": str(cancelled_id)})
+    cancelled.event_type = "task.cancelled"
+    failing = make_event({"task_id": str(failing_id)})
+    failing.event_type = "task.cancelled"
+    FakeOutboxRepository.events = [cancelled, failing]
+
+    publisher = FakePublisher(failing={failing_id})
+    dispatcher = OutboxDispatcher(db=FakeDatabase(), publisher=publisher)
+
+    await dispatcher.dispatch_pending()
+
+    assert FakeTaskRepository.calls == [[]]
+    assert publisher.cancelled == [cancelled_id, failing_id]
+    outbox = FakeOutboxRepository.instance
+    assert outbox.sent == [cancelled.id]
+    assert list(outbox.failed) == [failing.id]
+
+
+class FakeListener:
+    def __init__(self) -> None:
+        self.timeouts: list[float] = []
+
+    async def wait(self, timeout: float) -> bool:
+        self.timeouts.append(timeout)
+        return False
+
+
+@pytest.mark.parametrize(
+    ("due_in", "expected"),
+    [(None, 30.0), (5.0, 5.0), (-1.0, 30.0), (60.0, 30.0)],
+    ids=["nothing_pending", "retry_due_soon", "retry_overdue", "retry_after_poll"],
+)
+@pytest.mark.asyncio()
+async def test_wait_is_capped_at_next_retry(
+    fake_repositories, monkeypatch, due_in, expected
+) -> None:
+    FakeOutboxRepository.events = []
+    FakeOutboxRepository.next_attempt_at = (
+        None if due_in is None else datetime.utcnow() + timedelta(seconds=due_in)
+    )
+    listener = FakeListener()
+    dispatcher = OutboxDispatcher(
+        FakeDatabase(), FakePublisher(), idle_sleep=30.0, listener=listener
+    )
+    await dispatcher._refresh_backlog_stats()
+
+    await dispatcher._wait_for_events()
+
+    [timeout] = listener.timeouts
+    assert timeout == pytest.approx(expected, abs=0.5)
+
+
+@pytest.mark.asyncio()
+async def test_wait_is_capped_at_retry_scheduled_by_dispatch(fake_repositories) -> None:
+    task = make_task()
+    FakeTaskRepository.tasks = {task.id: task}
+    FakeOutboxRepository.events = [make_event({"task_id": str(task.id)})]
+    listener = FakeListener()
+    dispatcher = OutboxDispatcher(
+        FakeDatabase(),
+        FakePublisher(failing={task.id}),
+        idle_sleep=30.0,
+        listener=listener,
+        backoff=RetryBackoff(base=1.0, cap=1.0),
+    )
+    await dispatcher._refresh_backlog_stats()
+
+    await dispatcher.dispatch_pending()
+    await dispatcher._wait_for_events()
+
+    # Статистика в пределах stats_interval не перечитывается: время повтора
+    # диспетчер берёт из собственной неудачи.
+    [timeout] = listener.timeouts
+    assert outbox_dispatcher.MIN_IDLE_SLEEP <= timeout <= 1.0
+
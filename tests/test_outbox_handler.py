@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from src.api.handlers.admin.outbox_handler import (list_dead_letters,
+                                                   requeue_dead_letters)
+from src.api.schemas.requests_schemas.outbox.schemas import (
+    DeadLetterListQuery, DeadLetterRequeueRequest)
+from src.entity.outbox import DeadLetterEvent
+
+
+class FakeOutboxUseCase:
+    def __init__(self, events: list[DeadLetterEvent]) -> None:
+        self.events = {event.id: event for event in events}
+
+    async def list_dead_letters(self, pagination):
+        events = list(self.events.values())
+        return events[pagination.offset:pagination.offset + pagination.limit], len(events)
+
+    async def requeue_dead_letters(self, event_ids):
+        requeued = [event_id for event_id in event_ids if event_id in self.events]
+        for event_id in requeued:
+            del self.events[event_id]
+        return len(requeued)
+
+
+def make_dead_letter() -> DeadLetterEvent:
+    now = datetime.now(timezone.utc)
+    return DeadLetterEvent(
+        id=uuid4(),
+        event_type="task.created",
+        payload={"task_id": str(uuid4())},
+        retries=5,
+        last_error="broker unavailable",
+        created_at=now,
+        dead_at=now,
+    )
+
+
+@pytest.mark.asyncio()
+async def test_list_dead_letters_paginates() -> None:
+    uc = FakeOutboxUseCase([make_dead_letter() for _ in range(3)])
+
+    response = await list_dead_letters(
+        uc=uc,
+        query=DeadLetterListQuery(page=2, page_size=2),
+    )
+
+    assert response.total == 3
+    assert len(response.items) == 1
+
+
+@pytest.mark.asyncio()
+async def test_requeue_dead_letters_reports_count() -> None:
+    events = [make_dead_letter() for _ in range(2)]
+    uc = FakeOutboxUseCase(events)
+
+    response = await requeue_dead_letters(
+        body=DeadLetterRequeueRequest(ids=[events[0].id, uuid4()]),
+        uc=uc,
+    )
+
+    assert response.requeued == 1
+    assert list(uc.events) == [events[1].id]
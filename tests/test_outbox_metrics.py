@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from src.infrastructure.messaging.metrics import Histogram, OutboxMetrics
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    histogram = Histogram([0.1, 1.0])
+
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [("0.1", 1), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+
+
+def test_metrics_snapshot_and_prometheus_output() -> None:
+    metrics = OutboxMetrics(rate_window=10.0)
+
+    metrics.observe_batch(4, retried=1)
+    metrics.observe_publish([0.002, 0.003, 0.004, 0.5], failed=1)
+    metrics.set_backlog(120, datetime.utcnow() - timedelta(seconds=30))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["published_total"] == 3
+    assert snapshot["failed_total"] == 1
+    assert snapshot["retried_total"] == 1
+    assert snapshot["backlog_size"] == 120
+    assert snapshot["oldest_pending_age_seconds"] >= 30
+    assert snapshot["events_per_second"] == 0.3
+    assert snapshot["publish_latency_seconds"]["count"] == 4
+
+    text = metrics.render_prometheus()
+    assert "outbox_backlog_size 120" in text
+    assert 'outbox_batch_size_bucket{le="+Inf"} 1' in text
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from conftest import RecordingSession, compile_sql
+
+from src.entity.outbox import OutboxFailure
+from src.infrastructure.persistence.repositories.outbox import OutboxRepository
+
+
+@pytest.mark.asyncio()
+async def test_claim_pending_uses_skip_locked() -> None:
+    session = RecordingSession()
+    repo = OutboxRepository(session, auto_commit=False)
+
+    await repo.claim_pending(10, max_retries=5)
+
+    sql = compile_sql(session.statements[0])
+    assert "outbox.next_attempt_at <=" in sql
+    assert "ORDER BY outbox.next_attempt_at ASC" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+
+
+@pytest.mark.asyncio()
+async def test_mark_failed_many_is_single_update_from_values() -> None:
+    session = RecordingSession()
+    repo = OutboxRepository(session)
+
+    retry_at = datetime.utcnow()
+    await repo.mark_failed_many(
+        [
+            OutboxFailure(event_id=uuid4(), error="boom", next_attempt_at=retry_at),
+            OutboxFailure(event_id=uuid4(), error="nack", next_attempt_at=retry_at),
+        ]
+    )
+    await repo.mark_sent_many([uuid4(), uuid4()])
+
+    update_sql, delete_sql = (compile_sql(stmt) for stmt in session.statements)
+    assert "FROM (VALUES" in update_sql
+    assert delete_sql.startswith("DELETE FROM outbox WHERE outbox.id IN")
+
+
+@pytest.mark.asyncio()
+async def test_pending_stats_ignores_attempts_already_due() -> None:
+    session = RecordingSession(row=(3, None, None))
+    repo = OutboxRepository(session)
+
+    assert await repo.pending_stats() == (3, None, None)
+
+    sql = compile_sql(session.statements[0])
+    assert "min(outbox.next_attempt_at) FILTER (WHERE outbox.next_attempt_at >" in sql
+
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.infrastructure.persistence import listener as listener_module
+from src.infrastructure.persistence.listener import PgNotificationListener
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.listeners: dict[str, object] = {}
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback):
+        self.listeners.pop(channel, None)
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def notify(self, channel: str) -> None:
+        self.listeners[channel](self, 1, channel, "")
+
+    def terminate(self) -> None:
+        self.closed = True
+        self.on_terminate(self)
+
+
+@pytest.fixture()
+def fake_connection(monkeypatch) -> FakeConnection:
+    connection = FakeConnection()
+
+    async def fake_connect(dsn):
+        return connection
+
+    monkeypatch.setattr(listener_module.asyncpg, "connect", fake_connect)
+    return connection
+
+
+@pytest.mark.asyncio()
+async def test_wait_returns_on_notify(fake_connection: FakeConnection) -> None:
+    listener = PgNotificationListener("postgresql://test", "outbox_events")
+    await listener.start()
+
+    # Первое ожидание после подключения сразу возвращает управление.
+    assert await listener.wait(0.01) is True
+    assert await listener.wait(0.01) is False
+
+    asyncio.get_running_loop().call_later(0.01, fake_connection.notify, "outbox_events")
+    assert await listener.wait(1.0) is True
+
+    await listener.close()
+    assert fake_connection.closed
+
+
+@pytest.mark.asyncio()
+async def test_wait_polls_at_regular_interval_while_listen_is_unavailable(
+    monkeypatch,
+) -> None:
+    async def failing_connect(dsn):
+        raise OSError("connection refused")
+
+    slept: list[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        slept.append(delay)
+
+    monkeypatch.setattr(listener_module.asyncpg, "connect", failing_connect)
+    monkeypatch.setattr(listener_module.asyncio, "sleep", fake_sleep)
+    listener = PgNotificationListener("postgresql://test", "outbox_events", poll_interval=2.0)
+
+    assert await listener.wait(30.0) is False
+    assert await listener.wait(0.5) is False
+    assert slept == [2.0, 0.5]
+
+
+@pytest.mark.asyncio()
+async def test_wait_wakes_up_when_connection_is_terminated(
+    fake_connection: FakeConnection,
+) -> None:
+    listener = PgNotificationListener("postgresql://test", "outbox_events")
+    await listener.start()
+    assert await listener.wait(0.01) is True
+
+    asyncio.get_running_loop().call_later(0.01, fake_connection.terminate)
+    waiter = asyncio.create_task(listener.wait(30.0))
+
+    assert await asyncio.wait_for(waiter, 1.0) is True
+    assert not listener.is_listening
+
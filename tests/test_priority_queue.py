@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+
+import aio_pika
+import pytest
+from conftest import FakeChannel, FakeExchange, make_task
+
+from src.entity.tasks import TaskPriority
+from src.infrastructure.messaging import priority_queue
+from src.infrastructure.messaging.priority_queue import PriorityTaskQueue
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        aio_pika.exceptions.AMQPError("nack"),
+        aio_pika.exceptions.ChannelInvalidStateError("channel closed"),
+        asyncio.TimeoutError(),
+    ],
+)
+@pytest.mark.asyncio()
+async def test_publish_many_bounds_in_flight_and_reports_failures(monkeypatch, error) -> None:
+    tasks = [make_task(priority=TaskPriority.HIGH) for _ in range(10)]
+    exchange = FakeExchange(failing={str(tasks[3].id)}, error=error)
+    channel = FakeChannel(exchange)
+    queue = PriorityTaskQueue(max_in_flight=3)
+
+    async def ensure_channel():
+        return channel
+
+    async def noop(*args):
+        return None
+
+    monkeypatch.setattr(queue, "_ensure_channel", ensure_channel)
+    monkeypatch.setattr(queue, "_ensure_queue", noop)
+    monkeypatch.setattr(queue, "_reset_connection", noop)
+
+    results = await queue.publish_many(tasks)
+
+    assert [result.task for result in results] == tasks
+    assert [result.ok for result in results] == [index != 3 for index in range(10)]
+    assert exchange.max_in_flight == 3
+    assert len(exchange.sent) == 9
+
+
+@pytest.mark.asyncio()
+async def test_split_mode_routes_each_priority_to_its_own_queue(monkeypatch) -> None:
+    monkeypatch.setattr(priority_queue.settings, "TASK_QUEUE_MODE", "split")
+    exchange = FakeExchange(failing=set())
+    queue = PriorityTaskQueue()
+    task = make_task(priority=TaskPriority.HIGH)
+
+    await queue._send(FakeChannel(exchange), task)
+
+    [(routing_key, message)] = exchange.published
+    assert (routing_key, message.priority) == ("tasks_queue.high", 0)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from src.entity.tasks import TaskStatus, TaskStatusUpdate
+from src.infrastructure.messaging.status_buffer import StatusWriteBuffer
+
+
+def make_update(task_id=None, status: TaskStatus = TaskStatus.COMPLETED) -> TaskStatusUpdate:
+    return TaskStatusUpdate(
+        task_id=task_id or uuid4(),
+        status=status,
+        finished_at=datetime.utcnow(),
+        result="done",
+    )
+
+
+class RecordingFlush:
+    def __init__(self, failures: int = 0) -> None:
+        self.batches: list = []
+        self.failures = failures
+
+    async def __call__(self, updates) -> int:
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("db is down")
+        self.batches.append(list(updates))
+        return len(updates)
+
+
+@pytest.mark.asyncio()
+async def test_buffer_flushes_by_size_in_one_batch() -> None:
+    flush = RecordingFlush()
+    buffer = StatusWriteBuffer(flush, flush_interval=10.0, max_items=3)
+
+    await asyncio.wait_for(
+        asyncio.gather(*(buffer.submit(make_update()) for _ in range(3))), timeout=1.0
+    )
+
+    assert [len(batch) for batch in flush.batches] == [3]
+
+
+@pytest.mark.asyncio()
+async def test_buffer_flushes_by_interval_and_keeps_last_update_per_task() -> None:
+    flush = RecordingFlush()
+    buffer = StatusWriteBuffer(flush, flush_interval=0.01, max_items=100)
+    task_id = uuid4()
+
+    await asyncio.gather(
+        buffer.submit(make_update(task_id, TaskStatus.FAILED)),
+        buffer.submit(make_update(task_id, TaskStatus.COMPLETED)),
+    )
+
+    assert len(flush.batches) == 1
+    assert [update.status for update in flush.batches[0]] == [TaskStatus.COMPLETED]
+
+
+@pytest.mark.asyncio()
+async def test_buffer_retries_and_then_propagates_flush_error() -> None:
+    buffer = StatusWriteBuffer(
+        RecordingFlush(failures=1), flush_interval=0.0, retry_delay=0.0
+    )
+    await buffer.submit(make_update())
+
+    failing = StatusWriteBuffer(
+        RecordingFlush(failures=5), flush_interval=0.0, flush_attempts=2, retry_delay=0.0
+    )
+    with pytest.raises(RuntimeError):
+        await failing.submit(make_update())
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from conftest import FakeChannel, FakeExchange, make_task
+
+from src.entity.tasks import TaskPriority, TaskStatus
+from src.infrastructure.messaging.consumer import TaskConsumer
+from src.infrastructure.messaging.handlers import TaskHandlerRegistry
+
+
+class FakeMessage:
+    def __init__(self, payload: dict, headers: dict | None = None) -> None:
+        self.body = json.dumps(payload).encode()
+        self.headers = headers or {}
+        self.content_type = "application/json"
+        self.priority = 5
+        self.processed = False
+        self.requeued = False
+
+    @contextlib.asynccontextmanager
+    async def process(self, requeue: bool = False, ignore_processed: bool = False):
+        yield
+        self.processed = True
+
+    async def nack(self, requeue: bool = True) -> None:
+        self.requeued = requeue
+
+
+class SlowUseCase:
+    def __init__(self, claimable: bool = True) -> None:
+        self.claimable = claimable
+        self.active = 0
+        self.max_active = 0
+        self.claimed: list = []
+        self.finished: list = []
+        self.flushes: list = []
+        self.released: list = []
+        self.release_error: Exception | None = None
+
+    async def claim_task(self, task_id, *, reclaim: bool = False):
+        self.reclaim = reclaim
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if not self.claimable:
+            return None
+        self.claimed.append(task_id)
+        return make_task(
+            id=task_id, status=TaskStatus.IN_PROGRESS, started_at=datetime.utcnow()
+        )
+
+    async def finish_task(self, task_id, status, **kwargs):
+        self.finished.append((task_id, status))
+        return object()
+
+    async def release_task(self, task_id):
+        if self.release_error is not None:
+            raise self.release_error
+        self.released.append(task_id)
+        return object()
+
+    async def finish_tasks(self, updates):
+        self.flushes.append([(update.task_id, update.status) for update in updates])
+        return len(updates)
+
+
+@pytest.mark.asyncio()
+async def test_consumer_bounds_concurrent_messages() -> None:
+    usecase = SlowUseCase()
+    consumer = TaskConsumer(usecase=usecase, concurrency=2, write_behind=False)
+    messages = [FakeMessage({"id": str(uuid4())}) for _ in range(6)]
+
+    await asyncio.gather(*(consumer._on_message(message) for message in messages))
+
+    assert usecase.max_active == 2
+    assert all(message.processed for message in messages)
+    assert len(usecase.finished) == 6
+    assert {status for _, status in usecase.finished} == {TaskStatus.COMPLETED}
+
+
+@pytest.mark.asyncio()
+async def test_consumer_skips_task_that_cannot_be_claimed() -> None:
+    usecase = SlowUseCase(claimable=False)
+    consumer = TaskConsumer(usecase=usecase, write_behind=False)
+    message = FakeMessage({"id": str(uuid4())})
+
+    await consumer._on_message(message)
+
+    assert message.processed
+    assert usecase.finished == []
+
+
+@pytest.mark.asyncio()
+async def test_consumer_write_behind_acks_after_batched_flush() -> None:
+    usecase = SlowUseCase()
+    consumer = TaskConsumer(usecase=usecase, concurrency=10, write_behind=True)
+    messages = [FakeMessage({"id": str(uuid4())}) for _ in range(5)]
+
+    await asyncio.gather(*(consumer._on_message(message) for message in messages))
+
+    assert usecase.finished == []
+    assert len(usecase.flushes) == 1
+    assert len(usecase.flushes[0]) == 5
+    assert all(message.processed for message in messages)
+
+
+@pytest.mark.asyncio()
+async def test_consumer_marks_task_failed_when_handler_raises() -> None:
+    usecase = SlowUseCase()
+    handlers = TaskHandlerRegistry()
+
+    @handlers.register("Task")
+    async def broken(task):
+        raise RuntimeError("boom")
+
+    consumer = TaskConsumer(
+        usecase=usecase, write_behind=False, handlers=handlers, retry_delays_ms=[1000]
+    )
+    consumer._channel = channel = FakeChannel()
+    message = FakeMessage({"id": str(uuid4())}, headers={"x-attempt": 1})
+
+    await consumer._on_message(message)
+
+    assert usecase.reclaim is False
+    assert [status for _, status in usecase.finished] == [TaskStatus.FAILED]
+    [(routing_key, parked)] = channel.default_exchange.published
+    assert routing_key == "tasks_queue.parking"
+    assert parked.headers["x-last-error"] == "boom"
+    assert message.processed
+
+
+@pytest.mark.asyncio()
+async def test_consumer_schedules_delayed_retry_on_transient_failure() -> None:
+    usecase = SlowUseCase()
+    handlers = TaskHandlerRegistry()
+
+    @handlers.register("Task")
+    async def flaky(task):
+        raise ConnectionError("database is restarting")
+
+    consumer = TaskConsumer(
+        usecase=usecase, write_behind=False, handlers=handlers, retry_delays_ms=[1000, 5000]
+    )
+    consumer._channel = channel = FakeChannel()
+    message = FakeMessage({"id": str(uuid4())})
+
+    await consumer._on_message(message)
+
+    assert usecase.finished == []
+    assert usecase.released == usecase.claimed
+    [(routing_key, retried)] = channel.default_exchange.published
+    assert routing_key == "tasks_queue.retry.1"
+    assert retried.headers["x-attempt"] == 1
+    assert retried.body == message.body
+    assert message.processed
+
+
+@pytest.mark.asyncio()
+async def test_consumer_retries_handler_value_error_instead_of_parking() -> None:
+    usecase = SlowUseCase()
+    handlers = TaskHandlerRegistry()
+
+    @handlers.register("Task")
+    async def picky(task):
+        raise ValueError("unexpected input")
+
+    consumer = TaskConsumer(
+        usecase=usecase, write_behind=False, handlers=handlers, retry_delays_ms=[1000, 5000]
+    )
+    consumer._channel = channel = FakeChannel()
+    message = FakeMessage({"id": str(uuid4())})
+
+    await consumer._on_message(message)
+
+    assert usecase.released == usecase.claimed
+    [(routing_key, retried)] = channel.default_exchange.published
+    assert routing_key == "tasks_queue.retry.1"
+    assert retried.headers["x-last-error"] == "unexpected input"
+    assert "x-reclaim" not in retried.headers
+
+
+@pytest.mark.asyncio()
+async def test_consumer_requeues_message_when_retry_cannot_be_published() -> None:
+    usecase = SlowUseCase()
+    handlers = TaskHandlerRegistry()
+
+    @handlers.register("Task")
+    async def flaky(task):
+        raise RuntimeError("boom")
+
+    consumer = TaskConsumer(
+        usecase=usecase, write_behind=False, handlers=handlers, retry_delays_ms=[1000]
+    )
+    consumer._channel = FakeChannel(FakeExchange(error=ConnectionError("broker nacked")))
+    message = FakeMessage({"id": str(uuid4())})
+
+    await consumer._on_message(message)
+
+    assert message.requeued
+
+
+@pytest.mark.asyncio()
+async def test_consumer_marks_retry_for_reclaim_only_when_release_failed() -> None:
+    usecase = SlowUseCase()
+    usecase.release_error = ConnectionError("database is restarting")
+    handlers = TaskHandlerRegistry()
+
+    @handlers.register("Task")
+    async def flaky(task):
+        raise RuntimeError("boom")
+
+    consumer = TaskConsumer(
+        usecase=usecase, write_behind=False, handlers=handlers, retry_delays_ms=[1000, 5000]
+    )
+    consumer._channel = channel = FakeChannel()
+    message = FakeMessage({"id": str(uuid4())})
+
+    await consumer._on_message(message)
+    [(_, retried)] = channel.default_exchange.published
+    assert retried.headers["x-reclaim"] is True
+
+    redelivered = FakeMessage({"id": str(uuid4())}, headers=dict(retried.headers))
+    usecase.release_error = None
+    await consumer._on_message(redelivered)
+    assert usecase.reclaim is True
+
+
+@pytest.mark.asyncio()
+async def test_duplicate_delivery_keeps_reclaim_marker_of_claim_holder() -> None:
+    usecase = SlowUseCase()
+    usecase.release_error = ConnectionError("database is restarting")
+    handlers = TaskHandlerRegistry()
+    started = asyncio.Event()
+    proceed = asyncio.Event()
+
+    @handlers.register("Task")
+    async def flaky(task):
+        started.set()
+        await proceed.wait()
+        raise RuntimeError("boom")
+
+    consumer = TaskConsumer(
+        usecase=usecase, write_behind=False, handlers=handlers, retry_delays_ms=[1000, 5000]
+    )
+    consumer._channel = channel = FakeChannel()
+    task_id = str(uuid4())
+
+    first = asyncio.create_task(consumer._on_message(FakeMessage({"id": task_id})))
+    await started.wait()
+    # Дубликат не получает захват и завершается, пока первая доставка работает.
+    usecase.claimable = False
+    await consumer._on_message(FakeMessage({"id": task_id}))
+    proceed.set()
+    await first
+
+    [(_, retried)] = channel.default_exchange.published
+    assert retried.headers["x-reclaim"] is True
+    assert consumer._claimed == {}
+
+
+@pytest.mark.asyncio()
+async def test_consumer_parks_invalid_messages() -> None:
+    consumer = TaskConsumer(usecase=SlowUseCase(), write_behind=False)
+    consumer._channel = channel = FakeChannel()
+
+    await consumer._on_message(FakeMessage({"id": "not-a-uuid"}))
+
+    [(routing_key, _)] = channel.default_exchange.published
+    assert routing_key == "tasks_queue.parking"
+
+
+@pytest.mark.asyncio()
+async def test_drain_waits_for_in_flight_tasks_and_flushes_statuses() -> None:
+    usecase = SlowUseCase()
+    consumer = TaskConsumer(usecase=usecase, write_behind=True, shutdown_timeout=1.0)
+    message = FakeMessage({"id": str(uuid4())})
+
+    handling = asyncio.create_task(consumer._on_message(message))
+    await asyncio.sleep(0)
+    await consumer.drain()
+
+    assert handling.done()
+    assert message.processed
+    assert len(usecase.flushes) == 1
+
+    late = FakeMessage({"id": str(uuid4())})
+    await consumer._on_message(late)
+    assert late.requeued
+    assert not late.processed
+
+
+@pytest.mark.asyncio()
+async def test_drain_interrupts_tasks_after_timeout_and_requeues_them() -> None:
+    usecase = SlowUseCase()
+    handlers = TaskHandlerRegistry()
+
+    @handlers.register("Task")
+    async def stuck(task):
+        await asyncio.sleep(10)
+
+    consumer = TaskConsumer(
+        usecase=usecase, write_behind=False, handlers=handlers, shutdown_timeout=0.05
+    )
+    message = FakeMessage({"id": str(uuid4())})
+
+    handling = asyncio.create_task(consumer._on_message(message))
+    await asyncio.sleep(0.02)
+    await consumer.drain()
+
+    assert handling.cancelled()
+    assert message.requeued
+    assert usecase.released == usecase.claimed
+    assert usecase.finished == []
+
+
+@pytest.mark.asyncio()
+async def test_consumer_drops_messages_of_cancelled_tasks_without_claim() -> None:
+    usecase = SlowUseCase()
+    consumer = TaskConsumer(usecase=usecase, write_behind=False)
+    task_id = uuid4()
+
+    await consumer._on_control(
+        FakeMessage({"type": "task.cancelled", "task_id": str(task_id)})
+    )
+    message = FakeMessage({"id": str(task_id)})
+    await consumer._on_message(message)
+
+    assert message.processed
+    assert usecase.claimed == []
+
+
+@pytest.mark.asyncio()
+async def test_consumer_interrupts_running_handler_on_cancellation() -> None:
+    usecase = SlowUseCase()
+    handlers = TaskHandlerRegistry()
+    started = asyncio.Event()
+
+    @handlers.register("Task")
+    async def long_running(task):
+        started.set()
+        await asyncio.sleep(10)
+
+    consumer = TaskConsumer(usecase=usecase, write_behind=False, handlers=handlers)
+    task_id = uuid4()
+    message = FakeMessage({"id": str(task_id)})
+
+    handling = asyncio.create_task(consumer._on_message(message))
+    await asyncio.wait_for(started.wait(), timeout=1.0)
+    consumer.cancel(task_id)
+    await asyncio.wait_for(handling, timeout=1.0)
+
+    assert message.processed
+    assert usecase.finished == []
+    assert usecase.released == []
+
+
+@pytest.mark.asyncio()
+async def test_split_mode_consumes_priority_queues_through_scheduler() -> None:
+    usecase = SlowUseCase()
+    consumer = TaskConsumer(
+        usecase=usecase, write_behind=False, concurrency=2, queue_mode="split"
+    )
+    consumer._start_workers()
+    messages = {
+        priority: [FakeMessage({"id": str(uuid4())}) for _ in range(3)]
+        for priority in TaskPriority
+    }
+    for priority, batch in messages.items():
+        retry = consumer._split_queues[priority]
+        for message in batch:
+            await consumer._enqueue(priority, retry, message)
+
+    await asyncio.sleep(0.1)
+    leftover = FakeMessage({"id": str(uuid4())})
+    consumer._scheduler.put(TaskPriority.LOW, (leftover, consumer._split_queues[TaskPriority.LOW]))
+    await consumer.drain()
+
+    assert all(message.processed for batch in messages.values() for message in batch)
+    assert len(usecase.finished) == 9
+    assert leftover.requeued and not leftover.processed
+    assert consumer._split_queues[TaskPriority.HIGH].retry_queue(1) == "tasks_queue.high.retry.1"
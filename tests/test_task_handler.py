@@ -6,7 +6,8 @@ from fastapi import HTTPException
 from src.api.handlers.tasks.task_handler import (cancel_task, create_task,
                                                  get_task, get_task_status,
                                                  list_tasks)
-from src.entity.tasks import CreateTask, TaskPriority, TaskStatus
+from src.entity.tasks import (CreateTask, TaskCursor, TaskPriority,
+                              TaskStatus)
 from src.api.schemas.requests_schemas.tasks.schemas import (TaskCreateRequest,
                                                             TaskListFilterQuery)
 
@@ -94,3 +95,25 @@ async def test_cancel_task_changes_status_to_cancelled(fake_task_usecase) -> Non
     assert response.id == created.id
     assert response.status == TaskStatus.CANCELLED
 
+
+@pytest.mark.asyncio()
+async def test_list_tasks_cursor_round_trips_through_response(fake_task_usecase) -> None:
+    for index in range(3):
+        await fake_task_usecase.create_task(
+            CreateTask(name=f"Task {index}", description="Paged", priority=TaskPriority.LOW)
+        )
+
+    first = await list_tasks(
+        uc=fake_task_usecase, filters=TaskListFilterQuery(page_size=2)
+    )
+    cursor = TaskCursor.decode(first.next_cursor)
+    second = await list_tasks(
+        uc=fake_task_usecase,
+        filters=TaskListFilterQuery(page_size=2, cursor=first.next_cursor),
+    )
+
+    assert cursor.id == first.items[-1].id
+    assert cursor.created_at == first.items[-1].created_at
+    assert len(second.items) == 1
+    assert second.next_cursor is None
+
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from conftest import make_task
+
+from src.entity.tasks import Task
+from src.infrastructure.messaging.handlers import HandlerKind, TaskHandlerRegistry
+
+
+def cpu_handler(task: Task) -> int:
+    return os.getpid()
+
+
+def slow_cpu_handler(task: Task) -> None:
+    time.sleep(1.0)
+
+
+@pytest.mark.asyncio()
+async def test_registry_runs_handlers_in_declared_executor() -> None:
+    registry = TaskHandlerRegistry(cpu_workers=1)
+
+    @registry.register("echo")
+    async def echo(task: Task) -> str:
+        return task.description
+
+    @registry.register("blocking", kind=HandlerKind.THREAD)
+    def blocking(task: Task) -> int:
+        return threading.get_ident()
+
+    registry.register("compute", kind=HandlerKind.CPU)(cpu_handler)
+
+    try:
+        assert await registry.run(make_task(name="echo", description="Handle me")) == "Handle me"
+        assert await registry.run(make_task(name="blocking")) != str(threading.get_ident())
+        assert await registry.run(make_task(name="compute")) != str(os.getpid())
+        assert await registry.run(make_task(name="unknown")) == "Processed by TaskConsumer"
+    finally:
+        registry.close()
+
+
+def test_registry_rejects_sync_function_declared_async() -> None:
+    registry = TaskHandlerRegistry()
+
+    with pytest.raises(TypeError):
+        registry.register("sync")(lambda task: "nope")
+
+
+@pytest.mark.asyncio()
+async def test_registry_close_does_not_wait_for_running_cpu_handler() -> None:
+    registry = TaskHandlerRegistry(cpu_workers=1)
+    registry.register("slow", kind=HandlerKind.CPU)(slow_cpu_handler)
+
+    running = asyncio.create_task(registry.run(make_task(name="slow")))
+    await asyncio.sleep(0.2)
+
+    started = time.monotonic()
+    registry.close()
+    elapsed = time.monotonic() - started
+
+    running.cancel()
+    await asyncio.gather(running, return_exceptions=True)
+    assert elapsed < 0.5
+
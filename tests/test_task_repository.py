@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from conftest import RecordingSession, compile_sql
+
+from src.entity.tasks import (Pagination, SearchMode, TaskCursor, TaskFilter,
+                              TaskId, TaskStatus)
+from src.infrastructure.persistence.repositories.tasks import TaskRepository
+
+repository = TaskRepository(session=None)  # type: ignore[arg-type]
+
+
+def _allowed_statuses(stmt) -> set:
+    [allowed] = [value for value in stmt.compile().params.values() if isinstance(value, list)]
+    return set(allowed)
+
+
+def test_substring_search_uses_trigram_friendly_ilike() -> None:
+    sql = compile_sql(repository._list_stmt(TaskFilter(search="report"), Pagination()))
+
+    assert "tasks.name ILIKE" in sql
+    assert "tasks.description ILIKE" in sql
+    assert "lower(" not in sql
+
+
+def test_fulltext_search_matches_vector_and_ranks_results() -> None:
+    filters = TaskFilter(search="monthly report", search_mode=SearchMode.FULLTEXT)
+
+    sql = compile_sql(repository._list_stmt(filters, Pagination()))
+
+    assert "tasks.search_vector @@ websearch_to_tsquery('simple'" in sql
+    assert "ORDER BY ts_rank_cd(tasks.search_vector" in sql
+
+
+def test_fulltext_search_with_cursor_keeps_keyset_order() -> None:
+    filters = TaskFilter(search="report", search_mode=SearchMode.FULLTEXT)
+    cursor = TaskCursor(created_at=datetime.utcnow(), id=TaskId(uuid4()))
+
+    sql = compile_sql(repository._list_stmt(filters, Pagination(cursor=cursor)))
+
+    assert "ts_rank_cd" not in sql
+    assert "(tasks.created_at, tasks.id) <" in sql
+    assert "ORDER BY tasks.created_at DESC, tasks.id DESC" in sql
+
+
+@pytest.mark.asyncio()
+async def test_transition_checks_and_updates_status_in_one_statement() -> None:
+    session = RecordingSession(row=(TaskStatus.COMPLETED, None))
+    repo = TaskRepository(session)  # type: ignore[arg-type]
+
+    transition = await repo.cancel_task(TaskId(uuid4()))
+
+    [stmt] = session.statements
+    sql = compile_sql(stmt)
+    assert sql.startswith("WITH current AS")
+    assert "UPDATE tasks SET status=" in sql
+    assert "RETURNING" in sql
+    assert _allowed_statuses(stmt) == {
+        TaskStatus.NEW,
+        TaskStatus.PENDING,
+        TaskStatus.IN_PROGRESS,
+    }
+    assert transition.found and not transition.applied
+    assert transition.previous is TaskStatus.COMPLETED
+    assert session.scalar_params == []
+
+
+@pytest.mark.asyncio()
+async def test_transition_lost_to_concurrent_update_reports_current_status() -> None:
+    # Снимок CTE видел PENDING, но UPDATE перепроверил строку после
+    # параллельного завершения и ничего не обновил.
+    session = RecordingSession(row=(TaskStatus.PENDING, None), scalar=TaskStatus.COMPLETED)
+    repo = TaskRepository(session)  # type: ignore[arg-type]
+
+    transition = await repo.cancel_task(TaskId(uuid4()))
+
+    assert transition.found and not transition.applied
+    assert transition.previous is TaskStatus.COMPLETED
+    assert len(session.scalar_params) == 1
+
+
+@pytest.mark.asyncio()
+async def test_transition_reports_missing_task() -> None:
+    repo = TaskRepository(RecordingSession(row=None))  # type: ignore[arg-type]
+
+    transition = await repo.set_status(TaskId(uuid4()), TaskStatus.FAILED)
+
+    assert not transition.found
+
+
+@pytest.mark.asyncio()
+async def test_claim_sources_come_from_transition_table() -> None:
+    session = RecordingSession()
+    repo = TaskRepository(session)  # type: ignore[arg-type]
+
+    await repo.claim_task(TaskId(uuid4()))
+    await repo.claim_task(TaskId(uuid4()), reclaim=True)
+
+    first, reclaim = (_allowed_statuses(stmt) for stmt in session.statements)
+    assert first == {TaskStatus.NEW, TaskStatus.PENDING}
+    assert reclaim == {TaskStatus.NEW, TaskStatus.PENDING, TaskStatus.IN_PROGRESS}
+
+
+PLAN = [{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 321}}]
+
+
+@pytest.mark.asyncio()
+async def test_estimate_without_filters_reads_reltuples() -> None:
+    session = RecordingSession(row=PLAN, scalar=12345.0)
+
+    estimated = await TaskRepository(session).estimate_tasks(TaskFilter())  # type: ignore[arg-type]
+
+    assert estimated == 12345
+    assert session.scalar_params == [{"table": "tasks"}]
+    assert session.statements == []
+
+
+@pytest.mark.asyncio()
+async def test_estimate_falls_back_to_explain_for_unanalyzed_table() -> None:
+    session = RecordingSession(row=json.dumps(PLAN), scalar=-1.0)
+
+    estimated = await TaskRepository(session).estimate_tasks(TaskFilter())  # type: ignore[arg-type]
+
+    assert estimated == 321
+    assert len(session.statements) == 1
+
+
+@pytest.mark.asyncio()
+async def test_estimate_with_filters_explains_with_bound_parameters() -> None:
+    session = RecordingSession(row=PLAN, scalar=12345.0)
+    filters = TaskFilter(status=TaskStatus.NEW, search="it's")
+
+    estimated = await TaskRepository(session).estimate_tasks(filters)  # type: ignore[arg-type]
+
+    assert estimated == 321
+    assert session.scalar_params == []
+    [stmt] = session.statements
+    sql = compile_sql(stmt)
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT tasks.id")
+    assert "it's" not in sql
+    assert stmt.compile().params == {
+        "status_1": TaskStatus.NEW,
+        "name_1": "%it's%",
+        "description_1": "%it's%",
+    }
+
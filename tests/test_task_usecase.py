@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import contextlib
 from dataclasses import replace
 from datetime import datetime, timezone
+from types import SimpleNamespace
 from uuid import uuid4
 
 import pytest
+from conftest import make_task
 
-from src.entity.tasks import Task, TaskId, TaskPriority, TaskStatus
-from src.exceptions import TaskCancellationError, TaskNotFoundError
-from src.usecase.tasks import TaskUseCase
+from src.entity.outbox import NewOutboxEvent
+from src.entity.tasks import (CreateTask, Pagination, Task, TaskFilter, TaskId,
+                              TaskPage, TaskPriority, TaskStatus,
+                              TaskTransition, TotalMode, can_transition)
+from src.exceptions import (TaskCancellationError, TaskNotFoundError,
+                            TaskTransitionError)
+from src.usecase.tasks import TaskUseCase, TotalCountCache
 
 
 class FakeTaskRepository:
@@ -18,13 +25,75 @@ class FakeTaskRepository:
     async def get_task(self, task_id):
         return self.tasks.get(task_id)
 
-    async def cancel_task(self, task_id):
+    async def transition(self, task_id, target, **values):
         task = self.tasks.get(task_id)
         if task is None:
-            return None
-        cancelled = replace(task, status=TaskStatus.CANCELLED)
-        self.tasks[task_id] = cancelled
-        return cancelled
+            return TaskTransition(previous=None)
+        if not can_transition(task.status, target):
+            return TaskTransition(previous=task.status)
+        updated = replace(task, status=target, **values)
+        self.tasks[task_id] = updated
+        return TaskTransition(previous=task.status, task=updated)
+
+    async def set_status(self, task_id, status, **values):
+        return await self.transition(task_id, status, **values)
+
+    async def cancel_task(self, task_id):
+        return await self.transition(task_id, TaskStatus.CANCELLED)
+
+
+class CountingTaskRepository:
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.counts = 0
+        self.modes: list[TotalMode] = []
+
+    async def list_tasks(self, filters, pagination, *, total_mode=TotalMode.EXACT):
+        self.modes.append(total_mode)
+        total = None
+        if total_mode is TotalMode.EXACT:
+            total = await self.count_tasks(filters)
+        return TaskPage(items=[], total=total, total_mode=total_mode)
+
+    async def count_tasks(self, filters):
+        self.counts += 1
+        return self.total
+
+
+class FakeOutboxRepository:
+    def __init__(self) -> None:
+        self.events: list[NewOutboxEvent] = []
+
+    async def add_event(self, event: NewOutboxEvent) -> None:
+        self.events.append(event)
+
+
+class FakeCreatingTaskRepository:
+    async def create_task(self, payload: CreateTask) -> Task:
+        return Task(
+            id=TaskId(uuid4()),
+            name=payload.name,
+            description=payload.description,
+            priority=payload.priority,
+            status=TaskStatus.NEW,
+            created_at=datetime.now(timezone.utc),
+            started_at=None,
+            finished_at=None,
+            result=None,
+            error=None,
+        )
+
+
+class RecordingUnitOfWork:
+    def __init__(self, tasks=None) -> None:
+        self.repositories = SimpleNamespace(
+            tasks=tasks or FakeCreatingTaskRepository(),
+            outbox=FakeOutboxRepository(),
+        )
+
+    @contextlib.asynccontextmanager
+    async def init(self):
+        yield self.repositories
 
 
 class NoopUnitOfWork:
@@ -50,23 +119,116 @@ async def test_get_task_raises_not_found_when_absent():
 @pytest.mark.asyncio()
 async def test_cancel_task_rejects_completed_task():
     task_id = TaskId(uuid4())
-    task = Task(
-        id=task_id,
-        name="Done",
-        description="Already finished",
-        priority=TaskPriority.HIGH,
-        status=TaskStatus.COMPLETED,
-        created_at=datetime.now(timezone.utc),
-        started_at=None,
-        finished_at=None,
-        result=None,
-        error=None,
+    repository = FakeTaskRepository({task_id: make_task(id=task_id, status=TaskStatus.COMPLETED)})
+    uow = RecordingUnitOfWork(tasks=repository)
+    usecase = TaskUseCase(repository=repository, uow=uow)
+
+    with pytest.raises(TaskCancellationError):
+        await usecase.cancel_task(task_id)
+    assert uow.repositories.outbox.events == []
+
+
+@pytest.mark.asyncio()
+async def test_cancel_task_reports_missing_task_without_outbox_event():
+    uow = RecordingUnitOfWork(tasks=FakeTaskRepository())
+    usecase = TaskUseCase(repository=FakeTaskRepository(), uow=uow)
+
+    with pytest.raises(TaskNotFoundError):
+        await usecase.cancel_task(TaskId(uuid4()))
+    assert uow.repositories.outbox.events == []
+
+
+@pytest.mark.asyncio()
+async def test_set_status_distinguishes_illegal_transition_from_missing_task():
+    task_id = TaskId(uuid4())
+    repository = FakeTaskRepository({task_id: make_task(id=task_id, status=TaskStatus.NEW)})
+    usecase = TaskUseCase(repository=repository, uow=RecordingUnitOfWork(tasks=repository))
+
+    with pytest.raises(TaskTransitionError) as exc_info:
+        await usecase.set_status(task_id, TaskStatus.COMPLETED)
+    with pytest.raises(TaskNotFoundError):
+        await usecase.set_status(TaskId(uuid4()), TaskStatus.COMPLETED)
+    started = await usecase.set_status(task_id, TaskStatus.IN_PROGRESS)
+
+    assert exc_info.value.status is TaskStatus.NEW
+    assert started.status is TaskStatus.IN_PROGRESS
+    assert started.finished_at is None
+
+
+@pytest.mark.asyncio()
+async def test_cancel_task_broadcasts_cancellation_through_outbox():
+    task_id = TaskId(uuid4())
+    repository = FakeTaskRepository({task_id: make_task(id=task_id, status=TaskStatus.IN_PROGRESS)})
+    uow = RecordingUnitOfWork(tasks=repository)
+    usecase = TaskUseCase(repository=repository, uow=uow)
+
+    cancelled = await usecase.cancel_task(task_id)
+
+    assert cancelled.status is TaskStatus.CANCELLED
+    [event] = uow.repositories.outbox.events
+    assert event.event_type == "task.cancelled"
+    assert event.payload == {"task_id": str(task_id)}
+
+
+@pytest.mark.asyncio()
+async def test_create_task_embeds_task_snapshot_in_outbox_event():
+    uow = RecordingUnitOfWork()
+    usecase = TaskUseCase(repository=FakeTaskRepository(), uow=uow)
+
+    task = await usecase.create_task(
+        CreateTask(name="Snapshot", description="Embed me", priority=TaskPriority.LOW)
     )
+
+    [event] = uow.repositories.outbox.events
+    assert event.payload["task_id"] == str(task.id)
+    assert Task.from_snapshot(event.payload["task"]) == task
+
+
+@pytest.mark.asyncio()
+async def test_list_tasks_reuses_cached_total_per_filter_key():
+    repository = CountingTaskRepository(total=42)
     usecase = TaskUseCase(
-        repository=FakeTaskRepository({task_id: task}),
-        uow=NoopUnitOfWork(),
+        repository=repository, uow=NoopUnitOfWork(), total_cache=TotalCountCache(ttl=60)
     )
 
-    with pytest.raises(TaskCancellationError):
-        await usecase.cancel_task(task_id)
+    first = await usecase.list_tasks(TaskFilter(), Pagination(), TotalMode.CACHED)
+    repository.total = 43
+    second = await usecase.list_tasks(TaskFilter(), Pagination(page=2), TotalMode.CACHED)
+    other = await usecase.list_tasks(
+        TaskFilter(status=TaskStatus.NEW), Pagination(), TotalMode.CACHED
+    )
+
+    assert (first.total, second.total, other.total) == (42, 42, 43)
+    assert first.total_mode is TotalMode.CACHED
+    assert repository.counts == 2
+    assert set(repository.modes) == {TotalMode.NONE}
+
+
+@pytest.mark.asyncio()
+async def test_list_tasks_skips_count_when_total_is_not_needed():
+    repository = CountingTaskRepository(total=42)
+    usecase = TaskUseCase(repository=repository, uow=NoopUnitOfWork())
+
+    page = await usecase.list_tasks(TaskFilter(), Pagination(), TotalMode.NONE)
+
+    assert page.total is None
+    assert page.total_mode is TotalMode.NONE
+    assert repository.counts == 0
+
+
+def test_total_cache_expires_entries_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.usecase.tasks.total_cache.time.monotonic", lambda: now[0])
+    cache = TotalCountCache(ttl=5, maxsize=1)
+
+    cache.set(TaskFilter(), 10)
+    now[0] += 4
+    assert cache.get(TaskFilter()) == 10
+    now[0] += 1
+    assert cache.get(TaskFilter()) is None
+
+    cache.set(TaskFilter(status=TaskStatus.NEW), 1)
+    cache.set(TaskFilter(status=TaskStatus.FAILED), 2)
+    assert cache.get(TaskFilter(status=TaskStatus.NEW)) is None
+    assert len(cache) == 1
 
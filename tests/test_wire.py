@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict
+
+import pytest
+from conftest import make_task
+
+from src.entity.tasks import TaskPriority
+from src.infrastructure.messaging.wire import (LEGACY_CONTENT_TYPE,
+                                               TASK_CONTENT_TYPE, decode_task,
+                                               encode_task)
+
+
+def test_compact_message_round_trips_and_is_smaller_than_legacy() -> None:
+    task = make_task(
+        description="A long description the consumer never reads " * 10,
+        priority=TaskPriority.LOW,
+    )
+    legacy = json.dumps(asdict(task), default=str).encode()
+
+    body = encode_task(task)
+
+    assert len(body) < len(legacy) / 3
+    assert decode_task(body, TASK_CONTENT_TYPE) == {
+        "v": 1,
+        "id": str(task.id),
+        "name": task.name,
+        "priority": "LOW",
+    }
+
+
+@pytest.mark.parametrize("content_type", [None, LEGACY_CONTENT_TYPE])
+def test_legacy_messages_are_still_decoded(content_type) -> None:
+    task = make_task(
+        description="A long description the consumer never reads " * 10,
+        priority=TaskPriority.LOW,
+    )
+    legacy = json.dumps(asdict(task), default=str).encode()
+
+    assert decode_task(legacy, content_type)["id"] == str(task.id)
+
+
+def test_unknown_content_type_or_version_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        decode_task(b"\x00", "application/x-msgpack")
+    with pytest.raises(ValueError):
+        decode_task(b'{"v": 2, "id": "x"}', TASK_CONTENT_TYPE)